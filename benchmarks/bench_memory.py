@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória: FileInfo (__slots__) vs. dicts aninhados
+
+Analisa os módulos da biblioteca padrão uma vez e replica os resultados até
+o número de arquivos pedido, recriando as strings em cada cópia (como
+acontece quando cada arquivo é analisado em separado ou chega de um processo
+do pool). Mede a memória retida por cada representação com tracemalloc e o
+custo de serializá-las com pickle, como na troca de resultados entre
+processos.
+
+Uso:
+    python benchmarks/bench_memory.py [diretório] [--files N]
+
+Sem diretório, usa a biblioteca padrão.
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import codescope360 as cs  # noqa: E402
+
+
+def analyze_tree(root):
+    """Analisa os .py de um diretório e retorna os resultados serializados (JSON)"""
+    python_files = cs.find_python_files(root)
+    cs.set_module_resolver(cs.ModuleResolver(cs.project_module_names(python_files)))
+    return [json.dumps(file_info.to_dict()) for file_info in cs.analyze_files(python_files, root)]
+
+
+def build(encoded, count, factory):
+    """Cria `count` resultados a partir dos JSON, medindo a memória retida"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = [factory(json.loads(encoded[i % len(encoded)])) for i in range(count)]
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return results, retained, elapsed
+
+
+def pickle_cost(results):
+    """Tamanho e tempo de ida e volta com pickle"""
+    start = time.perf_counter()
+    data = pickle.dumps(results, protocol=pickle.HIGHEST_PROTOCOL)
+    pickle.loads(data)
+    return len(data), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("root", nargs="?", default=os.path.dirname(os.__file__))
+    parser.add_argument("--files", type=int, default=40000)
+    args = parser.parse_args()
+
+    encoded = [item for item in analyze_tree(args.root) if '"error"' not in item[:200]]
+    print(f"{len(encoded)} arquivos analisados em {args.root}, replicados para {args.files}")
+    print()
+    print(f"{'representação':<16} {'memória MB':>11} {'B/arquivo':>10} {'criação s':>10} "
+          f"{'pickle MB':>10} {'pickle s':>9}")
+
+    rows = {}
+    for label, factory in (("dicts", lambda data: data), ("FileInfo", cs.FileInfo.from_dict)):
+        results, retained, elapsed = build(encoded, args.files, factory)
+        size, pickle_time = pickle_cost(results)
+        rows[label] = retained
+        print(f"{label:<16} {retained / 2**20:>11.1f} {retained / args.files:>10.0f} "
+              f"{elapsed:>10.2f} {size / 2**20:>10.1f} {pickle_time:>9.2f}")
+        del results
+
+    print("-" * 71)
+    print(f"Economia de memória: {rows['dicts'] / rows['FileInfo']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark da extração por arquivo: travessia única vs. varreduras múltiplas
+
+Compara o FileInfoCollector (uma travessia das instruções + uma varredura de
+linhas) com a abordagem anterior, que percorria a árvore inteira três vezes
+com ast.walk e relia o código-fonte com regex para comentários e bloco main.
+
+Uso:
+    python benchmarks/bench_single_pass.py [arquivo.py ...] [--repeat N]
+
+Sem arquivos, usa os maiores módulos da biblioteca padrão.
+"""
+
+import os
+import sys
+import ast
+import re
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import codescope360 as cs  # noqa: E402
+
+
+def legacy_extract(source_code, tree, resolver):
+    """Extração no formato antigo: três ast.walk e duas releituras do código"""
+    extract = cs.extract_docstring
+    
+    imports = {"standard_lib": set(), "third_party": set(), "project": set()}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for name in node.names:
+                imports[resolver.classify(name.name)].add(name.name)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            imports[resolver.classify(node.module)].update(
+                f"{node.module}.{n.name}" for n in node.names)
+    
+    classes = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            classes.append({
+                "name": node.name,
+                "docstring": extract(node),
+                "methods": [{"name": sub.name, "docstring": extract(sub)}
+                            for sub in node.body if isinstance(sub, ast.FunctionDef)]
+            })
+    
+    functions = [{"name": node.name, "docstring": extract(node)}
+                 for node in ast.iter_child_nodes(tree) if isinstance(node, ast.FunctionDef)]
+    
+    lines = source_code.splitlines()
+    comments, block = [], []
+    for line in lines:
+        line = line.strip()
+        if line.startswith('#'):
+            block.append(line[1:].strip())
+        elif line:
+            break
+    if block:
+        comments.append(" ".join(block))
+    block = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith('#'):
+            block.append(line[1:].strip())
+        else:
+            if len(block) >= 3:
+                comments.append(" ".join(block))
+            block = []
+    
+    main_block = re.search(r'if\s+__name__\s*==\s*[\'"]__main__[\'"]\s*:', source_code)
+    return classes, functions, imports, comments, main_block
+
+
+def single_pass_extract(source_code, tree, resolver):
+    """Extração atual: FileInfoCollector + varredura única de linhas"""
+    collector = cs.FileInfoCollector(resolver)
+    collector.visit(tree)
+    lines = source_code.splitlines()
+    comments = cs.get_significant_comments(lines, collector.string_spans)
+    main_block = cs.summarize_main_block(lines, collector.main_guard)
+    return collector.classes, collector.functions, collector.imports, comments, main_block
+
+
+def best_of(func, repeat):
+    """Menor tempo (em segundos) entre `repeat` execuções"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def default_files(count=8):
+    """Seleciona os maiores módulos .py da biblioteca padrão"""
+    stdlib_dir = os.path.dirname(os.__file__)
+    candidates = [os.path.join(stdlib_dir, name) for name in os.listdir(stdlib_dir)
+                  if name.endswith(".py")]
+    candidates.sort(key=os.path.getsize, reverse=True)
+    return candidates[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    resolver = cs.ModuleResolver()
+    files = args.files or default_files()
+    
+    print(f"{'arquivo':<28} {'KB':>7} {'parse ms':>9} {'antigo ms':>10} {'novo ms':>8} {'ganho':>6}")
+    total_old = total_new = 0.0
+    for path in files:
+        with open(path, encoding="utf-8") as f:
+            source_code = f.read()
+        tree = ast.parse(source_code)
+        
+        parse_time = best_of(lambda: ast.parse(source_code), args.repeat)
+        old = best_of(lambda: legacy_extract(source_code, tree, resolver), args.repeat)
+        new = best_of(lambda: single_pass_extract(source_code, tree, resolver), args.repeat)
+        total_old += parse_time + old
+        total_new += parse_time + new
+        
+        print(f"{os.path.basename(path):<28} {len(source_code) / 1024:>7.0f} "
+              f"{parse_time * 1000:>9.2f} {old * 1000:>10.2f} {new * 1000:>8.2f} {old / new:>5.1f}x")
+    
+    print("-" * 73)
+    print(f"Por arquivo (parse + extração): {total_old * 1000:.1f} ms -> {total_new * 1000:.1f} ms "
+          f"({total_old / total_new:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,43 +7,508 @@ em formato Markdown, descrevendo a estrutura, classes, funções, importações
 relacionamentos entre os arquivos do projeto.
 
 Uso:
-    python codescope360.py [caminho_do_projeto]
+    python codescope360.py [caminho_do_projeto] [--jobs N] [--no-cache]
+    python codescope360.py bench [--files N] [--runs N] [--compare resultado.json]
+    python codescope360.py batch [projeto ...] [--manifest lista.txt] [--output-dir DIR]
+    python codescope360.py merge shard1.jsonl shard2.jsonl ... [--format LISTA]
+    python codescope360.py query NOME [--prefix | --regex | --importers] [--project DIR]
+    python codescope360.py serve [projeto ...] [--port N] [--refresh-interval SEGUNDOS]
+    python codescope360.py diff base.json alvo.json|diretório [--format LISTA]
 
-Se o caminho não for fornecido, o diretório atual será usado.
+Se o caminho não for fornecido, o diretório atual será usado. Um projeto cujo
+nome coincide com um subcomando (bench, batch, diff, merge, query, serve) deve ser
+indicado com ./ na frente, ex.: python codescope360.py ./bench
 """
 
 import os
 import sys
 import ast
 import re
+import argparse
+import hashlib
+import json
+import sqlite3
+import site
+import sysconfig
+import tempfile
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import subprocess
+import random
+import statistics
+import platform
+import heapq
+import contextlib
+import cProfile
+import mmap
+import tokenize
+import asyncio
+import zlib
+import zipfile
+import tarfile
+import threading
+import http.server
+import urllib.parse
+import queue as queue_module
+import multiprocessing
+from abc import ABC, abstractmethod
+from collections import deque
 from datetime import datetime
-import importlib.util
-
-def get_project_path():
-    """Obtém o caminho do projeto a ser analisado"""
-    if len(sys.argv) > 1:
-        path = sys.argv[1]
-        if not os.path.isdir(path):
-            print(f"Erro: O caminho '{path}' não é um diretório válido.")
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# O cache incremental é invalidado quando a versão muda: incremente-a sempre que
+# o conteúdo extraído dos arquivos mudar
+__version__ = "1.2.3"
+
+# Diretório (dentro do projeto analisado) onde fica o cache incremental
+CACHE_DIR_NAME = ".codescope_cache"
+
+# Diretórios ignorados por padrão: controle de versão, ambientes virtuais,
+# dependências vendorizadas e artefatos de build nunca fazem parte do relatório
+DEFAULT_EXCLUDED_DIRS = frozenset({
+    ".git", ".hg", ".svn", "node_modules", ".venv", "venv", "site-packages",
+    "dist-packages", "build", "dist", ".eggs", ".tox", ".nox", "__pycache__",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", CACHE_DIR_NAME
+})
+
+def parse_args(argv=None):
+    """Interpreta os argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(
+        description="CodeScope 360 - Análise Estruturada de Projetos Python"
+    )
+    parser.add_argument("project_path", nargs="?", default=None,
+                        help="Diretório do projeto (padrão: diretório atual)")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="Número de processos de análise (0 = detectar núcleos, 1 = sequencial)")
+    parser.add_argument("-f", "--format", type=parse_formats, default=["markdown"],
+                        help="Formatos de saída separados por vírgula: markdown, json, jsonl, sqlite")
+    parser.add_argument("--sections", type=parse_sections, default=None, metavar="LISTA",
+                        help="Seções do relatório Markdown, separadas por vírgula (padrão: all): "
+                             + ", ".join(MARKDOWN_SECTIONS))
+    parser.add_argument("--max-section-items", type=int, default=0, metavar="N",
+                        help="Máximo de itens por seção do Markdown: erros, dependências, pontos de "
+                             "entrada, arquivos da estrutura e arquivos detalhados (padrão: 0 = todos)")
+    parser.add_argument("--max-file-items", type=int, default=0, metavar="N",
+                        help="Máximo de itens por lista nos detalhes de cada arquivo (padrão: 0 = todos)")
+    parser.add_argument("--split-size", type=float, default=0, metavar="MB",
+                        help="Dividir os detalhes dos arquivos em partes .partN.md de até MB megabytes")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"Não usar o cache incremental em {CACHE_DIR_NAME}/")
+    parser.add_argument("--cache-dir", default=None,
+                        help=f"Diretório do cache (padrão: <projeto>/{CACHE_DIR_NAME})")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="Descartar o cache existente antes da análise")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="Ignorar caminhos que casem com o padrão (estilo .gitignore; repetível)")
+    parser.add_argument("--include", action="append", default=[], metavar="GLOB",
+                        help="Analisar apenas caminhos que casem com o padrão (repetível)")
+    parser.add_argument("--no-default-excludes", action="store_true",
+                        help="Não ignorar .git, node_modules, .venv, build, __pycache__ etc.")
+    parser.add_argument("--no-gitignore", action="store_true",
+                        help="Não respeitar os arquivos .gitignore do projeto")
+    parser.add_argument("--follow-symlinks", action="store_true",
+                        help="Seguir links simbólicos para diretórios (ciclos são ignorados)")
+    scope = parser.add_mutually_exclusive_group()
+    scope.add_argument("--since", metavar="REV",
+                       help="Analisar só os arquivos alterados desde a revisão git (e seus vizinhos)")
+    scope.add_argument("--diff", metavar="A..B",
+                       help="Analisar só os arquivos alterados entre duas revisões git (A...B usa o merge-base)")
+    parser.add_argument("--index", action="store_true",
+                        help="Atualizar o índice de símbolos usado pelo subcomando query")
+    parser.add_argument("--shard", type=parse_shard, metavar="i/N",
+                        help="Analisar só a parte i de N do projeto e gravar um resultado parcial "
+                             "(combine com: codescope360.py merge)")
+    parser.add_argument("-w", "--watch", action="store_true",
+                        help="Observar o projeto e atualizar o relatório a cada alteração")
+    parser.add_argument("--watch-interval", type=float, default=1.0, metavar="SEGUNDOS",
+                        help="Intervalo de verificação no modo --watch sem inotify (padrão: 1)")
+    parser.add_argument("--poll", action="store_true",
+                        help="No modo --watch, verificar por mtime mesmo com inotify disponível")
+    parser.add_argument("--async-io", action="store_true",
+                        help="Varredura e leitura assíncronas, para sistemas de arquivos de rede (NFS/SMB)")
+    parser.add_argument("--io-limit", type=int, default=32, metavar="N",
+                        help="Operações de E/S simultâneas no modo --async-io (padrão: 32)")
+    parser.add_argument("--simulate-latency", type=float, default=0, metavar="MS",
+                        help="Acrescentar MS milissegundos a cada listagem, stat e leitura (testes)")
+    parser.add_argument("--summary-threshold", type=float, default=0, metavar="MB",
+                        help="Arquivos maiores que MB megabytes recebem só um resumo rápido, "
+                             "sem análise completa (padrão: 0 = sem limite)")
+    parser.add_argument("--parse-timeout", type=float, default=0, metavar="SEGUNDOS",
+                        help="Tempo máximo de análise por arquivo, em processos isolados; arquivos que "
+                             "passarem dele recebem só o resumo rápido (padrão: 0 = sem limite)")
+    parser.add_argument("--max-nodes", type=int, default=0, metavar="N",
+                        help="Arquivos com mais de N nós na árvore sintática recebem só o resumo "
+                             "rápido (padrão: 0 = sem limite)")
+    parser.add_argument("--worker-max-files", type=int, default=0, metavar="N",
+                        help="Substituir cada processo de análise depois de N arquivos, "
+                             "limitando o uso de memória (padrão: 0 = nunca)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Medir tempo, chamadas e bytes por etapa e incluir o perfil no relatório")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N",
+                        help="Quantidade de arquivos mais lentos listados no perfil (padrão: 10)")
+    parser.add_argument("--profile-out", metavar="ARQUIVO",
+                        help="Gravar também um perfil cProfile (pstats) do processo principal")
+    args = parser.parse_args(argv)
+    if args.watch and (args.since or args.diff):
+        parser.error("--watch não pode ser combinado com --since ou --diff")
+    if args.shard and (args.watch or args.since or args.diff):
+        parser.error("--shard não pode ser combinado com --watch, --since ou --diff")
+    if args.index and (args.shard or args.watch or args.since or args.diff):
+        parser.error("--index requer uma análise completa (sem --shard, --watch, --since ou --diff)")
+    return args
+
+def get_project_path(path=None):
+    """Obtém o caminho do projeto a ser analisado (diretório ou arquivo compactado)"""
+    if path:
+        if not os.path.isdir(path) and not is_archive(path):
+            print(f"Erro: O caminho '{path}' não é um diretório ou arquivo compactado válido.")
             sys.exit(1)
         return path
     return os.getcwd()
 
-def find_python_files(project_path):
-    """Encontra recursivamente todos os arquivos .py no projeto"""
-    python_files = []
+def _glob_to_regex(pattern):
+    """Converte um padrão no estilo .gitignore em expressão regular"""
+    i, n = 0, len(pattern)
+    parts = []
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            parts.append("[^/]*")
+        elif c == "?":
+            parts.append("[^/]")
+        elif c == "[":
+            # Fim da classe: "]" logo após "[" ou "[!" é literal, assim como um "]" escapado
+            end = i + 1
+            if end < n and pattern[end] in "!^":
+                end += 1
+            if end < n and pattern[end] == "]":
+                end += 1
+            while end < n and pattern[end] != "]":
+                end += 2 if pattern[end] == "\\" else 1
+            if end >= n:
+                parts.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                negate = body[:1] in ("!", "^")
+                if negate:
+                    body = body[1:]
+                members = []
+                j = 0
+                while j < len(body):
+                    if body[j] == "\\" and j + 1 < len(body):
+                        j += 1
+                    members.append("\\" + body[j] if body[j] in "\\[]^" else body[j])
+                    j += 1
+                # Como os curingas, uma classe nunca casa com "/"
+                parts.append("[^/" + "".join(members) + "]" if negate else "[" + "".join(members) + "]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return "".join(parts)
+
+def compile_ignore_pattern(pattern):
+    """Compila uma linha de .gitignore em (regex, negação, só_diretórios) ou None"""
+    pattern = pattern.rstrip("\n").rstrip()
+    if not pattern or pattern.startswith("#"):
+        return None
+    negate = pattern.startswith("!")
+    if negate:
+        pattern = pattern[1:]
+    if pattern.startswith("\\"):
+        pattern = pattern[1:]
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+    
+    # Padrões com "/" são relativos ao diretório do .gitignore; os demais casam em qualquer nível
+    if "/" in pattern:
+        regex = _glob_to_regex(pattern.lstrip("/"))
+    else:
+        regex = "(?:.*/)?" + _glob_to_regex(pattern)
+    return re.compile(regex + r"\Z", re.DOTALL), negate, dir_only
+
+class IgnoreRules:
+    """Regras de exclusão no estilo .gitignore (a última regra que casa prevalece)"""
+    
+    def __init__(self, rules=()):
+        # Cada regra: (diretório base relativo, regex, negação, só_diretórios)
+        self.rules = list(rules)
+    
+    def extend(self, base, patterns):
+        """Retorna novas regras acrescidas dos padrões relativos a `base`"""
+        compiled = [(base, *rule) for rule in map(compile_ignore_pattern, patterns) if rule]
+        if not compiled:
+            return self
+        return IgnoreRules(self.rules + compiled)
+    
+    def is_ignored(self, rel_path, is_dir):
+        """Verifica se um caminho relativo (separado por '/') deve ser ignorado"""
+        ignored = False
+        for base, regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not rel_path.startswith(base + "/"):
+                    continue
+                path = rel_path[len(base) + 1:]
+            else:
+                path = rel_path
+            if regex.match(path):
+                ignored = not negate
+        return ignored
+
+class LocalFS:
+    """Sistema de arquivos local: operações usadas pela varredura e pela leitura dos fontes"""
+    
+    def scandir(self, directory, follow_symlinks=False):
+        """Lista um diretório como [(nome, é_diretório, caminho)] (OSError se não puder ser lido)"""
+        entries = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+                except OSError:
+                    continue
+                entries.append((entry.name, is_dir, entry.path))
+        return entries
+    
+    def stat(self, path):
+        return os.stat(path)
+    
+    def read_bytes(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+class LatencyFS(LocalFS):
+    """Sistema de arquivos com latência artificial, para simular NFS/SMB localmente
+    
+    Cada listagem, stat ou leitura espera `latency` segundos antes de acessar
+    o disco local, como faria uma ida e volta pela rede.
+    """
+    
+    def __init__(self, latency):
+        self.latency = latency
+    
+    def scandir(self, directory, follow_symlinks=False):
+        time.sleep(self.latency)
+        return super().scandir(directory, follow_symlinks)
+    
+    def stat(self, path):
+        time.sleep(self.latency)
+        return super().stat(path)
+    
+    def read_bytes(self, path):
+        time.sleep(self.latency)
+        return super().read_bytes(path)
+
+LOCAL_FS = LocalFS()
+
+def _read_gitignore(directory, fs=None):
+    """Lê o .gitignore de um diretório, se existir"""
+    try:
+        data = (fs or LOCAL_FS).read_bytes(os.path.join(directory, ".gitignore"))
+    except OSError:
+        return []
+    return data.decode("utf-8", "replace").splitlines()
+
+def _matches_include(rel_path, include_rules):
+    """Verifica se o arquivo ou algum diretório ancestral casa com um padrão --include"""
+    candidate = rel_path
+    while candidate:
+        if any(regex.match(candidate) for regex, _, _ in include_rules):
+            return True
+        candidate = candidate.rpartition("/")[0]
+    return False
+
+def _sorted_listing(fs, directory, follow_symlinks):
+    """Lista um diretório ordenado como os caminhos completos; None se não puder ser lido"""
+    try:
+        entries = fs.scandir(directory, follow_symlinks)
+    except OSError:
+        return None
+    # Diretórios ordenam como "nome/": igual à ordenação dos caminhos completos
+    entries.sort(key=lambda item: item[0] + os.sep if item[1] else item[0])
+    return entries
+
+def _accept_entry(name, is_dir, rel_dir, rules, include_rules, default_excludes):
+    """Aplica as regras de descoberta a uma entrada; retorna o caminho relativo (com /) ou None"""
+    rel_path = f"{rel_dir}/{name}" if rel_dir else name
+    if is_dir:
+        if default_excludes and (name in DEFAULT_EXCLUDED_DIRS or name.endswith(".egg-info")):
+            return None
+        if rules.is_ignored(rel_path, True):
+            return None
+        return rel_path
+    if not name.endswith('.py'):
+        return None
+    if rules.is_ignored(rel_path, False):
+        return None
+    if include_rules and not _matches_include(rel_path, include_rules):
+        return None
+    return rel_path
+
+def iter_python_files(project_path, excludes=(), includes=(), use_gitignore=True,
+                      default_excludes=True, follow_symlinks=False, fs=None):
+    """Gera os caminhos relativos dos arquivos .py do projeto em ordem alfabética
+    
+    Diretórios excluídos são podados durante a varredura (nunca são
+    percorridos). A varredura usa os.scandir, que já informa o tipo de cada
+    entrada sem chamadas extras a stat, e percorre cada diretório em ordem,
+    de modo que os caminhos saem na mesma ordem de uma ordenação global.
+    """
+    fs = fs or LOCAL_FS
+    root_rules = IgnoreRules().extend("", excludes)
+    include_rules = [rule for rule in map(compile_ignore_pattern, includes) if rule]
+    visited = set()
+    
+    def open_dir(directory, rel_dir, rules):
+        """Lista um diretório e retorna o quadro (entradas ordenadas, caminho relativo, regras)"""
+        if use_gitignore:
+            rules = rules.extend(rel_dir, _read_gitignore(directory, fs))
+        if follow_symlinks:
+            # Evitar ciclos de links simbólicos
+            try:
+                st = fs.stat(directory)
+            except OSError:
+                return None
+            if (st.st_dev, st.st_ino) in visited:
+                return None
+            visited.add((st.st_dev, st.st_ino))
+        
+        entries = _sorted_listing(fs, directory, follow_symlinks)
+        if entries is None:
+            return None
+        return iter(entries), rel_dir, rules
+    
+    # Pilha de diretórios abertos (percurso em profundidade)
+    frames = [open_dir(project_path, "", root_rules)]
+    while frames:
+        if frames[-1] is None:
+            frames.pop()
+            continue
+        entries, rel_dir, rules = frames[-1]
+        item = next(entries, None)
+        if item is None:
+            frames.pop()
+            continue
+        
+        name, is_dir, path = item
+        rel_path = _accept_entry(name, is_dir, rel_dir, rules, include_rules, default_excludes)
+        if rel_path is None:
+            continue
+        if is_dir:
+            frames.append(open_dir(path, rel_path, rules))
+        else:
+            # Caminho relativo para melhor legibilidade
+            yield rel_path.replace("/", os.sep)
+
+async def async_find_python_files(project_path, excludes=(), includes=(), use_gitignore=True,
+                                  default_excludes=True, follow_symlinks=False, fs=None,
+                                  io_limit=32):
+    """Versão assíncrona de find_python_files para sistemas de arquivos com alta latência
     
-    for root, _, files in os.walk(project_path):
-        for file in files:
-            if file.endswith('.py'):
-                full_path = os.path.join(root, file)
-                # Caminho relativo para melhor legibilidade
-                rel_path = os.path.relpath(full_path, project_path)
-                python_files.append(rel_path)
+    Os diretórios irmãos são listados em paralelo (até `io_limit` operações
+    de E/S em andamento), em vez de um por vez. As regras e a ordem do
+    resultado são as mesmas da varredura sequencial.
+    """
+    fs = fs or LOCAL_FS
+    loop = asyncio.get_running_loop()
+    root_rules = IgnoreRules().extend("", excludes)
+    include_rules = [rule for rule in map(compile_ignore_pattern, includes) if rule]
+    visited = set()
     
-    # Organizar arquivos pelo caminho para melhor estrutura no relatório
-    python_files.sort()
-    return python_files
+    with ThreadPoolExecutor(max_workers=io_limit) as io_pool:
+        async def walk(directory, rel_dir, rules):
+            if follow_symlinks:
+                try:
+                    st = await loop.run_in_executor(io_pool, fs.stat, directory)
+                except OSError:
+                    return []
+                if (st.st_dev, st.st_ino) in visited:
+                    return []
+                visited.add((st.st_dev, st.st_ino))
+            
+            pending = [loop.run_in_executor(io_pool, _sorted_listing, fs, directory, follow_symlinks)]
+            if use_gitignore:
+                pending.append(loop.run_in_executor(io_pool, _read_gitignore, directory, fs))
+            entries, *gitignore = await asyncio.gather(*pending)
+            if use_gitignore:
+                rules = rules.extend(rel_dir, gitignore[0])
+            if entries is None:
+                return []
+            
+            # Subdiretórios começam todos de uma vez; o resultado é montado na ordem
+            children = []
+            for name, is_dir, path in entries:
+                rel_path = _accept_entry(name, is_dir, rel_dir, rules, include_rules, default_excludes)
+                if rel_path is None:
+                    continue
+                if is_dir:
+                    children.append(asyncio.ensure_future(walk(path, rel_path, rules)))
+                else:
+                    children.append(rel_path.replace("/", os.sep))
+            files = []
+            for child in children:
+                if isinstance(child, str):
+                    files.append(child)
+                else:
+                    files.extend(await child)
+            return files
+        
+        return await walk(project_path, "", root_rules)
+
+def filter_paths(paths, excludes=(), includes=(), default_excludes=True):
+    """Aplica as regras de descoberta a uma lista de caminhos vinda de outra origem (ex.: git)"""
+    rules = IgnoreRules().extend("", excludes)
+    include_rules = [rule for rule in map(compile_ignore_pattern, includes) if rule]
+    selected = []
+    for path in paths:
+        rel_path = path.replace(os.sep, "/")
+        parts = rel_path.split("/")
+        if not parts[-1].endswith(".py"):
+            continue
+        if default_excludes and any(part in DEFAULT_EXCLUDED_DIRS or part.endswith(".egg-info")
+                                    for part in parts[:-1]):
+            continue
+        # Um diretório excluído exclui tudo abaixo dele
+        prefixes = ["/".join(parts[:i]) for i in range(1, len(parts))]
+        if any(rules.is_ignored(prefix, True) for prefix in prefixes):
+            continue
+        if rules.is_ignored(rel_path, False):
+            continue
+        if include_rules and not _matches_include(rel_path, include_rules):
+            continue
+        selected.append(rel_path.replace("/", os.sep))
+    selected.sort()
+    return selected
+
+def find_python_files(project_path, excludes=(), includes=(), use_gitignore=True,
+                      default_excludes=True, follow_symlinks=False, fs=None):
+    """Encontra recursivamente todos os arquivos .py no projeto (lista ordenada)"""
+    return list(iter_python_files(project_path, excludes, includes, use_gitignore,
+                                  default_excludes, follow_symlinks, fs))
 
 def find_requirements_file(project_path):
     """Localiza o arquivo requirements.txt se existir"""
@@ -59,32 +524,34 @@ def parse_requirements(req_path):
     
     try:
         with open(req_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Extrair dependências usando regex para lidar com formatos variados
-        dependencies = []
-        for line in content.splitlines():
-            line = line.strip()
-            # Ignorar comentários e linhas vazias
-            if not line or line.startswith('#'):
-                continue
-            
-            # Lidar com formatos de requisitos comuns
-            # Exemplo: package==1.0.0, package>=1.0.0, package
-            match = re.match(r'^([a-zA-Z0-9_.-]+)(?:[=<>!~]+([a-zA-Z0-9_.-]+))?', line)
-            if match:
-                package = match.group(1)
-                version = match.group(2) if len(match.groups()) > 1 else None
-                
-                if version:
-                    dependencies.append(f"{package} ({version})")
-                else:
-                    dependencies.append(package)
-        
-        return dependencies
+            return parse_requirements_text(f.read())
     except Exception as e:
         return [f"Erro ao analisar requirements.txt: {str(e)}"]
 
+def parse_requirements_text(content):
+    """Extrai as dependências do conteúdo de um requirements.txt (de disco ou de um arquivo compactado)"""
+    # Extrair dependências usando regex para lidar com formatos variados
+    dependencies = []
+    for line in content.splitlines():
+        line = line.strip()
+        # Ignorar comentários e linhas vazias
+        if not line or line.startswith('#'):
+            continue
+        
+        # Lidar com formatos de requisitos comuns
+        # Exemplo: package==1.0.0, package>=1.0.0, package
+        match = re.match(r'^([a-zA-Z0-9_.-]+)(?:[=<>!~]+([a-zA-Z0-9_.-]+))?', line)
+        if match:
+            package = match.group(1)
+            version = match.group(2) if len(match.groups()) > 1 else None
+            
+            if version:
+                dependencies.append(f"{package} ({version})")
+            else:
+                dependencies.append(package)
+    
+    return dependencies
+
 def categorize_dependencies(dependencies):
     """Categoriza as dependências em frameworks e áreas do projeto"""
     if not dependencies:
@@ -121,7 +588,7 @@ def categorize_dependencies(dependencies):
 
 def extract_docstring(node):
     """Extrai a docstring de um nó AST, se existir"""
-    if not isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef)):
+    if not isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
         return None
     
     try:
@@ -135,590 +602,5535 @@ def extract_docstring(node):
     except Exception:
         return None
 
-def get_significant_comments(source_code):
-    """Extrai comentários importantes no início do arquivo ou blocos"""
-    lines = source_code.splitlines()
+def get_significant_comments(lines, string_spans=()):
+    """Extrai comentários importantes no início do arquivo ou blocos
+    
+    Percorre as linhas uma única vez. `string_spans` são intervalos de linhas
+    (início, fim) ocupados por strings de várias linhas, cujo conteúdo não
+    deve ser confundido com comentários.
+    """
     significant_comments = []
+    spans = sorted(string_spans)
+    span_index = 0
+    header = []
+    in_header = True
     comment_block = []
     
-    # Pegar comentários no início do arquivo
-    for line in lines:
+    for lineno, line in enumerate(lines, 1):
+        # Avançar pelos intervalos de string já ultrapassados
+        while span_index < len(spans) and spans[span_index][1] < lineno:
+            span_index += 1
+        inside_string = span_index < len(spans) and spans[span_index][0] < lineno
+        
         line = line.strip()
-        if line.startswith('#'):
-            comment_block.append(line[1:].strip())
-        elif not line:
+        if line.startswith('#') and not inside_string:
+            comment = line[1:].strip()
+            comment_block.append(comment)
+            if in_header:
+                header.append(comment)
             continue
-        else:
-            break
-    
-    if comment_block:
-        significant_comments.append(" ".join(comment_block))
-    
-    # Procurar por blocos de comentários significativos (3+ linhas consecutivas)
-    comment_block = []
-    for line in lines:
-        line = line.strip()
-        if line.startswith('#'):
-            comment_block.append(line[1:].strip())
-        else:
-            if len(comment_block) >= 3:
-                significant_comments.append(" ".join(comment_block))
-            comment_block = []
+        
+        # Comentários no início do arquivo (linhas vazias não encerram o cabeçalho)
+        if line and in_header:
+            in_header = False
+            if header:
+                significant_comments.append(" ".join(header))
+        
+        # Blocos de comentários significativos (3+ linhas consecutivas)
+        if len(comment_block) >= 3:
+            significant_comments.append(" ".join(comment_block))
+        comment_block = []
     
-    # Verificar o último bloco
+    if in_header and header:
+        significant_comments.append(" ".join(header))
     if len(comment_block) >= 3:
         significant_comments.append(" ".join(comment_block))
     
     return significant_comments
 
-def analyze_imports(tree):
-    """Analisa as importações de um arquivo Python"""
-    imports = {
-        "standard_lib": [],
-        "third_party": [],
-        "project": []
-    }
-    
-    standard_libs = [
-        "abc", "argparse", "ast", "asyncio", "base64", "collections", "configparser", 
-        "contextlib", "copy", "csv", "datetime", "decimal", "difflib", "enum", 
-        "functools", "glob", "hashlib", "io", "itertools", "json", "logging", 
-        "math", "multiprocessing", "os", "pathlib", "pickle", "random", "re", 
-        "shutil", "socket", "sqlite3", "statistics", "string", "subprocess", 
-        "sys", "tempfile", "threading", "time", "timeit", "traceback", "typing", 
-        "unittest", "uuid", "warnings", "xml", "zipfile"
-    ]
-    
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Import):
-            for name in node.names:
-                module = name.name.split('.')[0]
-                if module in standard_libs:
-                    imports["standard_lib"].append(name.name)
-                else:
-                    # Usamos uma abordagem mais simples para determinar se é third_party ou projeto
-                    try:
-                        if module in sys.modules or importlib.util.find_spec(module) is not None:
-                            imports["third_party"].append(name.name)
-                        else:
-                            imports["project"].append(name.name)
-                    except (ImportError, ValueError):
-                        imports["project"].append(name.name)
-                        
-        elif isinstance(node, ast.ImportFrom):
-            if node.module:
-                module = node.module.split('.')[0]
-                import_names = [f"{node.module}.{n.name}" for n in node.names]
-                
-                if module in standard_libs:
-                    imports["standard_lib"].extend(import_names)
-                else:
-                    try:
-                        if module in sys.modules or importlib.util.find_spec(module) is not None:
-                            imports["third_party"].extend(import_names)
-                        else:
-                            imports["project"].extend(import_names)
-                    except (ImportError, ValueError):
-                        imports["project"].extend(import_names)
-    
-    # Remover duplicados e ordenar
-    for key in imports:
-        imports[key] = sorted(list(set(imports[key])))
-    
-    return imports
-
-def analyze_main_block(source_code):
-    """Analisa o bloco if __name__ == "__main__" se existir"""
-    main_match = re.search(r'if\s+__name__\s*==\s*[\'"]__main__[\'"]\s*:', source_code)
-    if main_match:
-        # Encontrar o bloco main e extrair uma versão resumida
-        main_start = main_match.start()
-        lines = source_code[main_start:].splitlines()
-        
-        # Pegar as primeiras 5 linhas significativas (não vazias) do bloco main
-        significant_lines = []
-        for line in lines:
-            stripped = line.strip()
-            if stripped and not stripped.startswith('#'):
-                significant_lines.append(stripped)
-            if len(significant_lines) >= 5:
-                break
-        
-        if significant_lines:
-            return significant_lines
+def stdlib_module_names():
+    """Retorna os nomes de módulos de nível superior da biblioteca padrão"""
+    names = set(sys.builtin_module_names)
+    if hasattr(sys, "stdlib_module_names"):  # Python 3.10+
+        names.update(sys.stdlib_module_names)
+        return frozenset(names)
     
-    return None
+    # Versões antigas: listar o diretório da biblioteca padrão
+    paths = sysconfig.get_paths()
+    for key in ("stdlib", "platstdlib"):
+        stdlib_dir = paths.get(key)
+        if stdlib_dir:
+            names.update(_scan_module_dir(stdlib_dir))
+            names.update(_scan_module_dir(os.path.join(stdlib_dir, "lib-dynload")))
+    names.difference_update({"site-packages", "dist-packages"})
+    return frozenset(names)
 
-def analyze_python_file(file_path, project_path):
-    """Analisa um arquivo Python e extrai suas características principais"""
-    full_path = os.path.join(project_path, file_path)
+def site_packages_dirs():
+    """Lista os diretórios site-packages do interpretador atual"""
+    dirs = []
+    try:
+        dirs.extend(site.getsitepackages())
+    except AttributeError:  # virtualenvs antigos
+        pass
+    try:
+        dirs.append(site.getusersitepackages())
+    except AttributeError:
+        pass
+    dirs.extend(p for p in sys.path if os.path.basename(p) in ("site-packages", "dist-packages"))
     
+    seen = set()
+    unique_dirs = []
+    for d in dirs:
+        real = os.path.realpath(d)
+        if real not in seen and os.path.isdir(real):
+            seen.add(real)
+            unique_dirs.append(d)
+    return unique_dirs
+
+def _scan_module_dir(directory):
+    """Lista os nomes importáveis de nível superior em um diretório, sem importá-los"""
+    names = set()
     try:
-        with open(full_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
-        tree = ast.parse(source_code)
-        
-        # Informações básicas
-        result = {
-            "path": file_path,
-            "classes": [],
-            "functions": [],
-            "docstring": extract_docstring(tree),
-            "comments": get_significant_comments(source_code),
-            "imports": analyze_imports(tree),
-            "main_block": analyze_main_block(source_code)
-        }
-        
-        # Extrair classes e métodos
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                class_info = {
-                    "name": node.name,
-                    "docstring": extract_docstring(node),
-                    "methods": []
-                }
-                
-                # Extrair métodos da classe
-                for sub_node in node.body:
-                    if isinstance(sub_node, ast.FunctionDef):
-                        method_info = {
-                            "name": sub_node.name,
-                            "docstring": extract_docstring(sub_node)
-                        }
-                        class_info["methods"].append(method_info)
-                
-                result["classes"].append(class_info)
-        
-        # Funções fora de classes (no nível do módulo)
-        for node in ast.iter_child_nodes(tree):
-            if isinstance(node, ast.FunctionDef):
-                function_info = {
-                    "name": node.name,
-                    "docstring": extract_docstring(node)
-                }
-                result["functions"].append(function_info)
+        entries = list(os.scandir(directory))
+    except OSError:
+        return names
+    
+    for entry in entries:
+        name = entry.name
+        if name.endswith((".dist-info", ".egg-info")):
+            # top_level.txt lista os módulos instalados pela distribuição
+            try:
+                with open(os.path.join(entry.path, "top_level.txt"), encoding="utf-8") as f:
+                    names.update(line.strip().split("/")[0] for line in f if line.strip())
+            except OSError:
+                pass
+        elif entry.is_dir():
+            if name.isidentifier():
+                names.add(name)
+        elif name.endswith((".py", ".pyc", ".so", ".pyd")):
+            module = name.split(".")[0]
+            if module.isidentifier():
+                names.add(module)
+    return names
+
+def project_module_names(python_files):
+    """Extrai os nomes de módulos de nível superior do próprio projeto"""
+    names = set()
+    for file_path in python_files:
+        parts = file_path.replace(os.sep, "/").split("/")
+        # Layout src/: o pacote importável fica um nível abaixo
+        if parts[0] == "src" and len(parts) > 1:
+            parts = parts[1:]
+        name = parts[0][:-3] if len(parts) == 1 else parts[0]
+        if name.isidentifier():
+            names.add(name)
+    return frozenset(names)
+
+class ModuleResolver:
+    """Classifica importações em biblioteca padrão, terceiros ou projeto
+    
+    O índice é montado uma única vez por execução (biblioteca padrão,
+    varredura dos site-packages e módulos do projeto). Depois disso cada
+    classificação é uma consulta em dicionário, sem executar importações.
+    """
+    
+    def __init__(self, project_modules=(), stdlib=None, installed=None):
+        self.stdlib = stdlib if stdlib is not None else stdlib_module_names()
+        if installed is None:
+            installed = set()
+            for directory in site_packages_dirs():
+                installed.update(_scan_module_dir(directory))
+        self.installed = frozenset(installed)
+        self.project = frozenset(project_modules)
         
-        return result
+        # Precedência: módulos embutidos > projeto > biblioteca padrão > instalados
+        # (um módulo na raiz do projeto sombreia a biblioteca padrão, como no Python)
+        index = dict.fromkeys(self.installed, "third_party")
+        index.update(dict.fromkeys(self.stdlib, "standard_lib"))
+        index.update(dict.fromkeys(self.project, "project"))
+        index.update(dict.fromkeys(sys.builtin_module_names, "standard_lib"))
+        self._index = index
     
-    except Exception as e:
-        return {
-            "path": file_path,
-            "error": f"Erro ao analisar arquivo: {str(e)}"
-        }
+    def for_project(self, project_modules):
+        """Cria um resolvedor para outro projeto reaproveitando o índice do ambiente"""
+        return ModuleResolver(project_modules, stdlib=self.stdlib, installed=self.installed)
+    
+    def classify(self, module):
+        """Retorna 'standard_lib', 'third_party' ou 'project' para um nome de módulo"""
+        # Módulos desconhecidos (e importações relativas) são tratados como do projeto
+        return self._index.get(module.split('.', 1)[0], "project")
 
-def infer_file_purpose(file_info):
-    """Infere o propósito de um arquivo com base em seu conteúdo"""
-    # Se houver erro de análise, informar
-    if "error" in file_info:
-        return f"Arquivo com erro de análise: {file_info['error']}"
+_module_resolver = None
+
+def get_module_resolver():
+    """Retorna o resolvedor de módulos ativo, criando um padrão se necessário"""
+    global _module_resolver
+    if _module_resolver is None:
+        _module_resolver = ModuleResolver()
+    return _module_resolver
+
+def set_module_resolver(resolver):
+    """Define o resolvedor usado por analyze_imports (também nos processos do pool)"""
+    global _module_resolver
+    _module_resolver = resolver
+
+def _first_line(text):
+    """Primeira linha de uma docstring (o que o relatório exibe), ou None"""
+    return text.splitlines()[0] if text else None
+
+class FunctionInfo:
+    """Função ou método: nome (internado) e docstring"""
     
-    # Verificar docstring do arquivo
-    if file_info.get("docstring"):
-        first_line = file_info["docstring"].splitlines()[0]
-        return first_line
+    __slots__ = ("name", "docstring")
     
-    # Verificar padrões no nome do arquivo
-    filename = os.path.basename(file_info["path"])
-    if filename == "__init__.py":
-        return "Arquivo de inicialização de pacote Python"
-    elif filename == "setup.py":
-        return "Script de configuração e instalação do pacote"
-    elif "test" in filename.lower():
-        return "Arquivo de teste"
-    elif "config" in filename.lower():
-        return "Arquivo de configuração"
-    elif "util" in filename.lower():
-        return "Utilitários e funções auxiliares"
-    elif "model" in filename.lower():
-        return "Definição de modelos de dados"
-    elif "view" in filename.lower():
-        return "Componente de visualização/interface"
-    elif "controller" in filename.lower():
-        return "Controlador para lógica de negócios"
+    def __init__(self, name, docstring=None):
+        self.name = sys.intern(name)
+        self.docstring = docstring
     
-    # Inferir pelo conteúdo
-    classes = [c["name"] for c in file_info.get("classes", [])]
-    functions = [f["name"] for f in file_info.get("functions", [])]
+    @property
+    def summary(self):
+        """Primeira linha da docstring, calculada apenas quando usada"""
+        return _first_line(self.docstring)
     
-    # Verificar padrões específicos
-    if classes:
-        class_pattern = ", ".join(classes[:3])
-        if len(classes) > 3:
-            class_pattern += "..."
-        purpose = f"Define classes: {class_pattern}"
-    elif functions:
-        func_pattern = ", ".join(functions[:3])
-        if len(functions) > 3:
-            func_pattern += "..."
-        purpose = f"Implementa funções: {func_pattern}"
-    elif file_info.get("main_block"):
-        purpose = "Script executável com ponto de entrada principal"
-    else:
-        purpose = "Arquivo Python auxiliar"
+    def __reduce__(self):
+        return (FunctionInfo, (self.name, self.docstring))
     
-    # Adicionar contexto com base nas importações
-    imports = file_info.get("imports", {})
-    if imports.get("third_party"):
-        key_libs = []
-        for lib in imports["third_party"]:
-            if '.' in lib:
-                key_libs.append(lib.split('.')[0])
-            else:
-                key_libs.append(lib)
-                
-        if "flask" in key_libs or "django" in key_libs:
-            purpose += " (componente web)"
-        elif "pandas" in key_libs or "numpy" in key_libs:
-            purpose += " (processamento de dados)"
-        elif "sqlite" in key_libs or "sqlalchemy" in key_libs:
-            purpose += " (acesso a banco de dados)"
+    def __eq__(self, other):
+        return (isinstance(other, FunctionInfo)
+                and (self.name, self.docstring) == (other.name, other.docstring))
     
-    return purpose
+    def to_dict(self):
+        return {"name": self.name, "docstring": self.docstring}
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], data.get("docstring"))
 
-def identify_entry_points(files_info):
-    """Identifica possíveis pontos de entrada do projeto"""
-    entry_points = []
+class ClassInfo:
+    """Classe: nome qualificado (internado), docstring e métodos"""
     
-    for file_info in files_info:
-        # Verificar arquivos que têm bloco main
-        if file_info.get("main_block"):
-            entry_points.append({
-                "path": file_info["path"],
-                "type": "Script executável"
-            })
-        
-        # Verificar setup.py
-        if os.path.basename(file_info["path"]) == "setup.py":
-            entry_points.append({
-                "path": file_info["path"],
-                "type": "Instalação do pacote"
-            })
-        
-        # Verificar scripts/cli/app no nome
-        filename = os.path.basename(file_info["path"])
-        if any(pattern in filename.lower() for pattern in ["app.py", "cli.py", "main.py", "run.py", "server.py"]):
-            entry_points.append({
-                "path": file_info["path"],
-                "type": "Aplicação principal"
-            })
+    __slots__ = ("name", "docstring", "methods")
     
-    return entry_points
+    def __init__(self, name, docstring=None, methods=()):
+        self.name = sys.intern(name)
+        self.docstring = docstring
+        self.methods = tuple(methods)
+    
+    @property
+    def summary(self):
+        """Primeira linha da docstring, calculada apenas quando usada"""
+        return _first_line(self.docstring)
+    
+    def __reduce__(self):
+        return (ClassInfo, (self.name, self.docstring, self.methods))
+    
+    def __eq__(self, other):
+        return (isinstance(other, ClassInfo)
+                and (self.name, self.docstring, self.methods)
+                == (other.name, other.docstring, other.methods))
+    
+    def to_dict(self):
+        return {"name": self.name, "docstring": self.docstring,
+                "methods": [method.to_dict() for method in self.methods]}
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], data.get("docstring"),
+                   [FunctionInfo.from_dict(method) for method in data.get("methods", ())])
 
-def map_import_relationships(files_info):
-    """Mapeia as relações de importação entre os arquivos do projeto"""
-    relationships = {}
-    project_files = [f["path"] for f in files_info]
+class ImportSet:
+    """Importações de um arquivo por categoria, em tuplas ordenadas de nomes internados
     
-    for file_info in files_info:
-        file_path = file_info["path"]
-        relationships[file_path] = {"imports": [], "imported_by": []}
-        
-        # Converter imports do projeto para comparação de arquivos
-        project_imports = file_info.get("imports", {}).get("project", [])
-        for imp in project_imports:
-            # Converter formato de import para formato de arquivo
-            imp_parts = imp.split('.')
-            possible_paths = []
-            
-            # Construir possíveis caminhos de arquivo
-            for i in range(1, len(imp_parts) + 1):
-                module_path = os.path.join(*imp_parts[:i])
-                possible_paths.append(f"{module_path}.py")
-                possible_paths.append(os.path.join(module_path, "__init__.py"))
-            
-            # Verificar se algum caminho possível está nos arquivos do projeto
-            for path in possible_paths:
-                if path in project_files:
-                    relationships[file_path]["imports"].append(path)
-                    break
+    O mesmo nome importado por milhares de arquivos ocupa memória uma vez só.
+    """
     
-    # Calcular "imported_by"
-    for file_path, rel in relationships.items():
-        for imported in rel["imports"]:
-            if imported in relationships:
-                relationships[imported]["imported_by"].append(file_path)
+    __slots__ = ("standard_lib", "third_party", "project")
+    CATEGORIES = __slots__
     
-    return relationships
+    def __init__(self, standard_lib=(), third_party=(), project=()):
+        self.standard_lib = tuple(map(sys.intern, standard_lib))
+        self.third_party = tuple(map(sys.intern, third_party))
+        self.project = tuple(map(sys.intern, project))
+    
+    @classmethod
+    def from_sets(cls, imports):
+        """Cria a partir de um dict categoria -> conjunto de nomes (ordenando os nomes)"""
+        return cls(*(sorted(imports.get(category, ())) for category in cls.CATEGORIES))
+    
+    def items(self):
+        """Pares (categoria, nomes), na ordem das categorias"""
+        return ((category, getattr(self, category)) for category in self.CATEGORIES)
+    
+    def __bool__(self):
+        return bool(self.standard_lib or self.third_party or self.project)
+    
+    def __reduce__(self):
+        return (ImportSet, (self.standard_lib, self.third_party, self.project))
+    
+    def __eq__(self, other):
+        return (isinstance(other, ImportSet)
+                and (self.standard_lib, self.third_party, self.project)
+                == (other.standard_lib, other.third_party, other.project))
+    
+    def to_dict(self):
+        return {category: list(names) for category, names in self.items()}
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(*(data.get(category, ()) for category in cls.CATEGORIES))
 
-def generate_report(project_path, files_info, req_info, relationships):
-    """Gera o relatório completo do projeto"""
-    # Criar nome do arquivo de relatório
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    project_name = os.path.basename(os.path.abspath(project_path))
-    report_file = f"codescope_{project_name}_{timestamp}.md"
+class FileInfo:
+    """Resultado da análise de um arquivo
     
-    # Identificar pontos de entrada
-    entry_points = identify_entry_points(files_info)
+    Objetos com __slots__ e tuplas no lugar de dicts e listas aninhados.
+    to_dict/from_dict produzem o formato JSON usado no cache e nas saídas;
+    entre processos a serialização é feita por tuplas simples (__reduce__).
+    Arquivos com erro têm apenas `path`, `error` e, se foram lidos, `sha`.
+    """
     
-    # Organizar arquivos por diretório para melhor visibilidade
-    dir_structure = {}
-    for file_info in files_info:
-        path = file_info["path"]
-        directory = os.path.dirname(path)
-        if directory not in dir_structure:
-            dir_structure[directory] = []
-        dir_structure[directory].append(file_info)
-    
-    # Verificar erros de análise
-    files_with_errors = [f for f in files_info if "error" in f]
-    
-    with open(report_file, 'w', encoding='utf-8') as f:
-        # Cabeçalho
-        f.write(f"# Relatório de Análise do Projeto: {project_name}\n\n")
-        f.write(f"*Gerado por CodeScope 360 em {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}*\n\n")
-        f.write(f"**Caminho do projeto:** `{os.path.abspath(project_path)}`\n")
-        f.write(f"**Total de arquivos Python:** {len(files_info)}\n\n")
-        
-        # Aviso de erros, se houver
-        if files_with_errors:
-            f.write("⚠️ **Atenção**: Encontramos problemas ao analisar alguns arquivos:\n\n")
-            for file in files_with_errors:
-                f.write(f"- `{file['path']}`: {file.get('error', 'Erro desconhecido')}\n")
-            f.write("\n")
-        
-        # Dependências
-        if req_info:
-            f.write("## Dependências do Projeto\n\n")
-            
-            # Categorias de dependências
-            categories = categorize_dependencies(req_info)
-            if categories:
-                f.write("### Categorias de dependências\n\n")
-                for category, deps in categories.items():
-                    f.write(f"- **{category}**: {', '.join(deps)}\n")
-                f.write("\n")
-            
-            f.write("### Lista de dependências\n\n")
-            for dep in req_info:
-                f.write(f"- {dep}\n")
-            f.write("\n")
-        
-        # Pontos de entrada
-        if entry_points:
-            f.write("## Pontos de Entrada do Projeto\n\n")
-            for ep in entry_points:
-                f.write(f"- **{ep['path']}** - {ep['type']}\n")
-            f.write("\n")
-        
-        # Estrutura do projeto
-        f.write("## Estrutura do Projeto\n\n")
+    __slots__ = ("path", "classes", "functions", "docstring", "comments", "imports",
+                 "main_block", "error", "partial", "sha", "_purpose")
+    
+    def __init__(self, path, classes=(), functions=(), docstring=None, comments=(),
+                 imports=None, main_block=None, error=None, partial=None, sha=None):
+        self.path = path
+        self.classes = tuple(classes)
+        self.functions = tuple(functions)
+        self.docstring = docstring
+        self.comments = tuple(comments)
+        self.imports = imports if imports is not None else ImportSet()
+        self.main_block = tuple(main_block) if main_block else None
+        self.error = error
+        # Motivo de uma análise parcial (ex.: resumo de arquivo grande), ou None
+        self.partial = partial
+        # Hash do conteúdo (file_digest), compartilhado por cópias idênticas e pelo cache
+        self.sha = sha
+        self._purpose = None
+    
+    @property
+    def summary(self):
+        """Primeira linha da docstring do módulo, calculada apenas quando usada"""
+        return _first_line(self.docstring)
+    
+    @property
+    def purpose(self):
+        """Propósito inferido (infer_file_purpose), calculado uma vez e compartilhado pelas saídas"""
+        if self._purpose is None:
+            self._purpose = infer_file_purpose(self)
+        return self._purpose
+    
+    def with_path(self, path):
+        """Mesmo resultado para outro arquivo de conteúdo idêntico (as partes são compartilhadas)"""
+        return FileInfo(path, *self._state()[1:])
+    
+    def _state(self):
+        return (self.path, self.classes, self.functions, self.docstring, self.comments,
+                self.imports, self.main_block, self.error, self.partial, self.sha)
+    
+    def __reduce__(self):
+        return (FileInfo, self._state())
+    
+    def __eq__(self, other):
+        return isinstance(other, FileInfo) and self._state() == other._state()
+    
+    def to_dict(self):
+        """Representação em dicts e listas (JSON)"""
+        if self.error is not None:
+            data = {"path": self.path, "error": self.error}
+            if self.sha:
+                data["sha"] = self.sha
+            return data
+        data = {
+            "path": self.path,
+            "classes": [cls.to_dict() for cls in self.classes],
+            "functions": [func.to_dict() for func in self.functions],
+            "docstring": self.docstring,
+            "comments": list(self.comments),
+            "imports": self.imports.to_dict(),
+            "main_block": list(self.main_block) if self.main_block else None
+        }
+        if self.partial:
+            data["partial"] = self.partial
+        if self.sha:
+            data["sha"] = self.sha
+        return data
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Reconstrói a partir de to_dict()"""
+        if "error" in data:
+            return cls(data["path"], error=data["error"], sha=data.get("sha"))
+        return cls(
+            data["path"],
+            [ClassInfo.from_dict(item) for item in data.get("classes", ())],
+            [FunctionInfo.from_dict(item) for item in data.get("functions", ())],
+            data.get("docstring"),
+            data.get("comments", ()),
+            ImportSet.from_dict(data.get("imports", {})),
+            data.get("main_block"),
+            partial=data.get("partial"),
+            sha=data.get("sha")
+        )
+
+def _is_main_guard(node):
+    """Verifica se um nó If testa __name__ == "__main__" (em qualquer ordem)"""
+    test = node.test
+    if not (isinstance(test, ast.Compare) and len(test.ops) == 1
+            and isinstance(test.ops[0], ast.Eq)):
+        return False
+    operands = [test.left, test.comparators[0]]
+    has_name = any(isinstance(op, ast.Name) and op.id == "__name__" for op in operands)
+    has_main = any(isinstance(op, ast.Constant) and op.value == "__main__" for op in operands)
+    return has_name and has_main
+
+class FileInfoCollector(ast.NodeVisitor):
+    """Coleta classes, funções, importações e bloco main em uma única travessia
+    
+    Apenas instruções são visitadas: importações, classes e funções nunca
+    aparecem dentro de expressões, então as subárvores de expressões
+    (a maior parte dos nós) são ignoradas.
+    """
+    
+    # Campos de nós que contêm listas de instruções
+    _STATEMENT_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+    
+    def __init__(self, resolver=None):
+        self.resolver = resolver or get_module_resolver()
+        self.classes = []
+        self.functions = []
+        self.imports = {
+            "standard_lib": set(),
+            "third_party": set(),
+            "project": set()
+        }
+        self.main_guard = None
+        self.string_spans = []
+        self._class_stack = []
+        self._depth = 0
+        # Blocos (if, try, for, with...) e corpos de classes/funções abertos
+        self._blocks = 0
+    
+    def generic_visit(self, node):
+        nested = not isinstance(node, ast.Module)
+        self._blocks += nested
+        # Só instruções de várias linhas podem conter strings de várias linhas
+        multiline = (getattr(node, "end_lineno", None) or 0) > (getattr(node, "lineno", None) or 0)
+        for field, value in ast.iter_fields(node):
+            if field in self._STATEMENT_FIELDS:
+                if isinstance(value, list):
+                    for child in value:
+                        self.visit(child)
+            elif multiline:
+                self._record_strings(value)
+        self._blocks -= nested
+    
+    def visit_Import(self, node):
+        for name in node.names:
+            self.imports[self.resolver.classify(name.name)].add(name.name)
+    
+    def visit_ImportFrom(self, node):
+        if node.level:
+            # Importação relativa: sempre do projeto, mantida com os pontos (ex.: "..util.f")
+            prefix = "." * node.level + (f"{node.module}." if node.module else "")
+            self.imports["project"].update(f"{prefix}{n.name}" for n in node.names)
+        elif node.module:
+            category = self.resolver.classify(node.module)
+            self.imports[category].update(f"{node.module}.{n.name}" for n in node.names)
+    
+    def visit_ClassDef(self, node):
+        # Classes aninhadas recebem o nome qualificado (Externa.Interna)
+        qualname = ".".join(self._class_stack + [node.name])
+        methods = [FunctionInfo(sub_node.name, extract_docstring(sub_node))
+                   for sub_node in node.body
+                   if isinstance(sub_node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+        self.classes.append(ClassInfo(qualname, extract_docstring(node), methods))
         
-        # Listar diretórios e arquivos
-        directories = sorted(dir_structure.keys())
-        for directory in directories:
-            if directory:
-                f.write(f"### 📁 {directory}\n\n")
-            else:
-                f.write("### 📁 Diretório Raiz\n\n")
-            
-            for file_info in dir_structure[directory]:
-                basename = os.path.basename(file_info["path"])
-                purpose = infer_file_purpose(file_info)
-                f.write(f"- **{basename}** - {purpose}\n")
+        self._class_stack.append(node.name)
+        self._visit_nested(node)
+        self._class_stack.pop()
+    
+    def visit_FunctionDef(self, node):
+        # Funções de nível superior: só as que estão diretamente no corpo do módulo
+        if self._depth == 0 and not self._blocks:
+            self.functions.append(FunctionInfo(node.name, extract_docstring(node)))
+        # Classes definidas dentro de funções não herdam o prefixo da classe externa
+        class_stack, self._class_stack = self._class_stack, []
+        self._visit_nested(node)
+        self._class_stack = class_stack
+    
+    visit_AsyncFunctionDef = visit_FunctionDef
+    
+    def visit_If(self, node):
+        if self._depth == 0 and self.main_guard is None and _is_main_guard(node):
+            self.main_guard = node
+        self.generic_visit(node)
+    
+    def _record_strings(self, value):
+        # Strings de várias linhas (docstrings, constantes, argumentos, f-strings) não contêm
+        # comentários, em qualquer posição da expressão
+        for item in value if isinstance(value, list) else (value,):
+            if not isinstance(item, ast.AST):
+                continue
+            for child in ast.walk(item):
+                if ((isinstance(child, ast.JoinedStr)
+                     or isinstance(child, ast.Constant) and isinstance(child.value, str))
+                        and child.end_lineno and child.end_lineno > child.lineno):
+                    self.string_spans.append((child.lineno, child.end_lineno))
+    
+    def _visit_nested(self, node):
+        self._depth += 1
+        self.generic_visit(node)
+        self._depth -= 1
+    
+    def sorted_imports(self):
+        """Retorna as importações sem duplicados e ordenadas"""
+        return ImportSet.from_sets(self.imports)
+
+def reclassify_imports(imports, resolver=None):
+    """Reclassifica importações já extraídas (ex.: vindas do cache) com o resolvedor atual"""
+    resolver = resolver or get_module_resolver()
+    result = {"standard_lib": [], "third_party": [], "project": []}
+    for _, names in imports.items():
+        for name in names:
+            result[resolver.classify(name)].append(name)
+    return ImportSet.from_sets(result)
+
+def summarize_main_block(lines, node):
+    """Resume o corpo do bloco if __name__ == "__main__" (5 primeiras linhas significativas)"""
+    if node is None:
+        return None
+    
+    significant_lines = []
+    for line in lines[node.body[0].lineno - 1:node.body[-1].end_lineno]:
+        stripped = line.strip()
+        if stripped and not stripped.startswith('#'):
+            significant_lines.append(stripped)
+        if len(significant_lines) >= 5:
+            break
+    
+    return significant_lines or None
+
+class Profiler:
+    """Instrumentação do pipeline: tempo, número de chamadas e bytes por etapa
+    
+    Desativada por padrão: enquanto nenhum perfil estiver instalado com
+    set_profiler(), cada ponto de medição custa só uma comparação com None.
+    Os callbacks recebem (etapa, segundos, bytes, caminho) a cada medição e
+    permitem encaminhar os tempos para um sistema de métricas externo; nos
+    processos do pool as medições são agregadas por lote e repassadas ao
+    perfil principal.
+    """
+    
+    def __init__(self, slowest=10, callbacks=()):
+        # etapa -> [chamadas, segundos, bytes]
+        self.stages = {}
+        self.slowest_limit = slowest
+        self._slowest = []
+        self.callbacks = list(callbacks)
+    
+    def add_callback(self, callback):
+        """Registra uma função chamada com (etapa, segundos, bytes, caminho)"""
+        self.callbacks.append(callback)
+    
+    def record(self, stage, seconds, nbytes=0, path=None, calls=1):
+        """Acumula uma medição de etapa"""
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = [0, 0.0, 0]
+        entry[0] += calls
+        entry[1] += seconds
+        entry[2] += nbytes
+        for callback in self.callbacks:
+            callback(stage, seconds, nbytes, path)
+    
+    def record_file(self, path, seconds, nbytes):
+        """Registra o tempo total de um arquivo, mantendo apenas os mais lentos"""
+        item = (seconds, path, nbytes)
+        if len(self._slowest) < self.slowest_limit:
+            heapq.heappush(self._slowest, item)
+        elif self._slowest and item > self._slowest[0]:
+            heapq.heapreplace(self._slowest, item)
+        for callback in self.callbacks:
+            callback("file", seconds, nbytes, path)
+    
+    @contextlib.contextmanager
+    def stage(self, name, nbytes=0):
+        """Mede o bloco `with` como uma chamada da etapa"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, nbytes)
+    
+    def drain(self):
+        """Retorna as medições acumuladas e zera o perfil (usado nos processos do pool)"""
+        snapshot = {"stages": self.stages, "slowest": self._slowest}
+        self.stages = {}
+        self._slowest = []
+        return snapshot
+    
+    def merge(self, snapshot):
+        """Incorpora as medições vindas de outro processo"""
+        for stage, (calls, seconds, nbytes) in snapshot["stages"].items():
+            self.record(stage, seconds, nbytes, calls=calls)
+        for seconds, path, nbytes in snapshot["slowest"]:
+            self.record_file(path, seconds, nbytes)
+    
+    def slowest(self):
+        """Arquivos mais lentos, do mais lento para o mais rápido: (segundos, caminho, bytes)"""
+        return sorted(self._slowest, reverse=True)
+    
+    def to_dict(self):
+        """Representação serializável do perfil"""
+        return {
+            "stages": {stage: {"calls": calls, "seconds": round(seconds, 6), "bytes": nbytes}
+                       for stage, (calls, seconds, nbytes) in self.stages.items()},
+            "slowest_files": [{"path": path, "seconds": round(seconds, 6), "bytes": nbytes}
+                              for seconds, path, nbytes in self.slowest()]
+        }
+    
+    def render_text(self):
+        """Tabela de console com as etapas e os arquivos mais lentos"""
+        lines = [f"{'Etapa':<16}{'chamadas':>10}{'tempo (s)':>12}{'KB':>12}",
+                 "-" * 50]
+        for stage, (calls, seconds, nbytes) in self.stages.items():
+            lines.append(f"{stage:<16}{calls:>10}{seconds:>12.4f}{nbytes / 1024:>12.1f}")
+        if self._slowest:
+            lines.append("")
+            lines.append("Arquivos mais lentos:")
+            for seconds, path, nbytes in self.slowest():
+                lines.append(f"  {seconds:8.4f}s  {nbytes / 1024:8.1f} KB  {path}")
+        return "\n".join(lines)
+    
+    def render_markdown(self):
+        """Seção Markdown do perfil de execução"""
+        parts = ["## Perfil de Execução\n\n",
+                 "| Etapa | Chamadas | Tempo (s) | KB processados |\n",
+                 "|-------|---------:|----------:|---------------:|\n"]
+        for stage, (calls, seconds, nbytes) in self.stages.items():
+            parts.append(f"| {stage} | {calls} | {seconds:.4f} | {nbytes / 1024:.1f} |\n")
+        parts.append("\n")
+        if self._slowest:
+            parts.append("### Arquivos Mais Lentos\n\n")
+            for seconds, path, nbytes in self.slowest():
+                parts.append(f"- `{path}` - {seconds:.4f}s ({nbytes / 1024:.1f} KB)\n")
+            parts.append("\n")
+        return "".join(parts)
+
+# Perfil ativo (None = instrumentação desativada)
+_profiler = None
+
+def get_profiler():
+    """Retorna o perfil ativo, ou None"""
+    return _profiler
+
+def set_profiler(profiler):
+    """Instala (ou remove, com None) o perfil do processo atual"""
+    global _profiler
+    _profiler = profiler
+
+_NO_PROFILE = contextlib.nullcontext()
+
+def profile_stage(name, nbytes=0):
+    """Mede um trecho como etapa do perfil ativo; sem perfil, não faz nada"""
+    if _profiler is None:
+        return _NO_PROFILE
+    return _profiler.stage(name, nbytes)
+
+# Arquivos a partir deste tamanho são mapeados em memória em vez de copiados com read()
+MMAP_THRESHOLD = 256 * 1024
+
+# Acima deste tamanho (bytes) os arquivos recebem só um resumo por regex (None = sem limite)
+_summary_threshold = None
+
+def get_summary_threshold():
+    """Retorna o tamanho a partir do qual os arquivos são apenas resumidos"""
+    return _summary_threshold
+
+def set_summary_threshold(nbytes):
+    """Define o tamanho (bytes) a partir do qual os arquivos são apenas resumidos"""
+    global _summary_threshold
+    _summary_threshold = nbytes or None
+
+class ResourceGuards:
+    """Limites por arquivo para que arquivos patológicos não travem a varredura
+    
+    `parse_timeout` é o tempo máximo (segundos) de análise de um arquivo,
+    garantido por processos isolados que são encerrados ao estourá-lo;
+    `max_nodes` o máximo de nós da árvore sintática antes de a extração
+    detalhada ser trocada pelo resumo; `worker_max_files` quantos arquivos
+    cada processo analisa antes de ser substituído (limita o crescimento de
+    memória). O tamanho máximo em bytes é o limite de resumo
+    (set_summary_threshold). Zero ou None = sem limite.
+    """
+    
+    __slots__ = ("parse_timeout", "max_nodes", "worker_max_files")
+    
+    def __init__(self, parse_timeout=None, max_nodes=None, worker_max_files=None):
+        self.parse_timeout = parse_timeout or None
+        self.max_nodes = max_nodes or None
+        self.worker_max_files = worker_max_files or None
+    
+    def isolated(self):
+        """Indica se a análise precisa de processos supervisionados (GuardedPool)"""
+        return self.parse_timeout is not None or self.worker_max_files is not None
+
+# Limites por arquivo da execução atual
+_resource_guards = ResourceGuards()
+
+def get_resource_guards():
+    """Retorna os limites por arquivo da análise"""
+    return _resource_guards
+
+def set_resource_guards(guards):
+    """Define os limites por arquivo (None volta ao padrão: sem limites)"""
+    global _resource_guards
+    _resource_guards = guards or ResourceGuards()
+
+def read_source(full_path):
+    """Lê um arquivo-fonte como bytes; arquivos grandes são mapeados com mmap
+    
+    O chamador deve fechar o objeto retornado quando ele for um mmap.
+    """
+    with open(full_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            return f.read()
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def detect_source_encoding(data):
+    """Detecta a codificação pelo BOM ou pelo cookie PEP 263, como o tokenize
+    
+    Apenas as duas primeiras linhas são examinadas, sem copiar o restante.
+    """
+    lines = []
+    start = 0
+    for _ in range(2):
+        end = data.find(b"\n", start)
+        end = len(data) if end < 0 else end + 1
+        lines.append(data[start:end])
+        start = end
+    encoding, _ = tokenize.detect_encoding(iter(lines).__next__)
+    return encoding
+
+def decode_source(data):
+    """Decodifica bytes de código-fonte respeitando BOM e cookie de codificação"""
+    return str(data, detect_source_encoding(data))
+
+# Padrões do resumo de arquivos grandes (apenas definições e importações)
+_SUMMARY_DEF = re.compile(rb"^([ \t]*)(?:async[ \t]+)?(def|class)[ \t]+(\w+)", re.M)
+_SUMMARY_IMPORT = re.compile(rb"^import[ \t]+([\w. \t,]+)", re.M)
+_SUMMARY_FROM = re.compile(rb"^from[ \t]+(\.*[\w.]*)[ \t]+import[ \t]+(\([^)]*\)|[^\n#;]+)", re.M)
+
+def summarize_large_source(data, file_path, resolver=None, reason=None):
+    """Resumo barato de um arquivo grande: classes, métodos, funções e importações
+    
+    Usa expressões regulares sobre os bytes (sem árvore sintática), então
+    definições dentro de strings podem aparecer e docstrings, comentários e o
+    bloco main não são extraídos. `reason` explica por que o arquivo foi
+    apenas resumido (padrão: o tamanho).
+    """
+    resolver = resolver or get_module_resolver()
+    encoding = detect_source_encoding(data)
+    
+    classes = []
+    functions = []
+    method_indent = None
+    for match in _SUMMARY_DEF.finditer(data):
+        indent, kind, name = match.group(1), match.group(2), match.group(3).decode(encoding)
+        if not indent:
+            method_indent = None
+            if kind == b"class":
+                classes.append((name, []))
+                method_indent = b""
+            else:
+                functions.append(FunctionInfo(name))
+        elif kind == b"def" and method_indent is not None and classes:
+            # Métodos: definições no primeiro nível de indentação dentro da classe
+            if not method_indent:
+                method_indent = indent
+            if indent == method_indent:
+                classes[-1][1].append(FunctionInfo(name))
+    
+    imports = {"standard_lib": set(), "third_party": set(), "project": set()}
+    for match in _SUMMARY_IMPORT.finditer(data):
+        for item in match.group(1).decode(encoding).split(","):
+            name = item.split(" as ")[0].strip()
+            if name:
+                imports[resolver.classify(name)].add(name)
+    for match in _SUMMARY_FROM.finditer(data):
+        module = match.group(1).decode(encoding)
+        names = [item.split(" as ")[0].strip(" \t\r\n\\")
+                 for item in match.group(2).decode(encoding).strip("()").split(",")]
+        names = [name for name in names if name]
+        if module.startswith("."):
+            dots = len(module) - len(module.lstrip("."))
+            prefix = module if dots == len(module) else f"{module}."
+            imports["project"].update(f"{prefix}{name}" for name in names)
+        elif module:
+            imports[resolver.classify(module)].update(f"{module}.{name}" for name in names)
+    
+    return FileInfo(
+        file_path,
+        [ClassInfo(name, None, methods) for name, methods in classes],
+        functions,
+        imports=ImportSet.from_sets(imports),
+        partial=f"{reason or f'arquivo grande ({len(data) / (1024 * 1024):.1f} MB)'}: "
+                f"resumo por expressões regulares, sem análise completa"
+    )
+
+def guard_fallback(source, file_path, reason, digest=None):
+    """Resumo por regex de um arquivo que atingiu um limite (tempo, nós ou recursão)"""
+    data = source.encode("utf-8") if isinstance(source, str) else source
+    try:
+        with profile_stage("summary_regex", len(data)):
+            file_info = summarize_large_source(data, file_path, reason=reason)
+    except Exception as e:
+        file_info = FileInfo(file_path, error=f"Erro ao analisar arquivo: {str(e)}")
+    file_info.sha = digest or file_digest(data)
+    return file_info
+
+def analyze_python_file(file_path, project_path, fs=None):
+    """Analisa um arquivo Python e extrai suas características principais"""
+    full_path = os.path.join(project_path, file_path)
+    profiler = _profiler
+    if profiler is not None:
+        start = time.perf_counter()
+    
+    try:
+        data = read_source(full_path) if fs is None else fs.read_bytes(full_path)
+    except Exception as e:
+        return FileInfo(file_path, error=f"Erro ao analisar arquivo: {str(e)}")
+    
+    size = len(data)
+    try:
+        if profiler is not None:
+            profiler.record("read", time.perf_counter() - start, size, file_path)
+        file_info = analyze_bytes(data, file_path)
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+    
+    if profiler is not None:
+        profiler.record_file(file_path, time.perf_counter() - start, size)
+    return file_info
+
+def analyze_bytes(data, file_path, digest=None):
+    """Analisa o conteúdo bruto de um arquivo, resumindo-o se passar do limite de tamanho
+    
+    O resultado leva o hash do conteúdo (`digest`, se já calculado).
+    """
+    if _summary_threshold is None or len(data) <= _summary_threshold:
+        file_info = analyze_source(data, file_path)
+    else:
+        try:
+            with profile_stage("summary_regex", len(data)):
+                file_info = summarize_large_source(data, file_path)
+        except Exception as e:
+            file_info = FileInfo(file_path, error=f"Erro ao analisar arquivo: {str(e)}")
+    file_info.sha = digest or file_digest(data)
+    return file_info
+
+def analyze_source(source, file_path):
+    """Extrai as características de um código-fonte (str ou bytes, de disco, git ou outra origem)
+    
+    Bytes (inclusive um mmap) vão direto para o ast.parse, que respeita o BOM
+    e o cookie de codificação; o texto é decodificado uma única vez para a
+    varredura de comentários e do bloco main.
+    """
+    profiler = _profiler
+    try:
+        if profiler is not None:
+            start = time.perf_counter()
+        tree = ast.parse(source)
+        if profiler is not None:
+            parsed = time.perf_counter()
+            profiler.record("parse", parsed - start, len(source), file_path)
+        
+        max_nodes = _resource_guards.max_nodes
+        if max_nodes is not None and _count_nodes(tree, max_nodes) > max_nodes:
+            return guard_fallback(source, file_path,
+                                  f"árvore sintática com mais de {max_nodes} nós")
+        
+        collector = FileInfoCollector()
+        collector.visit(tree)
+        imports = collector.sorted_imports()
+        docstring = extract_docstring(tree)
+        source_code = source if isinstance(source, str) else decode_source(source)
+        lines = source_code.splitlines()
+        if profiler is not None:
+            collected = time.perf_counter()
+            profiler.record("collect", collected - parsed, 0, file_path)
+        
+        comments = get_significant_comments(lines, collector.string_spans)
+        main_block = summarize_main_block(lines, collector.main_guard)
+        if profiler is not None:
+            profiler.record("comments", time.perf_counter() - collected, len(source), file_path)
+        
+        return FileInfo(file_path, collector.classes, collector.functions, docstring,
+                        comments, imports, main_block)
+    
+    except RecursionError:
+        # Expressões aninhadas demais para o parser ou para o coletor
+        return guard_fallback(source, file_path, "aninhamento profundo demais para a árvore sintática")
+    except Exception as e:
+        return FileInfo(file_path, error=f"Erro ao analisar arquivo: {str(e)}")
+
+def _count_nodes(tree, limit):
+    """Conta os nós da árvore, parando logo depois de passar de `limit`"""
+    count = 0
+    for count, _ in enumerate(ast.walk(tree), 1):
+        if count > limit:
+            break
+    return count
+
+def file_digest(data):
+    """Calcula o hash de conteúdo usado para identificar arquivos inalterados"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+# Hash de um arquivo vazio (ex.: __init__.py), agrupado à parte no relatório
+EMPTY_DIGEST = file_digest(b"")
+
+class AnalysisCache:
+    """Cache persistente dos resultados de analyze_python_file
+    
+    Cada caminho relativo é associado a (mtime, tamanho, hash) e ao `file_info`
+    serializado. Se mtime e tamanho coincidirem, o arquivo nem é lido; se
+    apenas o conteúdo coincidir (ex.: checkout novo), o hash evita a reanálise.
+    O hash também endereça o conteúdo: um arquivo novo idêntico a outro já
+    armazenado (cópia vendorizada) reaproveita o resultado dele. O cache
+    inteiro é descartado quando a versão do CodeScope muda.
+    """
+    
+    def __init__(self, project_path, cache_dir=None):
+        self.project_path = project_path
+        cache_dir = cache_dir or os.path.join(project_path, CACHE_DIR_NAME)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, "analysis.sqlite3")
+        # O modo serve atualiza o projeto em outros threads (um de cada vez)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, digest TEXT, info TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_files_digest ON files (digest)")
+        
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if not row or row[0] != __version__:
+            self.clear()
+        
+        # Carregar apenas as assinaturas; o file_info é lido sob demanda
+        self._entries = {
+            path: (mtime_ns, size, digest)
+            for path, mtime_ns, size, digest in self.conn.execute(
+                "SELECT path, mtime_ns, size, digest FROM files")
+        }
+        self._signatures = {}
+        self._pending = []
+        # Hash → resultado (JSON) ainda não gravado, para load_by_digest
+        self._pending_content = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def clear(self):
+        """Remove todas as entradas e grava a versão atual"""
+        self.conn.execute("DELETE FROM files")
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (__version__,))
+        self.conn.commit()
+        self._entries = {}
+    
+    def lookup(self, file_path):
+        """Indica se o arquivo está no cache com a mesma assinatura"""
+        full_path = os.path.join(self.project_path, file_path)
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            return False
+        if self.matches_stat(file_path, st):
+            return True
+        
+        try:
+            with open(full_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return False
+        return self.matches_content(file_path, st, data)
+    
+    def matches_stat(self, file_path, st):
+        """Indica se mtime e tamanho coincidem com a entrada do cache"""
+        entry = self._entries.get(file_path)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            self.hits += 1
+            return True
+        return False
+    
+    def matches_content(self, file_path, st, data, digest=None):
+        """Compara o conteúdo já lido com o hash do cache e prepara a assinatura para store()"""
+        entry = self._entries.get(file_path)
+        digest = digest or file_digest(data)
+        self._signatures[file_path] = (st.st_mtime_ns, st.st_size, digest)
+        
+        if entry and entry[1] == st.st_size and entry[2] == digest:
+            # Conteúdo idêntico com mtime diferente: só atualizar a assinatura
+            self._pending.append((file_path, st.st_mtime_ns, st.st_size, digest, None))
+            self.hits += 1
+            return True
+        
+        self.misses += 1
+        return False
+    
+    def load(self, file_path):
+        """Lê o FileInfo armazenado para o caminho"""
+        row = self.conn.execute("SELECT info, digest FROM files WHERE path = ?", (file_path,)).fetchone()
+        if not row:
+            return None
+        file_info = FileInfo.from_dict(json.loads(row[0]))
+        file_info.sha = file_info.sha or row[1]
+        return file_info
+    
+    def load_by_digest(self, digest, file_path):
+        """Resultado armazenado (ou ainda pendente) para um conteúdo, copiado para `file_path`"""
+        info = self._pending_content.get(digest)
+        if info is None:
+            row = self.conn.execute("SELECT info FROM files WHERE digest = ? LIMIT 1",
+                                    (digest,)).fetchone()
+            if not row:
+                return None
+            info = row[0]
+        file_info = FileInfo.from_dict(json.loads(info)).with_path(file_path)
+        file_info.sha = digest
+        return file_info
+    
+    def load_content(self, digest, file_path):
+        """Resultado armazenado para o mesmo conteúdo em outro caminho, copiado para `file_path`"""
+        file_info = self.load_by_digest(digest, file_path)
+        if file_info is not None:
+            # Conta como reaproveitado: matches_content já o havia contado como analisado
+            self.misses -= 1
+            self.hits += 1
+        return file_info
+    
+    def store(self, file_info):
+        """Armazena o resultado de uma análise (erros e resumos parciais não são armazenados)"""
+        file_path = file_info.path
+        signature = self._signatures.pop(file_path, None)
+        if file_info.error is not None or file_info.partial or signature is None:
+            return
+        info = json.dumps(file_info.to_dict(), ensure_ascii=False)
+        self._pending.append((file_path, *signature, info))
+        self._pending_content[signature[2]] = info
+        if len(self._pending) >= 1000:
+            self.flush()
+    
+    def flush(self):
+        """Grava as alterações pendentes no disco"""
+        for file_path, mtime_ns, size, digest, info in self._pending:
+            if info is None:
+                self.conn.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?",
+                                  (mtime_ns, size, file_path))
+            else:
+                self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                                  (file_path, mtime_ns, size, digest, info))
+            self._entries[file_path] = (mtime_ns, size, digest)
+        self._pending = []
+        self._pending_content = {}
+        self.conn.commit()
+    
+    def prune(self, existing_paths):
+        """Remove entradas de arquivos que não existem mais e retorna quantas foram removidas"""
+        existing = set(existing_paths)
+        stale = [path for path in self._entries if path not in existing]
+        self.conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in stale])
+        self.conn.commit()
+        for path in stale:
+            del self._entries[path]
+        return len(stale)
+    
+    def close(self):
+        """Grava pendências e fecha a conexão"""
+        self.flush()
+        self.conn.close()
+
+class SymbolIndex:
+    """Índice persistente de símbolos e importações para o subcomando `query`
+    
+    Guarda nome → locais (classes, métodos e funções, com a classe e o
+    resumo da docstring) e módulo → arquivos que o importam. Os nomes ficam
+    numa tabela própria, sem repetição, e as buscas exata e por prefixo usam
+    o índice B-tree dela. Para a busca por expressão regular, a lista ordenada
+    dos nomes distintos também é guardada como um único texto (um nome por
+    linha), percorrido pelo re de uma vez em vez de linha a linha do banco.
+    Cada arquivo guarda uma impressão digital dos seus símbolos,
+    e arquivos sem alteração não são regravados.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE, fingerprint TEXT);
+        CREATE TABLE IF NOT EXISTS names (
+            id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, folded TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS symbols (
+            name_id INTEGER NOT NULL, file_id INTEGER NOT NULL, kind TEXT NOT NULL,
+            parent TEXT, summary TEXT);
+        CREATE TABLE IF NOT EXISTS imports (
+            module TEXT NOT NULL, file_id INTEGER NOT NULL, category TEXT NOT NULL);
+        CREATE INDEX IF NOT EXISTS idx_names_folded ON names (folded);
+        CREATE INDEX IF NOT EXISTS idx_symbols_name ON symbols (name_id);
+        CREATE INDEX IF NOT EXISTS idx_symbols_file ON symbols (file_id);
+        CREATE INDEX IF NOT EXISTS idx_imports_module ON imports (module);
+        CREATE INDEX IF NOT EXISTS idx_imports_file ON imports (file_id);
+    """
+    
+    FILE_NAME = "symbols.sqlite3"
+    
+    def __init__(self, db_path, create=True):
+        if not create and not os.path.exists(db_path):
+            raise FileNotFoundError(f"índice de símbolos não encontrado: {db_path} "
+                                    "(gere-o com: codescope360.py PROJETO --index)")
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if create and (not row or row[0] != __version__):
+            self.clear()
+        self._files = {path: (file_id, fingerprint) for file_id, path, fingerprint
+                       in self.conn.execute("SELECT id, path, fingerprint FROM files")}
+        self._name_ids = None
+        self._dirty = False
+        self.updated = 0
+    
+    @classmethod
+    def for_project(cls, project_path, cache_dir=None, create=True):
+        """Abre o índice guardado no diretório de cache do projeto"""
+        cache_dir = cache_dir or os.path.join(project_path, CACHE_DIR_NAME)
+        if create:
+            os.makedirs(cache_dir, exist_ok=True)
+        return cls(os.path.join(cache_dir, cls.FILE_NAME), create)
+    
+    def clear(self):
+        """Remove todo o conteúdo e grava a versão atual"""
+        for table in ("files", "names", "symbols", "imports"):
+            self.conn.execute(f"DELETE FROM {table}")
+        self.conn.execute("DELETE FROM meta WHERE key = 'names'")
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (__version__,))
+        self.conn.commit()
+        self._files = {}
+        self._dirty = True
+    
+    def _name_id(self, name):
+        if self._name_ids is None:
+            self._name_ids = dict(self.conn.execute("SELECT name, id FROM names"))
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self.conn.execute("INSERT INTO names (name, folded) VALUES (?, ?)",
+                                        (name, name.casefold())).lastrowid
+            self._name_ids[name] = name_id
+        return name_id
+    
+    def add(self, file_info):
+        """Atualiza os símbolos e importações de um arquivo (sem efeito se nada mudou)"""
+        path = file_info.path
+        symbols = [("class", cls.name, None, cls.summary) for cls in file_info.classes]
+        symbols.extend(("method", method.name, cls.name, method.summary)
+                       for cls in file_info.classes for method in cls.methods)
+        symbols.extend(("function", func.name, None, func.summary) for func in file_info.functions)
+        imports = sorted({(absolute_import_name(name, path) or name, category)
+                          for category, names in file_info.imports.items() for name in names})
+        fingerprint = hashlib.sha1(json.dumps([symbols, imports]).encode("utf-8")).hexdigest()
+        
+        entry = self._files.get(path)
+        if entry and entry[1] == fingerprint:
+            return
+        if entry:
+            file_id = entry[0]
+            self.conn.execute("DELETE FROM symbols WHERE file_id = ?", (file_id,))
+            self.conn.execute("DELETE FROM imports WHERE file_id = ?", (file_id,))
+            self.conn.execute("UPDATE files SET fingerprint = ? WHERE id = ?", (fingerprint, file_id))
+        else:
+            file_id = self.conn.execute("INSERT INTO files (path, fingerprint) VALUES (?, ?)",
+                                        (path, fingerprint)).lastrowid
+        self._files[path] = (file_id, fingerprint)
+        self.conn.executemany(
+            "INSERT INTO symbols (name_id, file_id, kind, parent, summary) VALUES (?, ?, ?, ?, ?)",
+            [(self._name_id(name), file_id, kind, parent, summary)
+             for kind, name, parent, summary in symbols]
+        )
+        self.conn.executemany("INSERT INTO imports (module, file_id, category) VALUES (?, ?, ?)",
+                              [(module, file_id, category) for module, category in imports])
+        self.updated += 1
+        self._dirty = True
+    
+    def prune(self, existing_paths):
+        """Remove arquivos que não existem mais e nomes sem símbolos; retorna quantos arquivos saíram"""
+        existing = set(existing_paths)
+        stale = [(file_id,) for path, (file_id, _) in self._files.items() if path not in existing]
+        for table, column in (("symbols", "file_id"), ("imports", "file_id"), ("files", "id")):
+            self.conn.executemany(f"DELETE FROM {table} WHERE {column} = ?", stale)
+        if stale or self.updated:
+            self.conn.execute("DELETE FROM names WHERE id NOT IN (SELECT name_id FROM symbols)")
+            self._name_ids = None
+            self._dirty = True
+        self._files = {path: entry for path, entry in self._files.items() if path in existing}
+        return len(stale)
+    
+    def close(self):
+        """Grava as alterações (e a lista de nomes, se mudou) e fecha a conexão"""
+        if self._dirty:
+            names = "\n".join(name for name, in self.conn.execute("SELECT name FROM names ORDER BY name"))
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('names', ?)", (names,))
+        self.conn.commit()
+        self.conn.close()
+    
+    def _symbols_for(self, where, params, kind=None, limit=None):
+        sql = ("SELECT n.name, s.kind, s.parent, f.path, s.summary FROM names n "
+               "JOIN symbols s ON s.name_id = n.id JOIN files f ON f.id = s.file_id "
+               f"WHERE {where}")
+        if kind:
+            sql += " AND s.kind = ?"
+            params = (*params, kind)
+        sql += " ORDER BY n.name, f.path, s.parent"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [dict(zip(("name", "kind", "parent", "path", "summary"), row))
+                for row in self.conn.execute(sql, params)]
+    
+    def lookup(self, name, kind=None, ignore_case=False, limit=None):
+        """Locais de um nome exato ("Classe.metodo" restringe o método à classe)"""
+        column, key = ("n.folded", name.casefold()) if ignore_case else ("n.name", name)
+        found = self._symbols_for(f"{column} = ?", (key,), kind, limit)
+        parent, _, member = name.rpartition(".")
+        if not found and parent:
+            found = [symbol for symbol in self._symbols_for(f"{column} = ?", (
+                         member.casefold() if ignore_case else member,), kind, None)
+                     if symbol["parent"] and (symbol["parent"].casefold() == parent.casefold()
+                                              if ignore_case else symbol["parent"] == parent)]
+            found = found[:limit] if limit else found
+        return found
+    
+    def prefix(self, prefix, kind=None, ignore_case=False, limit=None):
+        """Símbolos cujo nome começa com `prefix` (intervalo no índice, sem varredura)"""
+        column, key = ("n.folded", prefix.casefold()) if ignore_case else ("n.name", prefix)
+        return self._symbols_for(f"{column} >= ? AND {column} < ?", (key, key + "\U0010ffff"),
+                                 kind, limit)
+    
+    def search(self, pattern, kind=None, ignore_case=False, limit=None):
+        """Símbolos cujo nome casa com a expressão regular (re.search)"""
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        # Um literal fixo no início (^abc) restringe a busca a um intervalo do índice
+        literal = _regex_literal_prefix(pattern)
+        if literal and not ignore_case:
+            rows = self.conn.execute("SELECT name FROM names WHERE name >= ? AND name < ? "
+                                     "ORDER BY name", (literal, literal + "\U0010ffff"))
+            names = [name for name, in rows if regex.search(name)]
+        else:
+            names = self._matching_names(regex)
+        # Nomes em ordem: os locais são buscados em lotes só até atingir o limite
+        found = []
+        for start in range(0, len(names), 500):
+            batch = names[start:start + 500]
+            found.extend(self._symbols_for(f"n.name IN ({','.join('?' * len(batch))})", batch, kind))
+            if limit and len(found) >= limit:
+                break
+        return found[:limit] if limit else found
+    
+    def _matching_names(self, regex):
+        """Nomes distintos (em ordem) que casam com a expressão, via a lista guardada em meta"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'names'").fetchone()
+        # \A, \Z e lookbehind enxergariam as linhas vizinhas no texto único
+        if row is None or any(token in regex.pattern for token in ("\\A", "\\Z", "(?<")):
+            return [name for name, in self.conn.execute("SELECT name FROM names ORDER BY name")
+                    if regex.search(name)]
+        text = row[0]
+        if not text:
+            return []
+        scanner = re.compile(regex.pattern, regex.flags | re.MULTILINE)
+        names = []
+        position = 0
+        while position <= len(text):
+            match = scanner.search(text, position)
+            if not match:
+                break
+            # Confirmar na linha inteira: o casamento no texto pode atravessar linhas
+            start = text.rfind("\n", 0, match.start()) + 1
+            end = text.find("\n", match.start())
+            if end < 0:
+                end = len(text)
+            name = text[start:end]
+            if regex.search(name):
+                names.append(name)
+            position = end + 1
+        return names
+    
+    def importers(self, module, limit=None):
+        """Arquivos que importam o módulo ou algo dentro dele (ex.: "os" inclui "os.path.join")"""
+        sql = ("SELECT f.path, i.category, group_concat(DISTINCT i.module) FROM imports i "
+               "JOIN files f ON f.id = i.file_id "
+               "WHERE i.module = ? OR (i.module >= ? AND i.module < ?) "
+               "GROUP BY f.path, i.category ORDER BY f.path")
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [{"path": path, "category": category, "names": sorted(names.split(","))}
+                for path, category, names in self.conn.execute(sql, (module, module + ".", module + "/"))]
+    
+    def stats(self):
+        """Quantidade de arquivos, nomes distintos, símbolos e importações"""
+        return {table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("files", "names", "symbols", "imports")}
+
+def _regex_literal_prefix(pattern):
+    """Literal no início de uma expressão ancorada ("^get_" → "get_"), ou "" se não houver"""
+    if not pattern.startswith("^") or "|" in pattern:
+        return ""
+    literal = re.match(r"[A-Za-z0-9_]*", pattern[1:]).group()
+    # Um quantificador logo depois torna o último caractere opcional
+    if literal and pattern[1 + len(literal):1 + len(literal) + 1] in ("*", "?", "{"):
+        literal = literal[:-1]
+    return literal
+
+def resolve_jobs(jobs):
+    """Determina quantos processos usar na análise (0 ou negativo = detectar núcleos)"""
+    if jobs and jobs > 0:
+        return jobs
+    return os.cpu_count() or 1
+
+def _init_worker(resolver, profiling=False, summary_threshold=None, guards=None):
+    """Prepara um processo do pool com o resolvedor de módulos e as opções da execução"""
+    set_module_resolver(resolver)
+    set_profiler(Profiler() if profiling else None)
+    set_summary_threshold(summary_threshold)
+    set_resource_guards(guards)
+
+def _analyze_blob_chunk(items, project_modules=None):
+    """Analisa um lote de conteúdos já lidos ((caminho, bytes, hash)) dentro de um processo do pool
+    
+    No lugar dos bytes pode vir o caminho absoluto (str) de um arquivo grande,
+    que o processo mapeia com mmap em vez de receber uma cópia pelo pipe; se o
+    arquivo mudou desde a leitura, vale o conteúdo atual, com o seu hash.
+    Em um pool compartilhado entre projetos (modo batch), `project_modules`
+    indica os módulos do projeto do lote, e o resolvedor é trocado quando o
+    projeto muda. Retorna (resultados, medições do lote ou None sem perfil).
+    """
+    if project_modules is not None and get_module_resolver().project != project_modules:
+        set_module_resolver(get_module_resolver().for_project(project_modules))
+    profiler = _profiler
+    results = []
+    for file_path, data, digest in items:
+        if profiler is not None:
+            start = time.perf_counter()
+        if isinstance(data, str):
+            try:
+                data = read_source(data)
+            except OSError as e:
+                results.append(FileInfo(file_path, error=f"Erro ao analisar arquivo: {str(e)}"))
+                continue
+            digest = file_digest(data)
+        results.append(analyze_bytes(data, file_path, digest))
+        if profiler is not None:
+            profiler.record_file(file_path, time.perf_counter() - start, len(data))
+        _close_source(data)
+    return results, profiler.drain() if profiler is not None else None
+
+def _analyze_blob(file_path, data, digest=None):
+    """Analisa um conteúdo já lido dentro de um processo do pool (modo assíncrono)"""
+    file_info = analyze_bytes(data, file_path, digest)
+    return file_info, _profiler.drain() if _profiler is not None else None
+
+# Máximo de saídas retidas por analyze_files à espera do lote do início da fila
+PENDING_LIMIT = 1024
+
+# Memória (bytes estimados) que o índice por conteúdo usa durante uma execução
+DEDUP_MEMORY = 32 * 1024 * 1024
+
+# Custo de uma entrada do índice que guarda só o hash (o resultado está no cache)
+DEDUP_ENTRY_SIZE = 128
+
+def _result_size(file_info):
+    """Estimativa grosseira, em bytes, da memória ocupada por um FileInfo"""
+    size = 256 + len(file_info.docstring or "") + len(file_info.error or "")
+    size += sum(64 + len(comment) for comment in file_info.comments)
+    size += sum(64 + len(line) for line in file_info.main_block or ())
+    for cls in file_info.classes:
+        size += 128 + len(cls.docstring or "")
+        size += sum(96 + len(method.docstring or "") for method in cls.methods)
+    size += sum(96 + len(function.docstring or "") for function in file_info.functions)
+    size += 8 * sum(len(names) for _, names in file_info.imports.items())
+    return size
+
+class ContentIndex:
+    """Resultados por hash de conteúdo, para analisar cada conteúdo distinto uma única vez
+    
+    Cópias vendorizadas, stubs gerados e __init__.py vazios recebem o
+    resultado do primeiro arquivo com o mesmo conteúdo (FileInfo.with_path);
+    classes, funções, docstrings, comentários e importações não dependem do
+    caminho (importações relativas ficam com os pontos e só são resolvidas
+    no grafo). Com um AnalysisCache, os resultados que ele armazena não ficam
+    em memória: o índice guarda só o hash e os relê do cache. Os demais são
+    mantidos até `capacity` bytes (estimados), os usados mais recentemente;
+    um conteúdo que saiu do índice é apenas analisado de novo.
+    """
+    
+    def __init__(self, capacity=DEDUP_MEMORY, cache=None):
+        self.capacity = capacity
+        self.cache = cache
+        # Hash → (FileInfo, ou None se estiver no cache; tamanho estimado)
+        self._results = {}
+        self._size = 0
+        self.hits = 0
+    
+    def get(self, digest, file_path):
+        """Resultado do conteúdo copiado para `file_path`, ou None se ainda não analisado"""
+        entry = self._results.pop(digest, None)
+        if entry is None:
+            return None
+        if entry[0] is None:
+            file_info = self.cache.load_by_digest(digest, file_path)
+            if file_info is None:
+                self._size -= entry[1]
+                return None
+            file_info.imports = reclassify_imports(file_info.imports)
+        else:
+            file_info = entry[0].with_path(file_path)
+        self._results[digest] = entry
+        self.record_hit()
+        return file_info
+    
+    def record_hit(self):
+        """Conta um arquivo reaproveitado de uma cópia idêntica"""
+        self.hits += 1
+        if self.cache is not None:
+            # matches_content já o havia contado como analisado
+            self.cache.misses -= 1
+    
+    def put(self, file_info):
+        """Registra o resultado de um conteúdo (sem efeito para arquivos que não foram lidos)
+        
+        Com cache, chame depois de cache.store, para que o resultado já possa ser relido.
+        """
+        if file_info.sha is None:
+            return
+        old = self._results.pop(file_info.sha, None)
+        if old is not None:
+            self._size -= old[1]
+        if self.cache is not None and file_info.error is None and not file_info.partial:
+            entry = (None, DEDUP_ENTRY_SIZE)
+        else:
+            entry = (file_info, _result_size(file_info))
+        self._results[file_info.sha] = entry
+        self._size += entry[1]
+        while self._size > self.capacity and len(self._results) > 1:
+            self._size -= self._results.pop(next(iter(self._results)))[1]
+
+def _close_source(data):
+    """Libera o mapeamento de um conteúdo lido com read_source"""
+    if isinstance(data, mmap.mmap):
+        data.close()
+
+def _read_for_analysis(file_path, project_path, cache=None, fs=None):
+    """Lê um arquivo para análise
+    
+    Retorna um FileInfo já resolvido (do cache, ou de erro de leitura) ou
+    (conteúdo, hash) para os arquivos que precisam de análise.
+    """
+    full_path = os.path.join(project_path, file_path)
+    try:
+        if cache is not None:
+            with profile_stage("cache"):
+                st = (fs or LOCAL_FS).stat(full_path)
+                if cache.matches_stat(file_path, st):
+                    file_info = _load_cached(cache, file_path)
+                    if file_info is not None:
+                        return file_info
+        start = time.perf_counter()
+        data = read_source(full_path) if fs is None else fs.read_bytes(full_path)
+    except Exception as e:
+        return FileInfo(file_path, error=f"Erro ao analisar arquivo: {str(e)}")
+    if _profiler is not None:
+        _profiler.record("read", time.perf_counter() - start, len(data), file_path)
+    
+    digest = file_digest(data)
+    if cache is not None and cache.matches_content(file_path, st, data, digest):
+        file_info = _load_cached(cache, file_path)
+        if file_info is not None:
+            _close_source(data)
+            return file_info
+    return data, digest
+
+def analyze_files(python_files, project_path, jobs=1, chunksize=None, cache=None, fs=None,
+                  executor=None, contents=None):
+    """Analisa os arquivos e devolve os resultados na mesma ordem da lista de entrada
+
+    Cada arquivo é lido uma vez, no processo principal, e identificado pelo
+    hash do conteúdo: conteúdos repetidos são analisados uma única vez
+    (ContentIndex, ou `contents` se informado). Com jobs > 1 os conteúdos
+    distintos vão em lotes para um pool de processos; os resultados
+    continuam saindo na ordem de `python_files`, de modo que o relatório é
+    idêntico ao da análise sequencial. Com um AnalysisCache, apenas os
+    arquivos alterados são analisados, e um conteúdo já armazenado sob
+    outro caminho também é reaproveitado. Um `executor` já aberto (pool
+    compartilhado entre projetos) é usado no lugar de um pool novo.
+    """
+    jobs = resolve_jobs(jobs)
+    contents = contents if contents is not None else ContentIndex(cache=cache)
+    guards = get_resource_guards()
+    # Com tempo máximo por arquivo, a análise sempre roda em processos supervisionados
+    parallel = (jobs > 1 and len(python_files) > 1) or guards.parse_timeout is not None
+    if guards.isolated():
+        # GuardedPool: uma tarefa por arquivo (tempo e reciclagem contados por arquivo)
+        chunksize = 1
+    elif parallel and not chunksize:
+        # Lotes grandes o bastante para diluir o custo de comunicação entre processos,
+        # pequenos o bastante para manter todos os núcleos ocupados até o fim
+        chunksize = max(1, min(64, len(python_files) // (jobs * 4)))
+    project_modules = get_module_resolver().project if executor is not None else None
+    
+    # Saídas na ordem de python_files: ("file", FileInfo), ("chunk", lote, posição) ou
+    # ("copy", caminho, hash) para uma cópia de um conteúdo ainda no pool. Cada lote é
+    # [futuro (None enquanto é montado), hashes, resultados (None até serem obtidos)]
+    pending = deque()
+    in_flight = set()
+    chunk = []
+    chunk_bytes = 0
+    batch = None
+    in_flight_chunks = 0
+    # Hash → [cópias na fila, resultado do original], para conteúdos com cópias pendentes
+    copies = {}
+    # Saídas retidas no máximo: além disso, espera-se pelo lote do início da fila
+    pending_limit = max(PENDING_LIMIT, (jobs * 2 + 1) * (chunksize or 1))
+    
+    def submit():
+        """Envia o lote em montagem ao pool"""
+        nonlocal chunk, chunk_bytes, in_flight_chunks
+        batch[0] = pool.submit(_analyze_blob_chunk, chunk, project_modules)
+        in_flight_chunks += 1
+        chunk = []
+        chunk_bytes = 0
+    
+    def emit(window):
+        """Gera as saídas prontas do início da fila, esperando lotes só além da janela"""
+        nonlocal in_flight_chunks
+        while pending:
+            entry = pending[0]
+            if entry[0] == "chunk":
+                batch_entry = entry[1]
+                if batch_entry[2] is None:
+                    if batch_entry[0] is None:
+                        # Lote em montagem no início da fila: enviá-lo já se houver saídas
+                        # atrás dele, em vez de retê-las até o lote encher
+                        if len(pending) <= len(chunk):
+                            return
+                        submit()
+                    if in_flight_chunks <= window and not batch_entry[0].done():
+                        return
+                    in_flight_chunks -= 1
+                    batch_entry[2] = _chunk_results(batch_entry[0], batch_entry[1])
+                    for (_, _, digest), file_info in zip(batch_entry[1], batch_entry[2]):
+                        in_flight.discard(digest)
+                        if digest in copies:
+                            copies[digest][1] = file_info
+                        if cache is not None:
+                            cache.store(file_info)
+                        contents.put(file_info)
+                    batch_entry[1] = None
+                file_info = batch_entry[2][entry[2]]
+            elif entry[0] == "copy":
+                waiting = copies[entry[2]]
+                file_info = contents.get(entry[2], entry[1])
+                if file_info is None:
+                    # O original falhou no pool (sem hash, fora do índice) ou já saiu do
+                    # índice: a cópia recebe o mesmo resultado, sem nova análise
+                    file_info = waiting[1].with_path(entry[1])
+                    contents.record_hit()
+                waiting[0] -= 1
+                if not waiting[0]:
+                    del copies[entry[2]]
+            else:
+                file_info = entry[1]
+            pending.popleft()
+            if cache is not None and entry[0] == "copy":
+                cache.store(file_info)
+            yield file_info
+    
+    with (_worker_pool(jobs) if parallel and executor is None
+          else contextlib.nullcontext(executor)) as pool:
+        for file_path in python_files:
+            item = _read_for_analysis(file_path, project_path, cache, fs)
+            if isinstance(item, FileInfo):
+                contents.put(item)
+                pending.append(("file", item))
+            else:
+                data, digest = item
+                file_info = contents.get(digest, file_path)
+                if file_info is None and cache is not None and digest not in in_flight:
+                    file_info = cache.load_content(digest, file_path)
+                    if file_info is not None:
+                        file_info.imports = reclassify_imports(file_info.imports)
+                        contents.put(file_info)
+                
+                if file_info is not None:
+                    _close_source(data)
+                    if cache is not None:
+                        cache.store(file_info)
+                    pending.append(("file", file_info))
+                elif digest in in_flight:
+                    _close_source(data)
+                    copies.setdefault(digest, [0, None])[0] += 1
+                    pending.append(("copy", file_path, digest))
+                elif not parallel:
+                    if _profiler is not None:
+                        start = time.perf_counter()
+                    file_info = analyze_bytes(data, file_path, digest)
+                    if _profiler is not None:
+                        _profiler.record_file(file_path, time.perf_counter() - start, len(data))
+                    _close_source(data)
+                    if cache is not None:
+                        cache.store(file_info)
+                    contents.put(file_info)
+                    pending.append(("file", file_info))
+                else:
+                    if not chunk:
+                        batch = [None, chunk, None]
+                    pending.append(("chunk", batch, len(chunk)))
+                    # Arquivos mapeados vão pelo caminho: o processo do pool os mapeia de novo
+                    source = (os.path.join(os.path.abspath(project_path), file_path)
+                              if isinstance(data, mmap.mmap) else data)
+                    chunk.append((file_path, source, digest))
+                    chunk_bytes += len(data)
+                    _close_source(data)
+                    in_flight.add(digest)
+            
+            if chunk and (len(chunk) >= chunksize or chunk_bytes >= 1 << 20):
+                submit()
+            # Janela limitada de lotes em andamento e de saídas retidas: resultados não
+            # consumidos não se acumulam
+            yield from emit(jobs * 2 if len(pending) < pending_limit else 0)
+        
+        if chunk:
+            submit()
+        yield from emit(0)
+
+def _load_cached(cache, file_path):
+    """Lê um resultado do cache, reclassificando as importações com o resolvedor atual"""
+    file_info = cache.load(file_path)
+    if file_info is not None:
+        # O ambiente pode ter mudado desde a gravação (pacotes instalados etc.)
+        file_info.imports = reclassify_imports(file_info.imports)
+    return file_info
+
+def _worker_pool(jobs):
+    """Pool de processos de análise, preparado com o resolvedor e as opções desta execução
+    
+    Com tempo máximo por arquivo ou reciclagem de processos (ResourceGuards),
+    o pool é um GuardedPool.
+    """
+    initargs = (get_module_resolver(), _profiler is not None, _summary_threshold, _resource_guards)
+    if _resource_guards.isolated():
+        return GuardedPool(jobs, initargs, _resource_guards.parse_timeout,
+                           _resource_guards.worker_max_files)
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs)
+
+class ParseTimeout(TimeoutError):
+    """Uma tarefa do GuardedPool passou do tempo máximo e seu processo foi encerrado"""
+
+def _guarded_worker(conn, initargs):
+    """Laço de um processo do GuardedPool: recebe (função, argumentos) e devolve o resultado"""
+    _init_worker(*initargs)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        fn, args = task
+        try:
+            conn.send((True, fn(*args)))
+        except BaseException as e:
+            conn.send((False, e))
+
+class GuardedPool(Executor):
+    """Pool de processos supervisionados, um por vaga, com tempo máximo por tarefa
+    
+    Cada vaga tem um thread que envia as tarefas ao seu processo por um pipe
+    e espera no máximo `timeout` segundos pela resposta; ao estourar, o
+    processo é encerrado (kill) e substituído, e o futuro recebe ParseTimeout,
+    sem afetar as demais vagas. Depois de `max_tasks` tarefas o processo
+    também é substituído, limitando o crescimento de memória. Diferente do
+    ProcessPoolExecutor, cada chamada de submit é uma tarefa supervisionada,
+    então os chamadores enviam um arquivo por tarefa.
+    """
+    
+    def __init__(self, jobs, initargs, timeout=None, max_tasks=None):
+        self.timeout = timeout
+        self.max_tasks = max_tasks
+        self.initargs = initargs
+        # Os processos são criados por vários threads ao mesmo tempo: fork copiaria locks
+        # possivelmente presos por outros threads, então usa-se forkserver (ou spawn)
+        self._context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+        self._tasks = queue_module.SimpleQueue()
+        self._threads = [threading.Thread(target=self._run_slot, daemon=True)
+                         for _ in range(resolve_jobs(jobs))]
+        for thread in self._threads:
+            thread.start()
+    
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        self._tasks.put((future, fn, args))
+        return future
+    
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        if cancel_futures:
+            # Tarefas ainda na fila não chegam aos processos
+            while True:
+                try:
+                    task = self._tasks.get(block=False)
+                except queue_module.Empty:
+                    break
+                if task is not None:
+                    task[0].cancel()
+        for _ in self._threads:
+            self._tasks.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Interrompido (erro, Ctrl-C ou gerador fechado): não analisar o resto da fila
+        self.shutdown(wait=True, cancel_futures=exc_type is not None)
+        return False
+    
+    def _spawn(self):
+        parent, child = self._context.Pipe()
+        process = self._context.Process(target=_guarded_worker, args=(child, self.initargs),
+                                        daemon=True)
+        process.start()
+        child.close()
+        return process, parent
+    
+    @staticmethod
+    def _stop(process, conn, kill=False):
+        if kill:
+            process.kill()
+        else:
+            try:
+                conn.send(None)
+            except OSError:
+                process.kill()
+        process.join()
+        conn.close()
+    
+    def _run_slot(self):
+        """Executa as tarefas de uma vaga, recriando o processo quando necessário"""
+        process = conn = None
+        served = 0
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            future, fn, args = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            if process is None:
+                process, conn = self._spawn()
+                served = 0
+            try:
+                conn.send((fn, args))
+                if not conn.poll(self.timeout):
+                    self._stop(process, conn, kill=True)
+                    process = None
+                    future.set_exception(ParseTimeout(f"análise excedeu {self.timeout:g} s"))
+                    continue
+                ok, value = conn.recv()
+            except (EOFError, OSError):
+                # Processo encerrado durante a tarefa (ex.: falta de memória)
+                self._stop(process, conn, kill=True)
+                process = None
+                future.set_exception(BrokenProcessPool("processo de análise encerrado inesperadamente"))
+                continue
+            
+            served += 1
+            if self.max_tasks is not None and served >= self.max_tasks:
+                self._stop(process, conn)
+                process = None
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+        if process is not None:
+            self._stop(process, conn)
+
+async def async_analyze_files(python_files, project_path, consume, jobs=1, cache=None, fs=None,
+                              io_limit=32, contents=None):
+    """Pipeline assíncrono: leituras concorrentes alimentam os analisadores por uma fila
+    
+    Até `io_limit` operações de E/S (stat e leitura) ficam em andamento ao
+    mesmo tempo, de modo que a latência de sistemas de arquivos remotos se
+    sobrepõe à análise. O conteúdo lido segue por uma fila limitada para
+    `jobs` analisadores (um thread ou processos do pool), e `consume(índice,
+    file_info)` é chamado na ordem de `python_files`, como em analyze_files.
+    Com cache, o arquivo lido para conferir o hash é o mesmo que é analisado.
+    Conteúdos repetidos são analisados uma única vez: as cópias aguardam o
+    resultado do primeiro arquivo com o mesmo hash (ContentIndex).
+    """
+    fs = fs or LOCAL_FS
+    loop = asyncio.get_running_loop()
+    jobs = resolve_jobs(jobs)
+    threaded = (jobs == 1 or len(python_files) < 2) and get_resource_guards().parse_timeout is None
+    results = {}
+    ready = asyncio.Condition()
+    # Janela de resultados pendentes: a leitura não se adianta demais à saída
+    window = asyncio.Semaphore(max(io_limit, jobs) * 2)
+    queue = asyncio.Queue(maxsize=jobs * 2)
+    contents = contents if contents is not None else ContentIndex(cache=cache)
+    # Hash → futuro do resultado, para conteúdos já enviados aos analisadores
+    waiting = {}
+    
+    async def publish(index, file_info):
+        async with ready:
+            results[index] = file_info
+            ready.notify_all()
+    
+    with ThreadPoolExecutor(max_workers=io_limit) as io_pool, \
+            (ThreadPoolExecutor(max_workers=1) if threaded else _worker_pool(jobs)) as parse_pool:
+        
+        async def read(index, file_path):
+            full_path = os.path.join(project_path, file_path)
+            start = time.perf_counter()
+            try:
+                st = await loop.run_in_executor(io_pool, fs.stat, full_path)
+                if cache is not None and cache.matches_stat(file_path, st):
+                    file_info = _load_cached(cache, file_path)
+                    if file_info is not None:
+                        await publish(index, file_info)
+                        return
+                data = await loop.run_in_executor(io_pool, fs.read_bytes, full_path)
+            except Exception as e:
+                await publish(index, FileInfo(file_path, error=f"Erro ao analisar arquivo: {str(e)}"))
+                return
+            if _profiler is not None:
+                _profiler.record("read", time.perf_counter() - start, len(data), file_path)
+            digest = file_digest(data)
+            if cache is not None and cache.matches_content(file_path, st, data, digest):
+                file_info = _load_cached(cache, file_path)
+                if file_info is not None:
+                    await publish(index, file_info)
+                    return
+            
+            file_info = contents.get(digest, file_path)
+            if file_info is None and cache is not None and digest not in waiting:
+                file_info = cache.load_content(digest, file_path)
+                if file_info is not None:
+                    file_info.imports = reclassify_imports(file_info.imports)
+                    contents.put(file_info)
+            if file_info is None and digest in waiting:
+                file_info = (await waiting[digest]).with_path(file_path)
+                contents.record_hit()
+            if file_info is not None:
+                if cache is not None:
+                    cache.store(file_info)
+                await publish(index, file_info)
+                return
+            waiting[digest] = loop.create_future()
+            await queue.put((index, file_path, data, digest, start))
+        
+        async def reader():
+            tasks = set()
+            for index, file_path in enumerate(python_files):
+                await window.acquire()
+                task = asyncio.ensure_future(read(index, file_path))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        
+        async def parser():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                index, file_path, data, digest, start = item
+                try:
+                    if threaded:
+                        file_info = await loop.run_in_executor(parse_pool, analyze_bytes, data,
+                                                               file_path, digest)
+                    else:
+                        file_info, snapshot = await loop.run_in_executor(
+                            parse_pool, _analyze_blob, file_path, data, digest)
+                        if snapshot is not None and _profiler is not None:
+                            _profiler.merge(snapshot)
+                except ParseTimeout as e:
+                    file_info = guard_fallback(data, file_path, str(e), digest)
+                except Exception as e:
+                    file_info = FileInfo(file_path, error=f"Erro ao analisar arquivo: {str(e)}")
+                if _profiler is not None:
+                    _profiler.record_file(file_path, time.perf_counter() - start, len(data))
+                if cache is not None:
+                    cache.store(file_info)
+                contents.put(file_info)
+                waiting.pop(digest).set_result(file_info)
+                await publish(index, file_info)
+        
+        producer = asyncio.ensure_future(reader())
+        parsers = [asyncio.ensure_future(parser()) for _ in range(1 if threaded else jobs)]
+        try:
+            for index in range(len(python_files)):
+                async with ready:
+                    await ready.wait_for(lambda: index in results)
+                    file_info = results.pop(index)
+                consume(index, file_info)
+                window.release()
+            await producer
+        finally:
+            for _ in parsers:
+                await queue.put(None)
+            await asyncio.gather(*parsers, return_exceptions=True)
+            producer.cancel()
+
+def _fallback_item(file_path, data, digest, reason):
+    """Resumo por regex de um item de lote (bytes ou caminho de um arquivo mapeado)"""
+    if not isinstance(data, str):
+        return guard_fallback(data, file_path, reason, digest)
+    try:
+        data = read_source(data)
+    except OSError as e:
+        return FileInfo(file_path, error=f"Erro ao analisar arquivo: {str(e)}")
+    try:
+        return guard_fallback(data, file_path, reason)
+    finally:
+        _close_source(data)
+
+def _chunk_results(future, items):
+    """Obtém os resultados de um lote ((caminho, bytes, hash)), convertendo falhas em erros por arquivo
+    
+    Um lote que passou do tempo máximo (ParseTimeout) recebe o resumo por
+    regex no lugar da análise completa.
+    """
+    try:
+        results, snapshot = future.result()
+    except ParseTimeout as e:
+        return [_fallback_item(file_path, data, digest, str(e)) for file_path, data, digest in items]
+    except Exception as e:
+        # Falha do processo inteiro (ex.: worker encerrado): reportar por arquivo
+        return [FileInfo(file_path, error=f"Erro ao analisar arquivo: {str(e)}")
+                for file_path, _, _ in items]
+    if snapshot is not None and _profiler is not None:
+        _profiler.merge(snapshot)
+    return results
+
+def infer_file_purpose(file_info):
+    """Infere o propósito de um arquivo com base em seu conteúdo"""
+    # Se houver erro de análise, informar
+    if file_info.error is not None:
+        return f"Arquivo com erro de análise: {file_info.error}"
+    
+    # Verificar docstring do arquivo
+    if file_info.docstring:
+        return file_info.summary
+    
+    # Verificar padrões no nome do arquivo
+    filename = os.path.basename(file_info.path)
+    if filename == "__init__.py":
+        return "Arquivo de inicialização de pacote Python"
+    elif filename == "setup.py":
+        return "Script de configuração e instalação do pacote"
+    elif "test" in filename.lower():
+        return "Arquivo de teste"
+    elif "config" in filename.lower():
+        return "Arquivo de configuração"
+    elif "util" in filename.lower():
+        return "Utilitários e funções auxiliares"
+    elif "model" in filename.lower():
+        return "Definição de modelos de dados"
+    elif "view" in filename.lower():
+        return "Componente de visualização/interface"
+    elif "controller" in filename.lower():
+        return "Controlador para lógica de negócios"
+    
+    # Inferir pelo conteúdo
+    classes = [c.name for c in file_info.classes]
+    functions = [f.name for f in file_info.functions]
+    
+    # Verificar padrões específicos
+    if classes:
+        class_pattern = ", ".join(classes[:3])
+        if len(classes) > 3:
+            class_pattern += "..."
+        purpose = f"Define classes: {class_pattern}"
+    elif functions:
+        func_pattern = ", ".join(functions[:3])
+        if len(functions) > 3:
+            func_pattern += "..."
+        purpose = f"Implementa funções: {func_pattern}"
+    elif file_info.main_block:
+        purpose = "Script executável com ponto de entrada principal"
+    else:
+        purpose = "Arquivo Python auxiliar"
+    
+    # Adicionar contexto com base nas importações
+    if file_info.imports.third_party:
+        key_libs = []
+        for lib in file_info.imports.third_party:
+            if '.' in lib:
+                key_libs.append(lib.split('.')[0])
+            else:
+                key_libs.append(lib)
+                
+        if "flask" in key_libs or "django" in key_libs:
+            purpose += " (componente web)"
+        elif "pandas" in key_libs or "numpy" in key_libs:
+            purpose += " (processamento de dados)"
+        elif "sqlite" in key_libs or "sqlalchemy" in key_libs:
+            purpose += " (acesso a banco de dados)"
+    
+    return purpose
+
+def identify_entry_points(files_info):
+    """Identifica possíveis pontos de entrada do projeto"""
+    entry_points = []
+    
+    for file_info in files_info:
+        # Verificar arquivos que têm bloco main
+        if file_info.main_block:
+            entry_points.append({
+                "path": file_info.path,
+                "type": "Script executável"
+            })
+        
+        # Verificar setup.py
+        if os.path.basename(file_info.path) == "setup.py":
+            entry_points.append({
+                "path": file_info.path,
+                "type": "Instalação do pacote"
+            })
+        
+        # Verificar scripts/cli/app no nome
+        filename = os.path.basename(file_info.path)
+        if any(pattern in filename.lower() for pattern in ["app.py", "cli.py", "main.py", "run.py", "server.py"]):
+            entry_points.append({
+                "path": file_info.path,
+                "type": "Aplicação principal"
+            })
+    
+    return entry_points
+
+# Diretórios-raiz de código (layout src/): os módulos abaixo deles também são
+# importáveis sem o prefixo
+SOURCE_ROOTS = ("src",)
+
+def module_name_for_path(file_path):
+    """Converte um caminho relativo (pkg/mod.py, pkg/__init__.py) no nome pontuado do módulo"""
+    parts = file_path.replace(os.sep, "/")[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+def build_module_index(file_paths):
+    """Monta o índice nome pontuado do módulo → caminho do arquivo
+    
+    Pacotes (__init__.py) têm precedência sobre módulos homônimos, como no
+    Python. Arquivos sob uma raiz de código (src/) são registrados com e sem
+    o prefixo; o nome completo vence em caso de conflito.
+    """
+    index = {}
+    aliases = {}
+    for file_path in file_paths:
+        name = module_name_for_path(file_path)
+        if not name:
+            continue
+        is_package = file_path.endswith("__init__.py")
+        if name not in index or is_package:
+            index[name] = file_path
+        root, _, rest = name.partition(".")
+        if root in SOURCE_ROOTS and rest and (rest not in aliases or is_package):
+            aliases[rest] = file_path
+    for name, file_path in aliases.items():
+        index.setdefault(name, file_path)
+    return index
+
+def absolute_import_name(name, file_path):
+    """Converte uma importação relativa ("..util.f") no nome absoluto, a partir do arquivo importador
+    
+    Nomes absolutos são devolvidos sem alteração; relativas que sobem além
+    da raiz do projeto resultam em None.
+    """
+    if not name.startswith("."):
+        return name
+    level = len(name) - len(name.lstrip("."))
+    package = module_name_for_path(file_path).split(".") if file_path else []
+    if not file_path.endswith("__init__.py"):
+        package = package[:-1]
+    if level - 1 > len(package):
+        return None
+    base = package[:len(package) - (level - 1)]
+    rest = name[level:]
+    return ".".join(base + ([rest] if rest else [])) or None
+
+def resolve_import(name, file_path, module_index):
+    """Resolve uma importação do projeto para o caminho do arquivo importado (ou None)
+    
+    Importações relativas são resolvidas a partir do pacote do arquivo
+    importador. O nome mais longo presente no índice vence, então
+    "pkg.mod.func" aponta para pkg/mod.py e não para pkg/__init__.py.
+    """
+    name = absolute_import_name(name, file_path)
+    while name:
+        target = module_index.get(name)
+        if target is not None:
+            return target
+        name = name.rpartition(".")[0]
+    return None
+
+def build_import_graph(files_info, module_index=None):
+    """Monta a lista de adjacência arquivo → arquivos do projeto que ele importa
+    
+    Cada importação custa O(profundidade do nome) consultas em dicionário,
+    então a construção é linear no número de importações. As arestas não
+    têm duplicados nem laços.
+    """
+    if module_index is None:
+        module_index = build_module_index([f.path for f in files_info])
+    
+    return {file_info.path: resolve_file_edges(file_info, module_index)
+            for file_info in files_info}
+
+def resolve_file_edges(file_info, module_index):
+    """Arquivos do projeto importados por um arquivo (ordenados, sem o próprio arquivo)"""
+    file_path = file_info.path
+    targets = set()
+    for imp in file_info.imports.project:
+        target = resolve_import(imp, file_path, module_index)
+        if target is not None and target != file_path:
+            targets.add(target)
+    return sorted(targets)
+
+def map_import_relationships(files_info, module_index=None):
+    """Mapeia as relações de importação entre os arquivos do projeto"""
+    return relationships_from_graph(build_import_graph(files_info, module_index))
+
+def relationships_from_graph(graph):
+    """Converte a lista de adjacência em {arquivo: {"imports", "imported_by"}}"""
+    relationships = {file_path: {"imports": targets, "imported_by": []}
+                     for file_path, targets in graph.items()}
+    
+    # Calcular "imported_by" (os arquivos chegam em ordem, então as listas saem ordenadas)
+    for file_path, targets in graph.items():
+        for imported in targets:
+            if imported in relationships:
+                relationships[imported]["imported_by"].append(file_path)
+    
+    return relationships
+
+def strongly_connected_components(graph):
+    """Calcula os componentes fortemente conexos com o algoritmo de Tarjan iterativo
+    
+    Usa uma pilha explícita em vez de recursão, então não há limite de
+    profundidade. Os componentes saem em ordem topológica reversa (um
+    componente sempre aparece depois de todos os que ele alcança).
+    """
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+    
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph.get(root, ())))]
+        
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(graph.get(child, ()))))
+                    break
+                if child in on_stack and index[child] < low[node]:
+                    low[node] = index[child]
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[node] < low[parent]:
+                        low[parent] = low[node]
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    
+    return components
+
+def _popcount(mask):
+    """Conta os bits ligados de um inteiro"""
+    if hasattr(mask, "bit_count"):  # Python 3.10+
+        return mask.bit_count()
+    return bin(mask).count("1")
+
+def analyze_import_graph(graph):
+    """Calcula ciclos, camadas e alcance direto/transitivo do grafo de importações
+    
+    `graph` é a lista de adjacência de build_import_graph (arquivo → arquivos
+    importados). Tudo é calculado sobre o grafo de componentes (DAG): SCCs,
+    graus e camadas em tempo linear (V + E). O alcance transitivo exato não é
+    linear: usa conjuntos de bits (inteiros do Python), com O(V·E/64)
+    operações de palavra no pior caso, e só mantém em memória as máscaras
+    ainda não consumidas por todos os vizinhos, o que no pior caso (muitos
+    componentes esperando ao mesmo tempo) ainda é O(V²) bits.
+    """
+    nodes = list(graph)
+    for targets in graph.values():
+        for target in targets:
+            if target not in graph:
+                nodes.append(target)
+    nodes = list(dict.fromkeys(nodes))
+    
+    components = strongly_connected_components(graph)
+    component_of = {}
+    for c, members in enumerate(components):
+        for member in members:
+            component_of[member] = c
+    for node in nodes:
+        if node not in component_of:
+            component_of[node] = len(components)
+            components.append([node])
+    
+    successors = [set() for _ in components]
+    predecessors = [set() for _ in components]
+    fan_in = dict.fromkeys(nodes, 0)
+    for source, targets in graph.items():
+        for target in targets:
+            fan_in[target] += 1
+            cs, ct = component_of[source], component_of[target]
+            if cs != ct:
+                successors[cs].add(ct)
+                predecessors[ct].add(cs)
+    
+    # Cada componente ocupa uma faixa contígua de bits: sua máscara é um único deslocamento
+    own_mask = []
+    position = 0
+    for members in components:
+        own_mask.append(((1 << len(members)) - 1) << position)
+        position += len(members)
+    
+    # Os componentes de Tarjan já estão em ordem topológica reversa (dependências primeiro).
+    # Cada máscara é contada assim que fica pronta e liberada quando o último componente
+    # que a usa a consome, de modo que só a "fronteira" do percurso fica em memória
+    layer = [0] * len(components)
+    reach_out = [0] * len(components)
+    masks = [None] * len(components)
+    users = [len(preds) for preds in predecessors]
+    for c in range(len(components)):
+        mask = own_mask[c]
+        for succ in successors[c]:
+            mask |= masks[succ]
+            users[succ] -= 1
+            if not users[succ]:
+                masks[succ] = None
+            if layer[succ] + 1 > layer[c]:
+                layer[c] = layer[succ] + 1
+        # Contagens por componente (descontando o próprio arquivo)
+        reach_out[c] = _popcount(mask) - 1
+        if users[c]:
+            masks[c] = mask
+    
+    reach_in = [0] * len(components)
+    users = [len(succs) for succs in successors]
+    for c in range(len(components) - 1, -1, -1):
+        mask = own_mask[c]
+        for pred in predecessors[c]:
+            mask |= masks[pred]
+            users[pred] -= 1
+            if not users[pred]:
+                masks[pred] = None
+        reach_in[c] = _popcount(mask) - 1
+        if users[c]:
+            masks[c] = mask
+    
+    metrics = {}
+    for node in nodes:
+        c = component_of[node]
+        metrics[node] = {
+            "fan_in": fan_in[node],
+            "fan_out": len(graph.get(node, ())),
+            "transitive_fan_in": reach_in[c],
+            "transitive_fan_out": reach_out[c],
+            "layer": layer[c]
+        }
+    
+    cycles = [sorted(members) for members in components if len(members) > 1]
+    cycles.sort(key=lambda members: (-len(members), members))
+    layers = [[] for _ in range(max(layer) + 1 if layer else 0)]
+    for node in sorted(nodes):
+        layers[metrics[node]["layer"]].append(node)
+    
+    return {
+        "components": len(components),
+        "cycles": cycles,
+        "layers": layers,
+        "metrics": metrics
+    }
+
+def graph_stats_for(writers, relationships):
+    """Estatísticas do grafo de importações, calculadas só se algum writer as usa"""
+    if not any(writer.needs_graph() for writer in writers):
+        return {"components": 0, "cycles": [], "layers": [], "metrics": {}}
+    return analyze_import_graph(graph_from_relationships(relationships))
+
+def graph_from_relationships(relationships):
+    """Extrai a lista de adjacência (arquivo → importados) do mapa de relacionamentos"""
+    return {path: rel["imports"] for path, rel in relationships.items()}
+
+def render_graph_section(graph_stats, limit=10):
+    """Renderiza a análise do grafo de importações (ciclos, alcance e camadas)"""
+    metrics = graph_stats["metrics"]
+    if not any(m["fan_in"] or m["fan_out"] for m in metrics.values()):
+        return ""
+    parts = ["### Grafo de Importações\n\n"]
+    
+    cycles = graph_stats["cycles"]
+    if cycles:
+        parts.append(f"**Ciclos de importação ({len(cycles)}):**\n\n")
+        for members in cycles[:limit]:
+            shown = ", ".join(members[:8]) + (", ..." if len(members) > 8 else "")
+            parts.append(f"- {len(members)} arquivos: {shown}\n")
+        if len(cycles) > limit:
+            parts.append(f"- ... e mais {len(cycles) - limit} ciclos\n")
+        parts.append("\n")
+    else:
+        parts.append("Nenhum ciclo de importação encontrado.\n\n")
+    
+    ranking = sorted(metrics.items(), key=lambda item: (-item[1]["transitive_fan_in"], item[0]))
+    ranking = [(path, m) for path, m in ranking[:limit] if m["transitive_fan_in"] > 0]
+    if ranking:
+        parts.append("**Maior alcance transitivo (arquivos que dependem, direta ou indiretamente):**\n\n")
+        for path, m in ranking:
+            parts.append(f"- **{path}** - {m['transitive_fan_in']} dependentes "
+                         f"({m['fan_in']} diretos)\n")
+        parts.append("\n")
+    
+    ranking = sorted(metrics.items(), key=lambda item: (-item[1]["fan_out"], item[0]))
+    ranking = [(path, m) for path, m in ranking[:limit] if m["fan_out"] > 0]
+    if ranking:
+        parts.append("**Maior acoplamento (arquivos do projeto importados):**\n\n")
+        for path, m in ranking:
+            parts.append(f"- **{path}** - importa {m['fan_out']} arquivos "
+                         f"({m['transitive_fan_out']} no total, transitivamente)\n")
+        parts.append("\n")
+    
+    layers = graph_stats["layers"]
+    if len(layers) > 1:
+        parts.append("**Camadas de dependência** (camada 0 não importa outros arquivos do projeto):\n\n")
+        for number, members in enumerate(layers):
+            shown = ", ".join(members[:5]) + (", ..." if len(members) > 5 else "")
+            parts.append(f"- Camada {number} ({len(members)} arquivos): {shown}\n")
+        parts.append("\n")
+    
+    return "".join(parts)
+
+# Descrição dos status de arquivos em análises delta
+CHANGE_STATUS_LABELS = {"A": "Adicionado", "M": "Modificado", "D": "Removido"}
+
+def render_scope_section(scope):
+    """Renderiza o escopo de uma análise parcial (arquivos alterados e relacionados)"""
+    parts = ["## Escopo da Análise (Delta)\n\n"]
+    parts.append(f"**Base:** `{scope['base']}` → **Alvo:** `{scope['head']}`\n\n")
+    
+    changes = scope.get("changes", {})
+    parts.append(f"**Arquivos alterados ({len(changes)}):**\n\n")
+    for path, status in sorted(changes.items()):
+        parts.append(f"- `{path}` - {CHANGE_STATUS_LABELS.get(status, status)}\n")
+    parts.append("\n")
+    
+    importers = scope.get("importers", [])
+    importees = scope.get("importees", [])
+    if importers or importees:
+        parts.append(f"**Arquivos relacionados incluídos ({len(importers) + len(importees)}):**\n\n")
+        for path in importers:
+            parts.append(f"- `{path}` - importa arquivo alterado\n")
+        for path in importees:
+            parts.append(f"- `{path}` - importado por arquivo alterado\n")
+        parts.append("\n")
+    
+    return "".join(parts)
+
+def _capped(items, limit):
+    """Divide uma sequência nos itens exibidos e na quantidade omitida pelo limite (None = todos)"""
+    if limit is None or len(items) <= limit:
+        return items, 0
+    return items[:limit], len(items) - limit
+
+def render_file_section(file_info, purpose=None, limit=None):
+    """Renderiza a seção de detalhes de um arquivo (sem os blocos de relacionamento)
+    
+    `limit` é o máximo de itens por lista (comentários, classes, métodos,
+    funções, importações e linhas do bloco principal); o restante vira uma
+    linha "... e mais N".
+    """
+    parts = [f"### 📄 {file_info.path}\n\n"]
+    
+    # Verificar erro
+    if file_info.error is not None:
+        parts.append(f"**⚠️ Erro:** {file_info.error}\n\n")
+        return "".join(parts)
+    
+    # Propósito
+    if purpose is None:
+        purpose = file_info.purpose
+    parts.append(f"**Propósito:** {purpose}\n\n")
+    
+    if file_info.partial:
+        parts.append(f"**ℹ️ Análise parcial:** {file_info.partial}\n\n")
+    
+    # Docstring
+    if file_info.docstring:
+        parts.append("**Descrição:**\n")
+        parts.append(f"```\n{file_info.docstring}\n```\n\n")
+    
+    # Comentários relevantes
+    if file_info.comments:
+        parts.append("**Comentários Importantes:**\n")
+        comments, omitted = _capped(file_info.comments, limit)
+        for comment in comments:
+            parts.append(f"- {comment}\n")
+        if omitted:
+            parts.append(f"- ... e mais {omitted} comentários\n")
+        parts.append("\n")
+    
+    # Classes
+    if file_info.classes:
+        parts.append("**Classes:**\n\n")
+        classes, omitted_classes = _capped(file_info.classes, limit)
+        for cls in classes:
+            parts.append(f"- **{cls.name}**\n")
+            if cls.docstring:
+                # Pegar apenas a primeira linha da docstring para manter o relatório conciso
+                parts.append(f"  - Descrição: {cls.summary}\n")
+            
+            if cls.methods:
+                parts.append("  - Métodos:\n")
+                methods, omitted = _capped(cls.methods, limit)
+                for method in methods:
+                    parts.append(f"    - `{method.name}()`")
+                    if method.docstring:
+                        parts.append(f": {method.summary}")
+                    parts.append("\n")
+                if omitted:
+                    parts.append(f"    - ... e mais {omitted} métodos\n")
+        if omitted_classes:
+            parts.append(f"- ... e mais {omitted_classes} classes\n")
+        parts.append("\n")
+    
+    # Funções
+    if file_info.functions:
+        parts.append("**Funções:**\n\n")
+        functions, omitted = _capped(file_info.functions, limit)
+        for func in functions:
+            parts.append(f"- **{func.name}()**")
+            if func.docstring:
+                parts.append(f": {func.summary}")
+            parts.append("\n")
+        if omitted:
+            parts.append(f"- ... e mais {omitted} funções\n")
+        parts.append("\n")
+    
+    # Importações
+    imports = file_info.imports
+    if imports:
+        parts.append("**Importações:**\n\n")
+        
+        if imports.project:
+            parts.append("- **Do projeto:**\n")
+            shown, omitted = _capped(imports.project, limit)
+            for imp in shown:
+                parts.append(f"  - {imp}\n")
+            if omitted:
+                parts.append(f"  - ... e mais {omitted} importações\n")
+        
+        if imports.third_party:
+            parts.append("- **Bibliotecas externas:**\n")
+            shown, omitted = _capped(imports.third_party, limit)
+            for imp in shown:
+                parts.append(f"  - {imp}\n")
+            if omitted:
+                parts.append(f"  - ... e mais {omitted} importações\n")
+        
+        if imports.standard_lib:
+            parts.append("- **Biblioteca padrão:**\n")
+            # Limitar para economia de espaço
+            shown, omitted = _capped(imports.standard_lib, min(5, limit or 5))
+            for imp in shown:
+                parts.append(f"  - {imp}\n")
+            if omitted:
+                parts.append(f"  - ... e mais {omitted} importações\n")
+        parts.append("\n")
+    
+    # Bloco Main
+    if file_info.main_block:
+        parts.append("**Bloco Principal:**\n")
+        parts.append("```python\n")
+        parts.append("if __name__ == \"__main__\":\n")
+        lines, omitted = _capped(file_info.main_block, limit)
+        for line in lines:
+            parts.append(f"    {line}\n")
+        if omitted:
+            parts.append(f"    # ... e mais {omitted} linhas\n")
+        parts.append("```\n\n")
+    
+    return "".join(parts)
+
+def render_relationship_block(rel, limit=None):
+    """Renderiza os blocos 'Importa arquivos' e 'Importado por' de um arquivo"""
+    if not rel:
+        return ""
+    parts = []
+    
+    if rel["imports"]:
+        parts.append("**Importa arquivos:**\n")
+        shown, omitted = _capped(rel["imports"], limit)
+        for imp in shown:
+            parts.append(f"- {imp}\n")
+        if omitted:
+            parts.append(f"- ... e mais {omitted} arquivos\n")
+        parts.append("\n")
+    
+    if rel["imported_by"]:
+        parts.append("**Importado por:**\n")
+        shown, omitted = _capped(rel["imported_by"], limit)
+        for imp in shown:
+            parts.append(f"- {imp}\n")
+        if omitted:
+            parts.append(f"- ... e mais {omitted} arquivos\n")
+        parts.append("\n")
+    
+    return "".join(parts)
+
+# Seções do relatório Markdown, na ordem em que aparecem (--sections)
+MARKDOWN_SECTIONS = ("scope", "errors", "dependencies", "entry-points", "structure", "duplicates",
+                     "files", "overview", "graph", "profile", "conclusion")
+
+class RenderOptions:
+    """Seções e limites do relatório Markdown
+    
+    `section_limit` é o máximo de itens por seção global (erros, dependências,
+    pontos de entrada, arquivos da estrutura, grupos de duplicados e arquivos
+    detalhados),
+    `file_limit` o máximo de itens por lista dentro de um arquivo e
+    `split_size` o tamanho (bytes) de cada parte dos detalhes quando eles vão
+    para arquivos separados. Zero ou None = sem limite.
+    """
+    
+    __slots__ = ("sections", "section_limit", "file_limit", "split_size")
+    
+    def __init__(self, sections=None, section_limit=None, file_limit=None, split_size=None):
+        self.sections = frozenset(sections or MARKDOWN_SECTIONS)
+        self.section_limit = section_limit or None
+        self.file_limit = file_limit or None
+        self.split_size = split_size or None
+    
+    def wants(self, *names):
+        """Indica se alguma das seções foi pedida"""
+        return any(name in self.sections for name in names)
+
+# Opções de renderização da execução atual
+_render_options = RenderOptions()
+
+def get_render_options():
+    """Retorna as opções de renderização do relatório Markdown"""
+    return _render_options
+
+def set_render_options(options):
+    """Define as opções de renderização (None volta ao padrão: tudo, sem limites)"""
+    global _render_options
+    _render_options = options or RenderOptions()
+
+def parse_sections(value):
+    """Interpreta a lista de seções separadas por vírgula de --sections ("all" = todas)"""
+    sections = []
+    for name in value.split(","):
+        name = name.strip().lower()
+        if name == "all":
+            sections.extend(MARKDOWN_SECTIONS)
+        elif name not in MARKDOWN_SECTIONS:
+            raise argparse.ArgumentTypeError(
+                f"seção inválida: '{name}' (opções: all, {', '.join(MARKDOWN_SECTIONS)})")
+        else:
+            sections.append(name)
+    return sections
+
+class BufferedOutput:
+    """Arquivo de saída UTF-8 gravado em blocos grandes
+    
+    Os trechos de texto são acumulados e gravados juntos quando passam de
+    `buffer_size`, em vez de uma chamada de write (e uma codificação) por
+    linha; trechos já codificados (o corpo temporário) são copiados direto.
+    """
+    
+    def __init__(self, path, buffer_size=1 << 20):
+        self.path = path
+        self.buffer_size = buffer_size
+        self._file = open(path, 'wb')
+        self._parts = []
+        self._pending = 0
+        self._written = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def write(self, text):
+        self._parts.append(text)
+        self._pending += len(text)
+        if self._pending >= self.buffer_size:
+            self.flush()
+    
+    def flush(self):
+        if self._parts:
+            data = "".join(self._parts).encode("utf-8")
+            self._file.write(data)
+            self._written += len(data)
+            self._parts = []
+            self._pending = 0
+    
+    def copy_from(self, source, size):
+        """Copia `size` bytes (ou até o fim, se None) de um arquivo binário"""
+        self.flush()
+        self._written += _copy_bytes(source, self._file, size)
+    
+    def tell(self):
+        """Tamanho aproximado já escrito (bytes gravados + caracteres pendentes)"""
+        return self._written + self._pending
+    
+    def close(self):
+        self.flush()
+        self._file.close()
+
+class ReportWriter(ABC):
+    """Base dos formatos de saída: nome do arquivo e agregados comuns
+    
+    Subclasses implementam write_file (chamado para cada file_info, na ordem)
+    e write_summary (chamado uma vez com o mapa de relacionamentos).
+    """
+    
+    extension = None
+    
+    def __init__(self, project_path, req_info=None, report_file=None, timestamp=None, scope=None):
+        self.project_path = project_path
+        self.req_info = req_info
+        # Escopo de uma análise parcial (ex.: delta entre revisões), ou None
+        self.scope = scope
+        self.project_name = os.path.basename(os.path.abspath(project_path))
+        if not report_file:
+            timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+            report_file = f"codescope_{self.project_name}_{timestamp}.{self.extension}"
+        self.report_file = report_file
+        
+        # Agregados usados pelas seções globais
+        self.total = 0
+        self.errors = []
+        # Arquivos apenas resumidos por atingirem um limite (tamanho, tempo, nós ou recursão)
+        self.partials = []
+        self.entry_points = []
+        self.graph_nodes = []
+        # Hash do conteúdo → primeiro caminho, e grupos de arquivos com o mesmo conteúdo
+        self._first_paths = {}
+        self.duplicates = {}
+        # Perfil de execução incluído no relatório (--profile), ou None
+        self.profile = None
+    
+    def add(self, file_info):
+        """Processa um FileInfo assim que ele é analisado"""
+        path = file_info.path
+        self.total += 1
+        if file_info.sha is not None:
+            first = self._first_paths.setdefault(file_info.sha, path)
+            if first != path:
+                self.duplicates.setdefault(file_info.sha, [first]).append(path)
+        if file_info.error is not None:
+            self.errors.append((path, file_info.error or "Erro desconhecido"))
+        elif file_info.partial:
+            self.partials.append((path, file_info.partial))
+        self.entry_points.extend(identify_entry_points([file_info]))
+        # Para o grafo bastam o caminho e as importações do projeto
+        self.graph_nodes.append(FileInfo(path, imports=ImportSet(project=file_info.imports.project)))
+        self.write_file(file_info)
+    
+    def duplicate_groups(self):
+        """Grupos de arquivos com conteúdo idêntico: [(hash, caminhos)], maiores primeiro"""
+        return sorted(self.duplicates.items(), key=lambda item: (-len(item[1]), item[1][0]))
+    
+    def finish(self, relationships=None, graph_stats=None):
+        """Conclui a saída e retorna o nome do arquivo gerado"""
+        if relationships is None:
+            relationships = map_import_relationships(self.graph_nodes)
+        if graph_stats is None:
+            graph_stats = graph_stats_for([self], relationships)
+        self.write_summary(relationships, graph_stats)
+        return self.report_file
+    
+    def needs_graph(self):
+        """Indica se write_summary usa as estatísticas do grafo de importações"""
+        return True
+    
+    @abstractmethod
+    def write_file(self, file_info):
+        """Grava a saída de um arquivo"""
+    
+    @abstractmethod
+    def write_summary(self, relationships, graph_stats):
+        """Grava as seções globais e fecha a saída"""
+
+class MarkdownReportWriter(ReportWriter):
+    """Gera o relatório Markdown de forma incremental
+    
+    Cada seção de arquivo é renderizada assim que o file_info chega e vai
+    direto para um arquivo temporário; em memória ficam apenas agregados
+    pequenos (erros, pontos de entrada, propósito por diretório e importações
+    do projeto). As seções globais e os blocos de relacionamento, que dependem
+    de todos os arquivos, são encaixados no final por finish(). Seções não
+    pedidas em RenderOptions não são calculadas nem renderizadas.
+    """
+    
+    extension = "md"
+    
+    def __init__(self, project_path, req_info=None, report_file=None, timestamp=None,
+                 scope=None, section_cache=None, options=None):
+        super().__init__(project_path, req_info, report_file, timestamp, scope)
+        self.options = options or get_render_options()
+        self.dir_structure = {}
+        self.directories = set()
+        # Seções já renderizadas, por caminho: (propósito, texto); usado no modo --watch
+        self.section_cache = section_cache
+        self._body = tempfile.TemporaryFile() if self.options.wants("files") else None
+        # Seções no corpo: (início, posição do bloco de relacionamento ou None, caminho)
+        self._sections = []
+        self.omitted_sections = 0
+    
+    def needs_graph(self):
+        """O grafo só aparece na seção graph do relatório"""
+        return self.options.wants("graph")
+    
+    def write_file(self, file_info):
+        """Renderiza a seção de um arquivo e atualiza a estrutura de diretórios"""
+        path = file_info.path
+        directory = os.path.dirname(path)
+        self.directories.add(directory)
+        options = self.options
+        
+        if options.wants("structure"):
+            self.dir_structure.setdefault(directory, []).append(
+                (os.path.basename(path), file_info.purpose))
+        
+        if self._body is None:
+            return
+        if options.section_limit and len(self._sections) >= options.section_limit:
+            self.omitted_sections += 1
+            return
+        cached = self.section_cache.get(path) if self.section_cache is not None else None
+        if cached is None:
+            purpose = file_info.purpose
+            cached = (purpose, render_file_section(file_info, purpose, options.file_limit))
+            if self.section_cache is not None:
+                self.section_cache[path] = cached
+        section = cached[1]
+        
+        start = self._body.tell()
+        self._body.write(section.encode("utf-8"))
+        if file_info.error is None:
+            self._sections.append((start, self._body.tell(), path))
+            self._body.write(b"---\n\n")
+        else:
+            self._sections.append((start, None, path))
+    
+    def write_summary(self, relationships, graph_stats):
+        """Escreve o relatório final, encaixando as seções já renderizadas"""
+        options = self.options
+        wants = options.wants
+        limit = options.section_limit
+        # Valores derivados calculados uma única vez por execução
+        categories = (categorize_dependencies(self.req_info)
+                      if self.req_info and wants("dependencies", "conclusion") else {})
+        
+        with BufferedOutput(self.report_file) as f:
+            # Cabeçalho
+            f.write(f"# Relatório de Análise do Projeto: {self.project_name}\n\n")
+            f.write(f"*Gerado por CodeScope 360 em {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}*\n\n")
+            f.write(f"**Caminho do projeto:** `{os.path.abspath(self.project_path)}`\n")
+            f.write(f"**Total de arquivos Python:** {self.total}\n\n")
+            
+            if self.scope and wants("scope"):
+                f.write(render_scope_section(self.scope))
+            
+            # Aviso de erros, se houver
+            if (self.errors or self.partials) and wants("errors"):
+                f.write("⚠️ **Atenção**: Encontramos problemas ao analisar alguns arquivos:\n\n")
+                flagged = self.errors + [(path, f"Análise parcial: {partial}")
+                                         for path, partial in self.partials]
+                errors, omitted = _capped(flagged, limit)
+                for path, error in errors:
+                    f.write(f"- `{path}`: {error}\n")
+                if omitted:
+                    f.write(f"- ... e mais {omitted} arquivos com erro\n")
+                f.write("\n")
+            
+            # Dependências
+            if self.req_info and wants("dependencies"):
+                f.write("## Dependências do Projeto\n\n")
+                
+                # Categorias de dependências
+                if categories:
+                    f.write("### Categorias de dependências\n\n")
+                    for category, deps in categories.items():
+                        f.write(f"- **{category}**: {', '.join(deps)}\n")
+                    f.write("\n")
+                
+                f.write("### Lista de dependências\n\n")
+                deps, omitted = _capped(self.req_info, limit)
+                for dep in deps:
+                    f.write(f"- {dep}\n")
+                if omitted:
+                    f.write(f"- ... e mais {omitted} dependências\n")
+                f.write("\n")
+            
+            # Pontos de entrada
+            if self.entry_points and wants("entry-points"):
+                f.write("## Pontos de Entrada do Projeto\n\n")
+                entry_points, omitted = _capped(self.entry_points, limit)
+                for ep in entry_points:
+                    f.write(f"- **{ep['path']}** - {ep['type']}\n")
+                if omitted:
+                    f.write(f"- ... e mais {omitted} pontos de entrada\n")
+                f.write("\n")
+            
+            if wants("structure"):
+                self._write_structure(f)
+            
+            if self.duplicates and wants("duplicates"):
+                self._write_duplicates(f)
+            
+            # Detalhes de cada arquivo, copiados do corpo temporário
+            if self._body is not None:
+                f.write("## Detalhes dos Arquivos\n\n")
+                self._write_details(f, relationships)
+            
+            if wants("overview", "graph") or (self.profile is not None and wants("profile")):
+                # Visão geral do projeto
+                f.write("## Visão Geral do Projeto\n\n")
+            
+            if wants("overview"):
+                # Arquivos mais importados (nós centrais)
+                central_files = []
+                for file_path, rel in relationships.items():
+                    if len(rel["imported_by"]) > 1:
+                        central_files.append({
+                            "path": file_path,
+                            "importers": len(rel["imported_by"])
+                        })
+                
+                central_files.sort(key=lambda x: x["importers"], reverse=True)
+                
+                if central_files:
+                    f.write("### Arquivos Centrais\n\n")
+                    f.write("Estes arquivos são importados por vários outros, indicando que são componentes centrais:\n\n")
+                    
+                    for cf in central_files[:5]:  # Top 5
+                        f.write(f"- **{cf['path']}** - Importado por {cf['importers']} arquivos\n")
+                    f.write("\n")
+            
+            # Ciclos, alcance transitivo e camadas
+            if wants("graph"):
+                f.write(render_graph_section(graph_stats))
+            
+            if self.profile is not None and wants("profile"):
+                f.write(self.profile.render_markdown())
+            
+            if wants("conclusion"):
+                self._write_conclusion(f, categories)
+        
+        if self._body is not None:
+            self._body.close()
+    
+    def _write_structure(self, f):
+        """Seção com os arquivos de cada diretório e seus propósitos"""
+        f.write("## Estrutura do Projeto\n\n")
+        
+        # Listar diretórios e arquivos
+        remaining = self.options.section_limit
+        omitted = 0
+        for directory in sorted(self.dir_structure.keys()):
+            files = self.dir_structure[directory]
+            if remaining is not None and remaining <= 0:
+                omitted += len(files)
+                continue
+            if directory:
+                f.write(f"### 📁 {directory}\n\n")
+            else:
+                f.write("### 📁 Diretório Raiz\n\n")
+            
+            shown, rest = _capped(files, remaining)
+            for basename, purpose in shown:
+                f.write(f"- **{basename}** - {purpose}\n")
+            if remaining is not None:
+                remaining -= len(shown)
+                omitted += rest
+            f.write("\n")
+        if omitted:
+            f.write(f"*... e mais {omitted} arquivos não listados (limite por seção)*\n\n")
+    
+    def _write_duplicates(self, f):
+        """Seção com os grupos de arquivos de conteúdo idêntico (analisados uma única vez)"""
+        f.write("## Arquivos Duplicados\n\n")
+        f.write("Estes arquivos têm conteúdo idêntico; cada conteúdo foi analisado uma única vez:\n\n")
+        
+        # Arquivos vazios (ex.: __init__.py) em uma única linha, no fim
+        empty = self.duplicates.get(EMPTY_DIGEST)
+        groups = [(sha, paths) for sha, paths in self.duplicate_groups() if sha != EMPTY_DIGEST]
+        shown, omitted = _capped(groups, self.options.section_limit)
+        for sha, paths in shown:
+            names, rest = _capped(paths, self.options.file_limit)
+            f.write(f"- **{len(paths)} cópias** (`{sha[:12]}`): "
+                    + ", ".join(f"`{path}`" for path in names)
+                    + (f" e mais {rest}" if rest else "") + "\n")
+        if omitted:
+            f.write(f"- ... e mais {omitted} grupos\n")
+        if empty:
+            names, rest = _capped(empty, self.options.file_limit or 5)
+            f.write(f"- **{len(empty)} arquivos vazios**: "
+                    + ", ".join(f"`{path}`" for path in names)
+                    + (f" e mais {rest}" if rest else "") + "\n")
+        f.write("\n")
+    
+    def _write_details(self, f, relationships):
+        """Copia as seções de arquivos, inserindo os relacionamentos
+        
+        Com RenderOptions.split_size, os detalhes vão para arquivos
+        <relatório>.partN.md de até esse tamanho (sempre em fronteiras de
+        arquivo), e o relatório principal lista as partes.
+        """
+        split_size = self.options.split_size
+        file_limit = self.options.file_limit
+        body = self._body
+        end = body.tell()
+        body.seek(0)
+        
+        out = f
+        parts = []
+        for number, (start, splice, path) in enumerate(self._sections):
+            if split_size and (out is f or out.tell() >= split_size):
+                if out is not f:
+                    out.close()
+                base = os.path.splitext(self.report_file)[0]
+                out = BufferedOutput(f"{base}.part{len(parts) + 1}.{self.extension}")
+                out.write(f"# {self.project_name} - Detalhes dos Arquivos (parte {len(parts) + 1})\n\n")
+                parts.append([out.path, path, path, 0])
+            if parts:
+                parts[-1][2] = path
+                parts[-1][3] += 1
+            
+            next_start = self._sections[number + 1][0] if number + 1 < len(self._sections) else end
+            if splice is None:
+                out.copy_from(body, next_start - start)
+            else:
+                out.copy_from(body, splice - start)
+                out.write(render_relationship_block(relationships.get(path), file_limit))
+                out.copy_from(body, next_start - splice)
+        if out is not f:
+            out.close()
+        
+        for part_path, first, last, count in parts:
+            name = os.path.basename(part_path)
+            f.write(f"- [{name}]({name}) - {count} arquivos: `{first}` … `{last}`\n")
+        if parts:
             f.write("\n")
+        if self.omitted_sections:
+            f.write(f"*... e mais {self.omitted_sections} arquivos não detalhados (limite por seção)*\n\n")
+    
+    def _write_conclusion(self, f, categories):
+        """Conclusão com tipo, tamanho e organização do projeto"""
+        f.write("## Conclusão\n\n")
+        
+        # Framework principal
+        if categories:
+            main_categories = list(categories.keys())
+            if main_categories:
+                f.write(f"Este projeto parece ser um **aplicativo de {', '.join(main_categories)}**. ")
+        
+        # Tamanho do projeto
+        if self.total <= 5:
+            f.write("É um projeto pequeno com poucos arquivos. ")
+        elif self.total <= 15:
+            f.write("É um projeto de tamanho médio. ")
+        else:
+            f.write("É um projeto grande com muitos arquivos e componentes. ")
+        
+        # Organização
+        if len(self.directories) > 3:
+            f.write("O código está organizado em múltiplos diretórios, sugerindo uma boa separação de componentes.")
+        else:
+            f.write("O código está organizado em poucos diretórios.")
+        
+        f.write("\n\n---\n\n")
+        f.write("*Relatório gerado por CodeScope 360 - Análise estruturada de projetos Python*")
+
+def _copy_bytes(source, target, size, block_size=1 << 20):
+    """Copia `size` bytes (ou até o fim, se None) entre arquivos binários em blocos; retorna o total"""
+    copied = 0
+    while size is None or size > 0:
+        data = source.read(block_size if size is None else min(block_size, size))
+        if not data:
+            break
+        target.write(data)
+        copied += len(data)
+        if size is not None:
+            size -= len(data)
+    return copied
+
+def _scan_metadata(writer):
+    """Metadados comuns às saídas legíveis por máquina"""
+    metadata = {
+        "tool": "CodeScope 360",
+        "version": __version__,
+        "project": writer.project_name,
+        "project_path": os.path.abspath(writer.project_path),
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "requirements": writer.req_info or []
+    }
+    if writer.scope:
+        metadata["scope"] = writer.scope
+    return metadata
+
+class JsonReportWriter(ReportWriter):
+    """Gera um único documento JSON com arquivos, relacionamentos e pontos de entrada
+    
+    Os file_info são gravados conforme chegam; apenas o fechamento do
+    documento espera o fim da análise.
+    """
+    
+    extension = "json"
+    
+    def __init__(self, project_path, req_info=None, report_file=None, timestamp=None, scope=None):
+        super().__init__(project_path, req_info, report_file, timestamp, scope)
+        self._file = open(self.report_file, 'w', encoding='utf-8')
+        header = json.dumps(_scan_metadata(self), ensure_ascii=False)
+        self._file.write(header[:-1] + ', "files": [\n')
+    
+    def write_file(self, file_info):
+        if self.total > 1:
+            self._file.write(",\n")
+        self._file.write(json.dumps(file_info.to_dict(), ensure_ascii=False))
+    
+    def write_summary(self, relationships, graph_stats):
+        f = self._file
+        f.write("\n],\n")
+        f.write(f'"total_files": {self.total},\n')
+        f.write(f'"relationships": {json.dumps(relationships, ensure_ascii=False)},\n')
+        f.write(f'"graph": {json.dumps(graph_stats, ensure_ascii=False)},\n')
+        f.write(f'"entry_points": {json.dumps(self.entry_points, ensure_ascii=False)},\n')
+        duplicates = [{"sha": sha, "paths": paths} for sha, paths in self.duplicate_groups()]
+        f.write(f'"duplicates": {json.dumps(duplicates, ensure_ascii=False)}')
+        if self.profile is not None:
+            f.write(f',\n"profile": {json.dumps(self.profile.to_dict(), ensure_ascii=False)}')
+        f.write("\n}\n")
+        f.close()
+
+class JsonlReportWriter(ReportWriter):
+    """Gera JSON Lines: um registro por arquivo, seguido dos registros globais
+    
+    Registros (campo "record"): "scan" (metadados), "file" (um por arquivo),
+    "relationship" (um por arquivo com importações do projeto, com as métricas
+    do grafo), "cycle", "entry_point", "duplicate" (um por grupo de arquivos
+    com conteúdo idêntico) e "summary".
+    """
+    
+    extension = "jsonl"
+    
+    def __init__(self, project_path, req_info=None, report_file=None, timestamp=None, scope=None):
+        super().__init__(project_path, req_info, report_file, timestamp, scope)
+        self._file = open(self.report_file, 'w', encoding='utf-8')
+        self._write({"record": "scan", **_scan_metadata(self)})
+    
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+    
+    def write_file(self, file_info):
+        self._write({"record": "file", **file_info.to_dict()})
+    
+    def write_summary(self, relationships, graph_stats):
+        metrics = graph_stats["metrics"]
+        for path, rel in relationships.items():
+            if rel["imports"] or rel["imported_by"]:
+                self._write({"record": "relationship", "path": path, **rel, **metrics.get(path, {})})
+        for members in graph_stats["cycles"]:
+            self._write({"record": "cycle", "files": members})
+        for ep in self.entry_points:
+            self._write({"record": "entry_point", **ep})
+        for sha, paths in self.duplicate_groups():
+            self._write({"record": "duplicate", "sha": sha, "paths": paths})
+        if self.profile is not None:
+            self._write({"record": "profile", **self.profile.to_dict()})
+        self._write({"record": "summary", "total_files": self.total, "errors": len(self.errors),
+                     "partial": len(self.partials),
+                     "cycles": len(graph_stats["cycles"]), "layers": len(graph_stats["layers"]),
+                     "duplicates": len(self.duplicates)})
+        self._file.close()
+
+class SqliteReportWriter(ReportWriter):
+    """Gera um banco SQLite com tabelas indexadas de arquivos, símbolos e arestas
+    
+    Tabelas: scan, files (com o hash do conteúdo: arquivos com o mesmo sha
+    são cópias), classes, functions (métodos têm class_id),
+    imports, edges, graph_metrics (camada, graus e alcance transitivo,
+    componente/ciclo) e entry_points. Os índices são criados depois da carga,
+    que é bem mais rápida sem eles.
+    """
+    
+    extension = "sqlite"
+    
+    SCHEMA = """
+        CREATE TABLE scan (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE files (
+            id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE, directory TEXT,
+            purpose TEXT, docstring TEXT, comments TEXT, main_block TEXT, error TEXT, sha TEXT);
+        CREATE TABLE classes (
+            id INTEGER PRIMARY KEY, file_id INTEGER NOT NULL, name TEXT NOT NULL, docstring TEXT);
+        CREATE TABLE functions (
+            id INTEGER PRIMARY KEY, file_id INTEGER NOT NULL, class_id INTEGER,
+            name TEXT NOT NULL, docstring TEXT);
+        CREATE TABLE imports (file_id INTEGER NOT NULL, category TEXT NOT NULL, name TEXT NOT NULL);
+        CREATE TABLE edges (source_id INTEGER NOT NULL, target_id INTEGER NOT NULL);
+        CREATE TABLE entry_points (file_id INTEGER NOT NULL, type TEXT NOT NULL);
+        CREATE TABLE graph_metrics (
+            file_id INTEGER PRIMARY KEY, layer INTEGER, fan_in INTEGER, fan_out INTEGER,
+            transitive_fan_in INTEGER, transitive_fan_out INTEGER, cycle INTEGER);
+    """
+    
+    INDEXES = """
+        CREATE INDEX idx_files_directory ON files (directory);
+        CREATE INDEX idx_files_sha ON files (sha);
+        CREATE INDEX idx_classes_name ON classes (name);
+        CREATE INDEX idx_classes_file ON classes (file_id);
+        CREATE INDEX idx_functions_name ON functions (name);
+        CREATE INDEX idx_functions_file ON functions (file_id);
+        CREATE INDEX idx_functions_class ON functions (class_id);
+        CREATE INDEX idx_imports_name ON imports (name);
+        CREATE INDEX idx_imports_file ON imports (file_id);
+        CREATE INDEX idx_edges_source ON edges (source_id);
+        CREATE INDEX idx_edges_target ON edges (target_id);
+        CREATE INDEX idx_graph_metrics_cycle ON graph_metrics (cycle);
+    """
+    
+    def __init__(self, project_path, req_info=None, report_file=None, timestamp=None, scope=None):
+        super().__init__(project_path, req_info, report_file, timestamp, scope)
+        if os.path.exists(self.report_file):
+            os.remove(self.report_file)
+        self.conn = sqlite3.connect(self.report_file)
+        # Carga em lote: sem journal nem fsync; o arquivo só é útil quando completo
+        self.conn.execute("PRAGMA journal_mode = OFF")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.executescript(self.SCHEMA)
+        self.conn.executemany("INSERT INTO scan VALUES (?, ?)", [
+            (key, json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value)
+            for key, value in _scan_metadata(self).items()
+        ])
+        self._file_ids = {}
+    
+    def write_file(self, file_info):
+        path = file_info.path
+        cursor = self.conn.execute(
+            "INSERT INTO files (path, directory, purpose, docstring, comments, main_block, error, sha) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, os.path.dirname(path), file_info.purpose, file_info.docstring,
+             json.dumps(list(file_info.comments), ensure_ascii=False) if file_info.comments else None,
+             "\n".join(file_info.main_block) if file_info.main_block else None,
+             file_info.error, file_info.sha)
+        )
+        file_id = cursor.lastrowid
+        self._file_ids[path] = file_id
+        
+        for cls in file_info.classes:
+            class_id = self.conn.execute(
+                "INSERT INTO classes (file_id, name, docstring) VALUES (?, ?, ?)",
+                (file_id, cls.name, cls.docstring)
+            ).lastrowid
+            self.conn.executemany(
+                "INSERT INTO functions (file_id, class_id, name, docstring) VALUES (?, ?, ?, ?)",
+                [(file_id, class_id, m.name, m.docstring) for m in cls.methods]
+            )
+        self.conn.executemany(
+            "INSERT INTO functions (file_id, class_id, name, docstring) VALUES (?, NULL, ?, ?)",
+            [(file_id, func.name, func.docstring) for func in file_info.functions]
+        )
+        self.conn.executemany(
+            "INSERT INTO imports (file_id, category, name) VALUES (?, ?, ?)",
+            [(file_id, category, name)
+             for category, names in file_info.imports.items() for name in names]
+        )
+    
+    def write_summary(self, relationships, graph_stats):
+        ids = self._file_ids
+        cycle_of = {path: number for number, members in enumerate(graph_stats["cycles"], 1)
+                    for path in members}
+        self.conn.executemany(
+            "INSERT INTO graph_metrics VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(ids[path], m["layer"], m["fan_in"], m["fan_out"], m["transitive_fan_in"],
+              m["transitive_fan_out"], cycle_of.get(path))
+             for path, m in graph_stats["metrics"].items() if path in ids]
+        )
+        self.conn.executemany(
+            "INSERT INTO edges (source_id, target_id) VALUES (?, ?)",
+            [(ids[source], ids[target])
+             for source, rel in relationships.items() if source in ids
+             for target in rel["imports"] if target in ids]
+        )
+        self.conn.executemany(
+            "INSERT INTO entry_points (file_id, type) VALUES (?, ?)",
+            [(ids[ep["path"]], ep["type"]) for ep in self.entry_points if ep["path"] in ids]
+        )
+        self.conn.execute("INSERT INTO scan VALUES ('total_files', ?)", (self.total,))
+        if self.profile is not None:
+            self.conn.execute("INSERT INTO scan VALUES ('profile', ?)",
+                              (json.dumps(self.profile.to_dict(), ensure_ascii=False),))
+        self.conn.executescript(self.INDEXES)
+        self.conn.commit()
+        self.conn.close()
+
+# Formatos disponíveis em --format
+REPORT_WRITERS = {
+    "markdown": MarkdownReportWriter,
+    "json": JsonReportWriter,
+    "jsonl": JsonlReportWriter,
+    "sqlite": SqliteReportWriter
+}
+
+def parse_formats(value):
+    """Interpreta a lista de formatos separados por vírgula de --format"""
+    formats = []
+    for name in value.split(","):
+        name = name.strip().lower()
+        if name == "md":
+            name = "markdown"
+        if name not in REPORT_WRITERS:
+            raise argparse.ArgumentTypeError(
+                f"formato inválido: '{name}' (opções: {', '.join(REPORT_WRITERS)})")
+        if name not in formats:
+            formats.append(name)
+    return formats
+
+def generate_report(project_path, files_info, req_info, relationships):
+    """Gera o relatório completo do projeto (Markdown)"""
+    writer = MarkdownReportWriter(project_path, req_info)
+    for file_info in files_info:
+        writer.add(file_info)
+    return writer.finish(relationships)
+
+class ShardWriter(ReportWriter):
+    """Resultado parcial de um shard (--shard i/N) em JSON Lines, lido pelo comando merge
+    
+    Registros (campo "record"): "shard" (metadados, número do shard, total
+    de arquivos do projeto e hash da lista de arquivos), "file" (um por arquivo do shard, em ordem, com
+    as arestas de importação já resolvidas contra o índice de módulos do
+    projeto inteiro) e "shard_end", que marca o arquivo como completo.
+    """
+    
+    extension = "jsonl"
+    
+    def __init__(self, project_path, req_info, shard, module_index, python_files,
+                 report_file=None):
+        index, count = shard
+        super().__init__(project_path, req_info, report_file, timestamp=f"shard{index}of{count}")
+        self.module_index = module_index
+        self._file = open(self.report_file, 'w', encoding='utf-8')
+        self._write({"record": "shard", "shard": index, "shards": count,
+                     "total_files": len(python_files),
+                     "file_list": file_list_digest(python_files), **_scan_metadata(self)})
+    
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+    
+    def write_file(self, file_info):
+        self._write({"record": "file", **file_info.to_dict(),
+                     "edges": resolve_file_edges(file_info, self.module_index)})
+    
+    def finish(self, relationships=None, graph_stats=None):
+        """Fecha o shard; relacionamentos e grafo só são calculados no merge"""
+        self.write_summary(relationships, graph_stats)
+        return self.report_file
+    
+    def write_summary(self, relationships, graph_stats):
+        """Marca o shard como completo"""
+        self._write({"record": "shard_end", "files": self.total, "errors": len(self.errors)})
+        self._file.close()
+
+def parse_shard(value):
+    """Interpreta --shard i/N (i de 1 a N)"""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard inválido: '{value}' (use i/N, ex.: 1/4)")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard inválido: '{value}' (i deve estar entre 1 e N)")
+    return index, count
+
+def file_list_digest(python_files):
+    """Hash da lista ordenada de caminhos relativos (com /), igual em qualquer máquina"""
+    paths = sorted(path.replace(os.sep, "/") for path in python_files)
+    return file_digest("\n".join(paths).encode("utf-8"))
+
+def shard_files(python_files, index, count):
+    """Seleciona os arquivos do shard `index` de `count` pelo CRC32 do caminho
+    
+    A partição depende só do caminho relativo (com /), então é a mesma em
+    qualquer máquina e sistema operacional.
+    """
+    return [path for path in python_files
+            if zlib.crc32(path.replace(os.sep, "/").encode("utf-8")) % count == index - 1]
+
+def run_shard_scan(project_path, python_files, req_info, shard, jobs=1, cache=None, fs=None):
+    """Analisa apenas os arquivos de um shard e grava o resultado parcial"""
+    # Índice e resolvedor usam todos os arquivos, para que as arestas saiam iguais em todos os shards
+    module_index = build_module_index(python_files)
+    selected = shard_files(python_files, *shard)
+    print(f"Shard {shard[0]}/{shard[1]}: {len(selected)} de {len(python_files)} arquivos")
+    
+    writer = ShardWriter(project_path, req_info, shard, module_index, python_files)
+    for file_info in analyze_files(selected, project_path, jobs, cache=cache, fs=fs):
+        writer.add(file_info)
+    if cache is not None:
+        # Entradas dos outros shards continuam válidas no cache
+        cache.prune(python_files)
+    return writer.finish()
+
+class ProjectState:
+    """Estado em memória de um projeto analisado, atualizado de forma incremental
+    
+    Guarda o file_info, a assinatura (mtime, tamanho) e a seção Markdown de
+    cada arquivo, além do grafo de importações nos dois sentidos. refresh()
+    reanalisa apenas arquivos novos ou alterados e atualiza somente as
+    arestas afetadas.
+    """
+    
+    def __init__(self, project_path, discovery=None, jobs=1, cache=None):
+        self.project_path = project_path
+        self.discovery = discovery or {}
+        self.jobs = jobs
+        self.cache = cache
+        self.files = {}
+        self.signatures = {}
+        self.sections = {}
+        self.module_index = {}
+        self.graph = {}
+        self.reverse = {}
+        # Nomes absolutos importados por arquivo e, para cada prefixo, quem o importa
+        self._import_names = {}
+        self._refs = {}
+        self._project_modules = frozenset()
+    
+    def refresh(self, candidates=None):
+        """Atualiza o estado e retorna (novos, alterados, removidos)
+        
+        Sem `candidates`, o projeto inteiro é listado e comparado por stat;
+        com uma coleção de caminhos já conhecidos, apenas eles são verificados.
+        """
+        removed = []
+        if candidates is None:
+            paths = find_python_files(self.project_path, **self.discovery)
+            current = set(paths)
+            removed = [path for path in self.files if path not in current]
+        else:
+            paths = sorted(candidates)
+        
+        modified = []
+        for path in paths:
+            try:
+                st = os.stat(os.path.join(self.project_path, path))
+            except OSError:
+                if path in self.files:
+                    removed.append(path)
+                continue
+            signature = (st.st_mtime_ns, st.st_size)
+            if self.signatures.get(path) != signature:
+                self.signatures[path] = signature
+                modified.append(path)
+        
+        added = [path for path in modified if path not in self.files]
+        changed = [path for path in modified if path in self.files]
+        if not (modified or removed):
+            return [], [], []
+        
+        for path in removed:
+            self._set_imports(path, [])
+            for name in (self.files, self.signatures, self.sections, self.graph, self.reverse):
+                name.pop(path, None)
+        
+        if added or removed:
+            self._update_project_modules()
+        
+        for file_info in analyze_files(modified, self.project_path, self.jobs, cache=self.cache):
+            path = file_info.path
+            self.files[path] = file_info
+            self.sections.pop(path, None)
+        
+        if added or removed:
+            self._update_module_index()
+        for path in modified:
+            self._set_imports(path, self.files[path].imports.project)
+        
+        return added, changed, removed
+    
+    def changed_paths(self):
+        """Lista, sem alterar o estado, os caminhos novos, alterados ou removidos (por stat)
+        
+        O resultado serve de `candidates` para refresh(), que então só toca
+        nesses arquivos; assim a listagem completa pode rodar sem bloquear
+        quem lê o estado.
+        """
+        paths = find_python_files(self.project_path, **self.discovery)
+        current = set(paths)
+        candidates = [path for path in self.files if path not in current]
+        for path in paths:
+            try:
+                st = os.stat(os.path.join(self.project_path, path))
+            except OSError:
+                continue
+            if self.signatures.get(path) != (st.st_mtime_ns, st.st_size):
+                candidates.append(path)
+        return candidates
+    
+    def use_resolver(self):
+        """Ativa o resolvedor com os módulos deste projeto (vários projetos no mesmo processo)"""
+        if get_module_resolver().project != self._project_modules:
+            set_module_resolver(get_module_resolver().for_project(self._project_modules))
+    
+    def _update_project_modules(self):
+        """Atualiza o resolvedor se os módulos de nível superior do projeto mudaram"""
+        names = project_module_names(set(self.files) | set(self.signatures))
+        if names == self._project_modules:
+            return
+        self._project_modules = names
+        set_module_resolver(get_module_resolver().for_project(names))
+        for path, file_info in self.files.items():
+            imports = reclassify_imports(file_info.imports)
+            if imports != file_info.imports:
+                file_info.imports = imports
+                self.sections.pop(path, None)
+                self._set_imports(path, imports.project)
+    
+    def _update_module_index(self):
+        """Reconstrói o índice de módulos e reavalia só quem importa nomes que mudaram"""
+        old_index = self.module_index
+        self.module_index = build_module_index(sorted(self.files))
+        changed_names = {name for name in set(old_index) | set(self.module_index)
+                         if old_index.get(name) != self.module_index.get(name)}
+        affected = set()
+        for name in changed_names:
+            affected.update(self._refs.get(name, ()))
+        for path in affected:
+            self._resolve_edges(path)
+    
+    def _set_imports(self, path, project_imports):
+        """Registra as importações de um arquivo e recalcula suas arestas"""
+        for name in self._import_names.pop(path, ()):
+            for prefix in _name_prefixes(name):
+                refs = self._refs.get(prefix)
+                if refs:
+                    refs.discard(path)
+                    if not refs:
+                        del self._refs[prefix]
+        
+        names = {absolute_import_name(imp, path) for imp in project_imports} - {None}
+        if names:
+            self._import_names[path] = names
+            for name in names:
+                for prefix in _name_prefixes(name):
+                    self._refs.setdefault(prefix, set()).add(path)
+        self._resolve_edges(path)
+    
+    def _resolve_edges(self, path):
+        """Atualiza as arestas de saída de um arquivo e o índice reverso"""
+        old_targets = self.graph.get(path, [])
+        targets = set()
+        if path in self.files:
+            for name in self._import_names.get(path, ()):
+                target = resolve_import(name, path, self.module_index)
+                if target is not None and target != path:
+                    targets.add(target)
+        
+        for target in old_targets:
+            if target not in targets and target in self.reverse:
+                self.reverse[target].discard(path)
+        for target in targets:
+            self.reverse.setdefault(target, set()).add(path)
+        if path in self.files:
+            self.graph[path] = sorted(targets)
+        else:
+            self.graph.pop(path, None)
+    
+    def relationships(self):
+        """Monta o mapa de relacionamentos no formato de map_import_relationships"""
+        return {path: {"imports": self.graph.get(path, []),
+                       "imported_by": sorted(self.reverse.get(path, ()))}
+                for path in sorted(self.files)}
+    
+    def write_reports(self, formats, req_info=None, label="watch", output_dir=None):
+        """Gera as saídas a partir do estado em memória (seções Markdown reaproveitadas)"""
+        writers = []
+        for name in formats:
+            writer_class = REPORT_WRITERS[name]
+            report_file = None
+            if output_dir is not None:
+                project_name = os.path.basename(os.path.abspath(self.project_path))
+                report_file = os.path.join(output_dir,
+                                           f"codescope_{project_name}_{label}.{writer_class.extension}")
+            if writer_class is MarkdownReportWriter:
+                writers.append(writer_class(self.project_path, req_info, report_file, label,
+                                            section_cache=self.sections))
+            else:
+                writers.append(writer_class(self.project_path, req_info, report_file, label))
+        for path in sorted(self.files):
+            for writer in writers:
+                writer.add(self.files[path])
+        relationships = self.relationships()
+        graph_stats = graph_stats_for(writers, relationships)
+        return [writer.finish(relationships, graph_stats) for writer in writers]
+    
+    def directories(self):
+        """Lista os diretórios (relativos) que contêm arquivos do projeto, incluindo ancestrais"""
+        directories = {""}
+        for path in self.files:
+            directory = os.path.dirname(path)
+            while directory and directory not in directories:
+                directories.add(directory)
+                directory = os.path.dirname(directory)
+        return sorted(directories)
+
+def _name_prefixes(name):
+    """Gera os prefixos de um nome pontuado: a.b.c, a.b, a"""
+    while name:
+        yield name
+        name = name.rpartition(".")[0]
+
+class PollingWatcher:
+    """Detecta alterações listando o projeto e comparando mtime/tamanho a cada intervalo"""
+    
+    def __init__(self, interval=1.0):
+        self.interval = interval
+    
+    def wait(self):
+        """Aguarda o próximo ciclo; None indica que o projeto inteiro deve ser verificado"""
+        time.sleep(self.interval)
+        return None
+    
+    def update_directories(self, directories):
+        pass
+    
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Detecta alterações com inotify (Linux), sem dependências externas
+    
+    Alterações em arquivos conhecidos viram uma lista de candidatos (só eles
+    são verificados); criações, renomeações e eventos de diretório pedem uma
+    verificação completa. Uma verificação completa também é feita a cada
+    `rescan_interval` segundos, para diretórios ainda não observados.
+    """
+    
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+                  | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+    
+    def __init__(self, project_path, directories, rescan_interval=30.0, debounce=0.05):
+        self.project_path = project_path
+        self.rescan_interval = rescan_interval
+        self.debounce = debounce
+        self._libc = self.load_libc()
+        if self._libc is None:
+            raise OSError("inotify indisponível")
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        self._watches = {}
+        self._dirs = {}
+        self._last_rescan = time.monotonic()
+        self.update_directories(directories)
+    
+    @staticmethod
+    def load_libc():
+        """Carrega a libc com as funções de inotify, ou retorna None"""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        except OSError:
+            return None
+        if not hasattr(libc, "inotify_init1"):
+            return None
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    
+    def update_directories(self, directories):
+        """Passa a observar os diretórios informados (relativos ao projeto)"""
+        for directory in directories:
+            if directory in self._dirs:
+                continue
+            full_path = os.path.join(self.project_path, directory)
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(full_path), self.WATCH_MASK)
+            if wd >= 0:
+                self._watches[wd] = directory
+                self._dirs[directory] = wd
+    
+    def wait(self):
+        """Aguarda eventos; retorna caminhos alterados ou None para uma verificação completa"""
+        deadline = self._last_rescan + self.rescan_interval
+        timeout = max(0.0, deadline - time.monotonic())
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            self._last_rescan = time.monotonic()
+            return None
+        
+        # Editores costumam gerar rajadas de eventos: esperar um pouco e ler tudo
+        time.sleep(self.debounce)
+        candidates = set()
+        full_rescan = False
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset + 16 <= len(data):
+                wd, mask, _, length = struct.unpack_from("iIII", data, offset)
+                name = data[offset + 16:offset + 16 + length].rstrip(b"\0").decode(
+                    sys.getfilesystemencoding(), "surrogateescape")
+                offset += 16 + length
+                
+                if mask & (self.IN_Q_OVERFLOW | self.IN_ISDIR | self.IN_DELETE_SELF
+                           | self.IN_MOVE_SELF | self.IN_IGNORED):
+                    full_rescan = True
+                    if mask & self.IN_IGNORED and wd in self._watches:
+                        del self._dirs[self._watches.pop(wd)]
+                    continue
+                if not name.endswith(".py"):
+                    continue
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    # Arquivo novo: as regras de exclusão só são aplicadas na listagem completa
+                    full_rescan = True
+                    continue
+                directory = self._watches.get(wd)
+                if directory is not None:
+                    candidates.add(os.path.join(directory, name) if directory else name)
+        
+        if full_rescan:
+            self._last_rescan = time.monotonic()
+            return None
+        return candidates
+    
+    def close(self):
+        os.close(self.fd)
+
+def watch_project(project_path, discovery, formats, req_info=None, jobs=1, cache=None,
+                  interval=1.0, use_inotify=True):
+    """Mantém os relatórios atualizados, reanalisando apenas os arquivos alterados"""
+    state = ProjectState(project_path, discovery, jobs, cache)
+    start = time.perf_counter()
+    state.refresh()
+    report_files = state.write_reports(formats, req_info)
+    print(f"{len(state.files)} arquivos analisados em {time.perf_counter() - start:.2f}s. "
+          f"Relatório: {', '.join(report_files)}")
+    
+    watcher = None
+    if use_inotify:
+        try:
+            watcher = InotifyWatcher(project_path, state.directories())
+            print("Observando alterações (inotify). Ctrl+C para encerrar.")
+        except OSError:
+            watcher = None
+    if watcher is None:
+        watcher = PollingWatcher(interval)
+        print(f"Observando alterações (verificação a cada {interval:g}s). Ctrl+C para encerrar.")
+    
+    try:
+        while True:
+            candidates = watcher.wait()
+            start = time.perf_counter()
+            added, changed, removed = state.refresh(candidates)
+            if not (added or changed or removed):
+                continue
+            if candidates is None:
+                watcher.update_directories(state.directories())
+            report_files = state.write_reports(formats, req_info)
+            if cache is not None:
+                cache.flush()
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {len(changed)} alterado(s), "
+                  f"{len(added)} novo(s), {len(removed)} removido(s) — "
+                  f"relatório atualizado em {time.perf_counter() - start:.2f}s")
+    except KeyboardInterrupt:
+        print("\nModo de observação encerrado.")
+    finally:
+        watcher.close()
+
+class GitError(Exception):
+    """Falha ao consultar o repositório git"""
+
+class GitRepository:
+    """Acesso mínimo a um repositório git através do executável `git`
+    
+    Todos os caminhos são relativos a `project_path`, que pode ser um
+    subdiretório do repositório.
+    """
+    
+    def __init__(self, project_path):
+        self.project_path = project_path
+        try:
+            self.run("rev-parse", "--is-inside-work-tree")
+        except GitError as e:
+            raise GitError(f"'{project_path}' não está em um repositório git ({e})")
+    
+    def run(self, *args, ok_codes=(0,)):
+        """Executa um comando git e retorna a saída (bytes)"""
+        try:
+            result = subprocess.run(["git", "-C", self.project_path, *args],
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as e:
+            raise GitError(f"git indisponível: {e}")
+        if result.returncode not in ok_codes:
+            raise GitError(result.stderr.decode("utf-8", "replace").strip()
+                           or f"git {args[0]} falhou")
+        return result.stdout
+    
+    @staticmethod
+    def _split(output):
+        """Divide uma saída -z em caminhos"""
+        return [os.fsdecode(item) for item in output.split(b"\0") if item]
+    
+    def resolve_range(self, spec):
+        """Interpreta 'A..B' ou 'A...B' (base = merge-base) e retorna (base, alvo)"""
+        if "..." in spec:
+            left, right = spec.split("...", 1)
+            right = right or "HEAD"
+            base = self.run("merge-base", left or "HEAD", right).decode().strip()
+            return base, right
+        if ".." in spec:
+            left, right = spec.split("..", 1)
+            return left or "HEAD", right or "HEAD"
+        return spec, "HEAD"
+    
+    def changed_files(self, base, head=None):
+        """Retorna {caminho: status A/M/D} dos .py alterados entre base e alvo
+        
+        Sem `head`, compara com a árvore de trabalho e inclui arquivos não
+        rastreados (que não estejam no .gitignore).
+        """
+        args = ["diff", "--name-status", "-z", "--no-renames", "--relative", base]
+        if head:
+            args.append(head)
+        items = self._split(self.run(*args, "--", "*.py"))
+        changes = {}
+        for status, path in zip(items[0::2], items[1::2]):
+            changes[path.replace("/", os.sep)] = "D" if status.startswith("D") else (
+                "A" if status.startswith("A") else "M")
+        if not head:
+            untracked = self.run("ls-files", "--others", "--exclude-standard", "-z", "--", "*.py")
+            for path in self._split(untracked):
+                changes[path.replace("/", os.sep)] = "A"
+        return changes
+    
+    def list_files(self, rev):
+        """Lista os .py de uma revisão (relativos ao diretório do projeto)"""
+        output = self.run("ls-tree", "-r", "-z", "--name-only", rev)
+        return [path.replace("/", os.sep) for path in self._split(output) if path.endswith(".py")]
+    
+    def grep_files(self, words, rev=None):
+        """Lista os .py que contêm alguma das palavras (pré-filtro rápido, feito pelo git)"""
+        if not words:
+            return set()
+        args = ["grep", "-l", "-z", "-F", "-w"]
+        if not rev:
+            args.append("--untracked")
+        for word in sorted(words):
+            args += ["-e", word]
+        if rev:
+            args.append(rev)
+        # Código de saída 1 significa apenas "nenhuma ocorrência"
+        output = self.run(*args, "--", "*.py", ok_codes=(0, 1))
+        prefix = f"{rev}:" if rev else ""
+        return {path[len(prefix):].replace("/", os.sep) for path in self._split(output)}
+    
+    def read_files(self, rev, paths):
+        """Lê o conteúdo dos arquivos em uma revisão com um único `git cat-file --batch`
+        
+        Gera (caminho, bytes ou None se o arquivo não existir na revisão).
+        """
+        process = subprocess.Popen(["git", "-C", self.project_path, "cat-file", "--batch"],
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        try:
+            for path in paths:
+                spec = f"{rev}:./{path.replace(os.sep, '/')}\n"
+                process.stdin.write(os.fsencode(spec))
+                process.stdin.flush()
+                header = process.stdout.readline().split()
+                if len(header) < 3 or header[-1] == b"missing":
+                    yield path, None
+                    continue
+                size = int(header[2])
+                data = process.stdout.read(size)
+                process.stdout.read(1)  # quebra de linha após o conteúdo
+                yield path, data
+        finally:
+            process.stdin.close()
+            process.stdout.close()
+            process.wait()
+
+def _analyze_revision_files(repo, rev, paths):
+    """Analisa arquivos lidos diretamente de uma revisão do git"""
+    for path, data in repo.read_files(rev, paths):
+        if data is None:
+            yield FileInfo(path, error="Erro ao analisar arquivo: ausente na revisão")
+            continue
+        yield analyze_bytes(data, path)
+
+def run_delta_scan(project_path, discovery, formats, req_info=None, since=None, diff=None,
+                   jobs=1, cache=None):
+    """Analisa só os arquivos alterados entre revisões e seus vizinhos no grafo de importações
+    
+    Entram no relatório os arquivos alterados, os arquivos do projeto que
+    eles importam e os que importam algum arquivo alterado ou removido. Os
+    importadores são pré-filtrados com `git grep` pelo nome do módulo, então
+    apenas candidatos prováveis são analisados.
+    """
+    repo = GitRepository(project_path)
+    if since:
+        base, head = since, None
+    else:
+        base, head = repo.resolve_range(diff)
+    
+    if head is None:
+        all_files = find_python_files(project_path, **discovery)
+        analyze = lambda paths: analyze_files(paths, project_path, jobs, cache=cache)
+    else:
+        all_files = filter_paths(repo.list_files(head), discovery.get("excludes", ()),
+                                 discovery.get("includes", ()),
+                                 discovery.get("default_excludes", True))
+        analyze = lambda paths: _analyze_revision_files(repo, head, paths)
+    
+    present = set(all_files)
+    changes = {path: status for path, status in repo.changed_files(base, head).items()
+               if path in present or status == "D"}
+    if head is not None:
+        # Arquivos removidos precisam passar pelas mesmas regras de exclusão
+        deleted = [path for path, status in changes.items() if status == "D"]
+        allowed = set(filter_paths(deleted, discovery.get("excludes", ()),
+                                   discovery.get("includes", ()),
+                                   discovery.get("default_excludes", True)))
+        changes = {path: status for path, status in changes.items()
+                   if status != "D" or path in allowed}
+    
+    modified = sorted(path for path, status in changes.items() if status != "D")
+    deleted_names = set()
+    for path, status in changes.items():
+        if status == "D":
+            deleted_names.update(build_module_index([path]))
+    
+    set_module_resolver(get_module_resolver().for_project(project_module_names(all_files)))
+    module_index = build_module_index(all_files)
+    infos = {file_info.path: file_info for file_info in analyze(modified)}
+    changed = set(modified)
+    
+    # Importados pelos arquivos alterados
+    importees = set()
+    for path in modified:
+        for imp in infos[path].imports.project:
+            target = resolve_import(imp, path, module_index)
+            if target is not None and target not in changed:
+                importees.add(target)
+    
+    # Importadores: candidatos que mencionam o nome de algum módulo alterado ou removido
+    names = set(deleted_names)
+    for path in changes:
+        names.update(build_module_index([path]))
+    words = {name.rpartition(".")[2] for name in names}
+    candidates = sorted((repo.grep_files(words, head) & present) - changed)
+    importers = set()
+    for file_info in analyze(candidates):
+        path = file_info.path
+        for imp in file_info.imports.project:
+            target = resolve_import(imp, path, module_index)
+            absolute = absolute_import_name(imp, path)
+            if target in changed or (absolute and any(
+                    prefix in deleted_names for prefix in _name_prefixes(absolute))):
+                importers.add(path)
+                infos[path] = file_info
+                break
+    
+    for file_info in analyze(sorted(importees - set(infos))):
+        infos[file_info.path] = file_info
+    
+    scope = {
+        "mode": "delta",
+        "base": base,
+        "head": head or "árvore de trabalho",
+        "changes": {path.replace(os.sep, "/"): status for path, status in changes.items()},
+        "importers": sorted(importers - changed),
+        "importees": sorted(importees - importers)
+    }
+    print(f"Delta {base} → {scope['head']}: {len(changes)} alterado(s), "
+          f"{len(infos) - len(modified)} relacionado(s), {len(candidates)} candidato(s) verificados")
+    
+    timestamp = "delta_" + datetime.now().strftime("%Y%m%d_%H%M%S")
+    writers = [REPORT_WRITERS[name](project_path, req_info, timestamp=timestamp, scope=scope)
+               for name in formats]
+    for path in sorted(infos):
+        for writer in writers:
+            writer.add(infos[path])
+    relationships = map_import_relationships(writers[0].graph_nodes, module_index)
+    graph_stats = graph_stats_for(writers, relationships)
+    return [writer.finish(relationships, graph_stats) for writer in writers]
+
+# Extensões aceitas como projeto compactado (wheel, sdist, zip e tar)
+ARCHIVE_SUFFIXES = (".whl", ".zip", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz", ".tar")
+
+def is_archive(path):
+    """Indica se o caminho é um arquivo compactado que pode ser analisado sem extrair"""
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_SUFFIXES)
+
+class ArchiveFS:
+    """Árvore de diretórios montada a partir dos nomes de um arquivo compactado
+    
+    Segue a interface de LocalFS (scandir, stat, read_bytes) sobre caminhos
+    relativos com "/", de modo que a descoberta (regras, .gitignore e ordem)
+    é exatamente a de um diretório extraído. `read` lê o conteúdo de um
+    membro pelo caminho relativo (usado só para os .gitignore).
+    """
+    
+    def __init__(self, paths, read=None):
+        self._dirs = {"": {}}
+        for path in paths:
+            parts = path.split("/")
+            for depth in range(len(parts)):
+                parent = "/".join(parts[:depth])
+                is_dir = depth < len(parts) - 1
+                self._dirs.setdefault(parent, {})
+                self._dirs[parent][parts[depth]] = self._dirs[parent].get(parts[depth], False) or is_dir
+        self._read = read
+    
+    def scandir(self, directory, follow_symlinks=False):
+        directory = directory.replace(os.sep, "/")
+        if directory not in self._dirs:
+            raise FileNotFoundError(directory)
+        return [(name, is_dir, f"{directory}/{name}" if directory else name)
+                for name, is_dir in self._dirs[directory].items()]
+    
+    def stat(self, path):
+        raise OSError("stat não disponível dentro de arquivos compactados")
+    
+    def read_bytes(self, path):
+        data = self._read(path.replace(os.sep, "/")) if self._read else None
+        if data is None:
+            raise FileNotFoundError(path)
+        return data
+
+class ProjectArchive:
+    """Wheel, sdist ou zip/tar analisado sem extração
+    
+    Zip e wheel têm um índice central: os nomes são listados primeiro e só
+    os .py selecionados são descomprimidos. Tar comprimido só pode ser lido
+    em sequência, então é percorrido uma única vez em modo de fluxo ("r|*"):
+    os .py são analisados conforme aparecem e as regras de descoberta, que
+    dependem da lista completa (.gitignore, nomes do projeto), são aplicadas
+    no final. Um diretório de topo comum a todos os membros (pacote-1.0/ em
+    sdists) é removido, como se o arquivo tivesse sido extraído nele.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        name = os.path.basename(path)
+        suffix = next(s for s in ARCHIVE_SUFFIXES if name.lower().endswith(s))
+        # Diretório que a extração criaria ao lado do arquivo: mesmo nome do relatório
+        self.root = os.path.join(os.path.dirname(path), name[:-len(suffix)])
+        if zipfile.is_zipfile(path):
+            self.kind = "zip"
+        elif tarfile.is_tarfile(path):
+            self.kind = "tar"
+        else:
+            raise ValueError(f"formato de arquivo compactado não reconhecido: {path}")
+    
+    @staticmethod
+    def _common_prefix(names):
+        """Diretório de topo compartilhado por todos os membros ("pacote-1.0/") ou texto vazio"""
+        tops = {name.partition("/")[0] for name in names}
+        if len(tops) == 1 and all("/" in name for name in names):
+            return tops.pop() + "/"
+        return ""
+    
+    def scan(self, discovery, jobs=1):
+        """Analisa os .py do arquivo; retorna (arquivos em ordem, conteúdo do requirements.txt, resultados)"""
+        if self.kind == "zip":
+            return self._scan_zip(discovery, jobs)
+        return self._scan_tar(discovery, jobs)
+    
+    def _select(self, names, discovery, read):
+        """Aplica a descoberta normal (regras, .gitignore e ordem) à lista de membros"""
+        fs = ArchiveFS(names, read)
+        return list(iter_python_files("", discovery.get("excludes", ()), discovery.get("includes", ()),
+                                      discovery.get("use_gitignore", True),
+                                      discovery.get("default_excludes", True), fs=fs))
+    
+    def _scan_zip(self, discovery, jobs):
+        with zipfile.ZipFile(self.path) as archive:
+            members = {info.filename: info for info in archive.infolist()
+                       if not info.is_dir() and not info.filename.startswith("/")}
+            prefix = self._common_prefix(members)
+            members = {name[len(prefix):]: info for name, info in members.items()}
+            
+            def read(name):
+                return archive.read(members[name]) if name in members else None
+            
+            with profile_stage("discovery"):
+                python_files = self._select(members, discovery, read)
+            set_module_resolver(get_module_resolver().for_project(project_module_names(python_files)))
+            blobs = ((path, read(path.replace(os.sep, "/"))) for path in python_files)
+            results = list(_analyze_blobs(blobs, jobs))
+            requirements = read("requirements.txt")
+        return python_files, requirements, results
+    
+    def _scan_tar(self, discovery, jobs):
+        default_excludes = discovery.get("default_excludes", True)
+        names = []
+        small = {}
         
-        # Detalhes de cada arquivo
-        f.write("## Detalhes dos Arquivos\n\n")
+        def blobs(archive):
+            for member in archive:
+                if not member.isfile():
+                    continue
+                name = member.name
+                while name.startswith("./"):
+                    name = name[2:]
+                names.append(name)
+                parts = name.split("/")
+                if parts[-1] in (".gitignore", "requirements.txt"):
+                    small[name] = archive.extractfile(member).read()
+                # Pré-filtro pelos diretórios excluídos por padrão (o primeiro nível pode ser o
+                # diretório de topo removido no final); as demais regras são aplicadas depois
+                elif parts[-1].endswith(".py") and not (default_excludes and any(
+                        part in DEFAULT_EXCLUDED_DIRS or part.endswith(".egg-info")
+                        for part in parts[1:-1])):
+                    yield name, archive.extractfile(member).read()
         
+        with tarfile.open(self.path, "r|*") as archive:
+            results = list(_analyze_blobs(blobs(archive), jobs))
+        
+        prefix = self._common_prefix(names)
+        names = [name[len(prefix):] for name in names]
+        small = {name[len(prefix):]: data for name, data in small.items()}
+        with profile_stage("discovery"):
+            python_files = self._select(names, discovery, small.get)
+        
+        # Nomes do projeto só são conhecidos no final: as importações são reclassificadas
+        set_module_resolver(get_module_resolver().for_project(project_module_names(python_files)))
+        by_path = {}
+        for file_info in results:
+            file_info.path = file_info.path[len(prefix):].replace("/", os.sep)
+            if file_info.imports:
+                file_info.imports = reclassify_imports(file_info.imports)
+            by_path[file_info.path] = file_info
+        return python_files, small.get("requirements.txt"), [by_path[path] for path in python_files]
+
+def _analyze_blobs(blobs, jobs=1, chunk_bytes=1 << 20, chunk_files=64):
+    """Analisa conteúdos lidos em sequência (ex.: de um tar), na ordem de chegada
+    
+    Com jobs > 1 os conteúdos são agrupados em lotes (até `chunk_files`
+    arquivos ou `chunk_bytes`) e enviados ao pool enquanto a leitura segue.
+    """
+    guards = get_resource_guards()
+    if jobs == 1 and guards.parse_timeout is None:
+        for file_path, data in blobs:
+            yield analyze_bytes(data, file_path)
+        return
+    if guards.isolated():
+        chunk_files = 1
+    
+    with _worker_pool(jobs) as executor:
+        pending = deque()
+        chunk = []
+        size = 0
+        for file_path, data in blobs:
+            chunk.append((file_path, data, None))
+            size += len(data)
+            if len(chunk) >= chunk_files or size >= chunk_bytes:
+                pending.append((executor.submit(_analyze_blob_chunk, chunk), chunk))
+                chunk = []
+                size = 0
+                if len(pending) >= jobs * 2:
+                    yield from _chunk_results(*pending.popleft())
+        if chunk:
+            pending.append((executor.submit(_analyze_blob_chunk, chunk), chunk))
+        while pending:
+            yield from _chunk_results(*pending.popleft())
+
+def run_archive_scan(archive_path, discovery, formats, jobs=1):
+    """Analisa um wheel, sdist ou zip/tar sem extraí-lo e gera os relatórios"""
+    archive = ProjectArchive(archive_path)
+    print(f"Lendo {archive.kind} sem extrair ({'acesso direto' if archive.kind == 'zip' else 'passagem única'})...")
+    python_files, requirements, results = archive.scan(discovery, jobs)
+    print(f"Encontrados {len(python_files)} arquivos Python.")
+    req_info = parse_requirements_text(requirements.decode("utf-8", "replace")) if requirements else None
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    writers = [REPORT_WRITERS[name](archive.root, req_info, timestamp=timestamp) for name in formats]
+    for file_info in results:
+        for writer in writers:
+            writer.add(file_info)
+    relationships = map_import_relationships(writers[0].graph_nodes)
+    graph_stats = graph_stats_for(writers, relationships)
+    return [writer.finish(relationships, graph_stats) for writer in writers]
+
+# Bibliotecas usadas nos imports sintéticos (padrão e de terceiros)
+SYNTHETIC_STDLIB = ("os", "sys", "json", "re", "collections", "itertools", "functools", "typing")
+SYNTHETIC_THIRD_PARTY = ("requests", "numpy", "flask", "sqlalchemy")
+
+def _synthetic_module_paths(files, depth, width=4, files_per_dir=8):
+    """Distribui os módulos sintéticos em uma árvore de pacotes com `depth` níveis"""
+    paths = []
+    for i in range(files):
+        leaf = i // files_per_dir
+        parts = [f"pkg{leaf % width}"]
+        parts += [f"sub{(leaf // width ** (level + 1)) % width}" for level in range(depth - 1)]
+        paths.append(parts + [f"mod{i}"])
+    return paths
+
+def _synthetic_source(index, module_names, rng, classes, methods, functions, imports):
+    """Gera o código-fonte de um módulo sintético"""
+    lines = [f'"""Módulo sintético {index}, gerado pelo benchmark do CodeScope 360"""', ""]
+    lines += [f"import {name}" for name in rng.sample(SYNTHETIC_STDLIB, 2)]
+    lines.append(f"import {rng.choice(SYNTHETIC_THIRD_PARTY)}")
+    others = [name for name in module_names if name != module_names[index]]
+    for target in rng.sample(others, min(imports, len(others))):
+        if rng.random() < 0.5:
+            lines.append(f"import {target}")
+        else:
+            lines.append(f"from {target} import Class0")
+    lines.append("")
+    
+    for c in range(classes):
+        lines += ["", f"# TODO: revisar a classe sintética {c}", f"class Class{c}:",
+                  f'    """Classe sintética {c} do módulo {index}"""', ""]
+        for m in range(methods):
+            lines += [f"    def method{m}(self, value):", f'        """Método sintético {m}"""',
+                      f"        # NOTE: operação {m}", f"        return value * {m + 1}", ""]
+    for f in range(functions):
+        lines += ["", f"def function{f}(items):", f'    """Função sintética {f}"""',
+                  "    total = 0", "    for item in items:", "        total += item",
+                  "    return total", ""]
+    if index % 10 == 0:
+        lines += ["", 'if __name__ == "__main__":', "    function0([1, 2, 3])"]
+    return "\n".join(lines) + "\n"
+
+def generate_synthetic_project(root, files=200, classes=3, methods=4, functions=3,
+                               imports=3, depth=3, seed=0):
+    """Cria um projeto Python sintético e determinístico em `root` para o benchmark"""
+    rng = random.Random(seed)
+    paths = _synthetic_module_paths(files, max(1, depth))
+    module_names = [".".join(parts) for parts in paths]
+    
+    packages = set()
+    for parts in paths:
+        for i in range(1, len(parts)):
+            packages.add(tuple(parts[:i]))
+    for package in packages:
+        directory = os.path.join(root, *package)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "__init__.py"), "w", encoding="utf-8") as f:
+            f.write(f'"""Pacote sintético {".".join(package)}"""\n')
+    
+    for index, parts in enumerate(paths):
+        source = _synthetic_source(index, module_names, rng, classes, methods, functions, imports)
+        with open(os.path.join(root, *parts) + ".py", "w", encoding="utf-8") as f:
+            f.write(source)
+    
+    with open(os.path.join(root, "requirements.txt"), "w", encoding="utf-8") as f:
+        f.write("".join(f"{name}>=1.0\n" for name in SYNTHETIC_THIRD_PARTY))
+    return len(paths) + len(packages)
+
+def peak_rss_mb():
+    """Pico de memória residente (MB) deste processo e dos processos filhos, se disponível"""
+    if resource is None:
+        return None, None
+    # ru_maxrss é dado em KB no Linux e em bytes no macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(children, 1)
+
+def _bench_run(project_path, output_dir, formats, jobs):
+    """Executa o pipeline completo uma vez e retorna o tempo de cada etapa"""
+    timings = {}
+    
+    start = time.perf_counter()
+    python_files = find_python_files(project_path)
+    set_module_resolver(get_module_resolver().for_project(project_module_names(python_files)))
+    timings["discovery"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    req_path = find_requirements_file(project_path)
+    req_info = parse_requirements(req_path) if req_path else None
+    timings["requirements"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    files_info = list(analyze_files(python_files, project_path, jobs))
+    timings["analysis"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    relationships = map_import_relationships(files_info)
+    graph_stats = analyze_import_graph(graph_from_relationships(relationships))
+    timings["graph"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for name in formats:
+        writer = REPORT_WRITERS[name](project_path, req_info, report_file=os.path.join(
+            output_dir, f"bench.{REPORT_WRITERS[name].extension}"))
         for file_info in files_info:
-            f.write(f"### 📄 {file_info['path']}\n\n")
-            
-            # Verificar erro
-            if "error" in file_info:
-                f.write(f"**⚠️ Erro:** {file_info['error']}\n\n")
-                continue
-            
-            # Propósito
-            purpose = infer_file_purpose(file_info)
-            f.write(f"**Propósito:** {purpose}\n\n")
-            
-            # Docstring
-            if file_info.get("docstring"):
-                f.write("**Descrição:**\n")
-                f.write(f"```\n{file_info['docstring']}\n```\n\n")
-            
-            # Comentários relevantes
-            if file_info.get("comments"):
-                f.write("**Comentários Importantes:**\n")
-                for comment in file_info["comments"]:
-                    f.write(f"- {comment}\n")
-                f.write("\n")
-            
-            # Classes
-            if file_info.get("classes"):
-                f.write("**Classes:**\n\n")
-                for cls in file_info["classes"]:
-                    f.write(f"- **{cls['name']}**\n")
-                    if cls.get("docstring"):
-                        # Pegar apenas a primeira linha da docstring para manter o relatório conciso
-                        first_line = cls["docstring"].splitlines()[0]
-                        f.write(f"  - Descrição: {first_line}\n")
-                    
-                    if cls.get("methods"):
-                        f.write("  - Métodos:\n")
-                        for method in cls["methods"]:
-                            f.write(f"    - `{method['name']}()`")
-                            if method.get("docstring"):
-                                first_line = method["docstring"].splitlines()[0]
-                                f.write(f": {first_line}")
-                            f.write("\n")
-                f.write("\n")
-            
-            # Funções
-            if file_info.get("functions"):
-                f.write("**Funções:**\n\n")
-                for func in file_info["functions"]:
-                    f.write(f"- **{func['name']}()**")
-                    if func.get("docstring"):
-                        first_line = func["docstring"].splitlines()[0]
-                        f.write(f": {first_line}")
-                    f.write("\n")
-                f.write("\n")
-            
-            # Importações
-            imports = file_info.get("imports", {})
-            if any(imports.values()):
-                f.write("**Importações:**\n\n")
-                
-                if imports.get("project"):
-                    f.write("- **Do projeto:**\n")
-                    for imp in imports["project"]:
-                        f.write(f"  - {imp}\n")
-                
-                if imports.get("third_party"):
-                    f.write("- **Bibliotecas externas:**\n")
-                    for imp in imports["third_party"]:
-                        f.write(f"  - {imp}\n")
-                
-                if imports.get("standard_lib"):
-                    f.write("- **Biblioteca padrão:**\n")
-                    for imp in imports["standard_lib"][:5]:  # Limitar para economia de espaço
-                        f.write(f"  - {imp}\n")
-                    if len(imports["standard_lib"]) > 5:
-                        f.write(f"  - ... e mais {len(imports['standard_lib'])-5} importações\n")
-                f.write("\n")
-            
-            # Bloco Main
-            if file_info.get("main_block"):
-                f.write("**Bloco Principal:**\n")
-                f.write("```python\n")
-                f.write("if __name__ == \"__main__\":\n")
-                for line in file_info["main_block"]:
-                    f.write(f"    {line}\n")
-                f.write("```\n\n")
-            
-            # Relações de importação
-            if file_info["path"] in relationships:
-                rel = relationships[file_info["path"]]
-                
-                if rel["imports"]:
-                    f.write("**Importa arquivos:**\n")
-                    for imp in rel["imports"]:
-                        f.write(f"- {imp}\n")
-                    f.write("\n")
-                
-                if rel["imported_by"]:
-                    f.write("**Importado por:**\n")
-                    for imp in rel["imported_by"]:
-                        f.write(f"- {imp}\n")
-                    f.write("\n")
+            writer.add(file_info)
+        writer.finish(relationships, graph_stats)
+    timings["rendering"] = time.perf_counter() - start
+    
+    timings["total"] = sum(timings.values())
+    return len(python_files), timings
+
+# Etapas medidas pelo benchmark, na ordem do pipeline
+BENCH_STAGES = ("discovery", "requirements", "analysis", "graph", "rendering", "total")
+
+def run_benchmark(files=200, classes=3, methods=4, functions=3, imports=3, depth=3,
+                  runs=3, jobs=1, formats=("markdown",), seed=0, project_path=None):
+    """Mede cada etapa do pipeline sobre um projeto sintético (ou real) e retorna os resultados"""
+    source = project_path or "synthetic"
+    with tempfile.TemporaryDirectory(prefix="codescope_bench_") as workdir:
+        if project_path is None:
+            project_path = os.path.join(workdir, "synthetic")
+            generate_synthetic_project(project_path, files, classes, methods, functions,
+                                       imports, depth, seed)
+        output_dir = os.path.join(workdir, "reports")
+        os.makedirs(output_dir)
+        
+        samples = {stage: [] for stage in BENCH_STAGES}
+        for run in range(runs):
+            file_count, timings = _bench_run(project_path, output_dir, formats, jobs)
+            for stage in BENCH_STAGES:
+                samples[stage].append(timings[stage])
+            print(f"  execução {run + 1}/{runs}: {file_count} arquivos em {timings['total']:.3f}s")
+    
+    stages = {}
+    for stage, values in samples.items():
+        median = statistics.median(values)
+        stages[stage] = {
+            "min": round(min(values), 6),
+            "median": round(median, 6),
+            "mean": round(statistics.fmean(values), 6),
+            "files_per_sec": round(file_count / median, 1) if median > 0 else None
+        }
+    own_rss, children_rss = peak_rss_mb()
+    return {
+        "tool": "CodeScope 360",
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "params": {"files": files, "classes": classes, "methods": methods,
+                   "functions": functions, "imports": imports, "depth": depth,
+                   "runs": runs, "jobs": jobs, "formats": list(formats), "seed": seed,
+                   "project": source},
+        "file_count": file_count,
+        "stages": stages,
+        "peak_rss_mb": {"main": own_rss, "workers": children_rss}
+    }
+
+def render_benchmark(results, baseline=None):
+    """Formata os resultados do benchmark como tabela de texto (com comparação opcional)"""
+    header = f"{'Etapa':<14}{'mediana (s)':>13}{'mínimo (s)':>13}{'arquivos/s':>14}"
+    if baseline:
+        header += f"{'vs. ' + baseline.get('version', '?'):>14}"
+    lines = [header, "-" * len(header)]
+    for stage in BENCH_STAGES:
+        stats = results["stages"][stage]
+        rate = stats["files_per_sec"]
+        line = (f"{stage:<14}{stats['median']:>13.4f}{stats['min']:>13.4f}"
+                f"{(f'{rate:,.0f}' if rate else '-'):>14}")
+        previous = (baseline or {}).get("stages", {}).get(stage)
+        if previous and previous.get("median"):
+            change = (stats["median"] - previous["median"]) / previous["median"] * 100
+            line += f"{change:>+13.1f}%"
+        lines.append(line)
+    rss = results["peak_rss_mb"]
+    if rss["main"] is not None:
+        lines.append(f"\nPico de memória (RSS): {rss['main']} MB no processo principal, "
+                     f"{rss['workers']} MB nos processos de análise")
+    return "\n".join(lines)
+
+def parse_positive(value):
+    """Interpreta um inteiro maior ou igual a 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"valor inválido: '{value}' (use um inteiro >= 1)")
+    return number
+
+def parse_bench_args(argv=None):
+    """Lê as opções do subcomando `bench`"""
+    parser = argparse.ArgumentParser(
+        prog="codescope360.py bench",
+        description="Mede o desempenho de cada etapa do CodeScope 360 em um projeto sintético")
+    parser.add_argument("--files", type=int, default=200, help="Número de módulos gerados")
+    parser.add_argument("--classes", type=int, default=3, help="Classes por módulo")
+    parser.add_argument("--methods", type=int, default=4, help="Métodos por classe")
+    parser.add_argument("--functions", type=int, default=3, help="Funções por módulo")
+    parser.add_argument("--imports", type=int, default=3,
+                        help="Importações de outros módulos do projeto, por módulo")
+    parser.add_argument("--depth", type=int, default=3, help="Profundidade da árvore de pacotes")
+    parser.add_argument("--runs", type=parse_positive, default=3,
+                        help="Número de execuções medidas (mínimo 1)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Processos de análise (0 = um por núcleo; padrão: 1)")
+    parser.add_argument("-f", "--format", type=parse_formats, default=["markdown"],
+                        help="Formatos renderizados na etapa de saída")
+    parser.add_argument("--seed", type=int, default=0, help="Semente do gerador sintético")
+    parser.add_argument("--project", help="Medir um projeto existente em vez do sintético")
+    parser.add_argument("-o", "--output", help="Arquivo JSON de resultados")
+    parser.add_argument("--compare", metavar="JSON",
+                        help="Resultado anterior para comparar as medianas")
+    return parser.parse_args(argv)
+
+def bench_command(argv):
+    """Subcomando `bench`: gera um projeto sintético, mede o pipeline e salva o JSON"""
+    args = parse_bench_args(argv)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    
+    jobs = resolve_jobs(args.jobs)
+    source = args.project or f"projeto sintético com {args.files} módulos"
+    print(f"Benchmark: {source}, {args.runs} execução(ões), {jobs} processo(s)")
+    results = run_benchmark(args.files, args.classes, args.methods, args.functions,
+                            args.imports, args.depth, args.runs, jobs, args.format,
+                            args.seed, args.project and os.path.abspath(args.project))
+    print()
+    print(render_benchmark(results, baseline))
+    
+    output = args.output or f"codescope_bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados salvos em: {output}")
+
+def read_manifest(manifest_path):
+    """Lê um manifesto de projetos: um caminho por linha (linhas vazias e # são ignoradas)
+    
+    Caminhos relativos são resolvidos a partir do diretório do manifesto.
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    roots = []
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                roots.append(os.path.normpath(os.path.join(base, os.path.expanduser(line))))
+    return roots
+
+def scan_project(project_path, formats, output_dir, discovery=None, jobs=1, executor=None,
+                 use_cache=True, label=None, timestamp=None, base_resolver=None):
+    """Analisa um projeto completo e retorna o resumo usado pelo modo batch
+    
+    O resolvedor do projeto é derivado de `base_resolver` (biblioteca padrão e
+    pacotes instalados, varridos uma única vez) e os arquivos são analisados
+    no `executor` compartilhado, se houver.
+    """
+    start = time.perf_counter()
+    python_files = find_python_files(project_path, **(discovery or {}))
+    base_resolver = base_resolver or get_module_resolver()
+    set_module_resolver(base_resolver.for_project(project_module_names(python_files)))
+    
+    req_path = find_requirements_file(project_path)
+    req_info = parse_requirements(req_path) if req_path else None
+    
+    cache = None
+    if use_cache:
+        try:
+            cache = AnalysisCache(project_path)
+        except (OSError, sqlite3.Error) as e:
+            print(f"  Aviso: cache desativado ({e})")
+    
+    label = label or os.path.basename(os.path.abspath(project_path))
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    writers = [REPORT_WRITERS[name](project_path, req_info, report_file=os.path.join(
+                   output_dir, f"codescope_{label}_{timestamp}.{REPORT_WRITERS[name].extension}"))
+               for name in formats]
+    try:
+        for file_info in analyze_files(python_files, project_path, jobs, cache=cache,
+                                       executor=executor):
+            for writer in writers:
+                writer.add(file_info)
+    finally:
+        if cache is not None:
+            cache.prune(python_files)
+            cache.close()
+    
+    relationships = map_import_relationships(writers[0].graph_nodes)
+    graph_stats = analyze_import_graph(graph_from_relationships(relationships))
+    report_files = [writer.finish(relationships, graph_stats) for writer in writers]
+    
+    return {
+        "project": label,
+        "path": os.path.abspath(project_path),
+        "status": "ok",
+        "files": writers[0].total,
+        "errors": len(writers[0].errors),
+        "entry_points": len(writers[0].entry_points),
+        "cycles": len(graph_stats["cycles"]),
+        "layers": len(graph_stats["layers"]),
+        "seconds": round(time.perf_counter() - start, 3),
+        "reports": report_files
+    }
+
+def render_batch_summary(results):
+    """Relatório Markdown com o resumo de todos os projetos do batch"""
+    ok = [result for result in results if result["status"] == "ok"]
+    parts = ["# Resumo do Batch CodeScope 360\n\n",
+             f"*Gerado em {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}*\n\n",
+             f"**Projetos:** {len(results)} ({len(ok)} concluídos, {len(results) - len(ok)} com falha)\n",
+             f"**Arquivos Python:** {sum(result['files'] for result in ok)}\n\n",
+             "| Projeto | Status | Arquivos | Erros | Pontos de entrada | Ciclos | Tempo (s) | Relatório |\n",
+             "|---------|--------|---------:|------:|------------------:|-------:|----------:|-----------|\n"]
+    for result in results:
+        if result["status"] == "ok":
+            reports = ", ".join(f"`{os.path.basename(path)}`" for path in result["reports"])
+            parts.append(f"| {result['project']} | ✅ | {result['files']} | {result['errors']} | "
+                         f"{result['entry_points']} | {result['cycles']} | {result['seconds']} | "
+                         f"{reports} |\n")
+        else:
+            parts.append(f"| {result['project']} | ⚠️ {result['error']} | - | - | - | - | "
+                         f"{result['seconds']} | - |\n")
+    parts.append("\n")
+    return "".join(parts)
+
+def parse_batch_args(argv=None):
+    """Lê as opções do subcomando `batch`"""
+    parser = argparse.ArgumentParser(
+        prog="codescope360.py batch",
+        description="Analisa vários projetos em um único processo, com pool e resolvedor compartilhados")
+    parser.add_argument("projects", nargs="*", help="Diretórios dos projetos")
+    parser.add_argument("-m", "--manifest", action="append", default=[],
+                        help="Arquivo com um diretório de projeto por linha (pode repetir)")
+    parser.add_argument("-f", "--format", type=parse_formats, default=["markdown"],
+                        help="Formatos de saída de cada projeto (padrão: markdown)")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="Processos de análise compartilhados (0 = um por núcleo)")
+    parser.add_argument("-o", "--output-dir", default=".",
+                        help="Diretório dos relatórios (padrão: diretório atual)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Não usar o cache incremental de cada projeto")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="Padrão (estilo .gitignore) de caminhos a ignorar em todos os projetos")
+    parser.add_argument("--no-gitignore", action="store_true",
+                        help="Não aplicar os arquivos .gitignore dos projetos")
+    return parser.parse_args(argv)
+
+def batch_command(argv):
+    """Subcomando `batch`: analisa vários projetos e gera um relatório por projeto e um resumo"""
+    args = parse_batch_args(argv)
+    roots = list(args.projects)
+    for manifest in args.manifest:
+        roots.extend(read_manifest(manifest))
+    if not roots:
+        print("Nenhum projeto informado (use diretórios ou --manifest).")
+        sys.exit(1)
+    
+    os.makedirs(args.output_dir, exist_ok=True)
+    discovery = {"excludes": args.exclude, "use_gitignore": not args.no_gitignore}
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    jobs = resolve_jobs(args.jobs)
+    
+    # Biblioteca padrão e site-packages são varridos uma vez para todos os projetos
+    base_resolver = ModuleResolver()
+    set_module_resolver(base_resolver)
+    print(f"Batch: {len(roots)} projeto(s), {jobs} processo(s) compartilhado(s)")
+    
+    results = []
+    labels = set()
+    executor = _worker_pool(jobs) if jobs > 1 else None
+    try:
+        for number, root in enumerate(roots, 1):
+            label = os.path.basename(os.path.abspath(root)) or "projeto"
+            # Projetos com o mesmo nome de diretório não sobrescrevem os relatórios
+            suffix = 2
+            unique = label
+            while unique in labels:
+                unique = f"{label}_{suffix}"
+                suffix += 1
+            labels.add(unique)
             
-            f.write("---\n\n")
+            print(f"[{number}/{len(roots)}] {root}")
+            start = time.perf_counter()
+            try:
+                if not os.path.isdir(root):
+                    raise FileNotFoundError(f"diretório não encontrado: {root}")
+                result = scan_project(root, args.format, args.output_dir, discovery, jobs,
+                                      executor, not args.no_cache, unique, timestamp, base_resolver)
+                print(f"  {result['files']} arquivos, {result['errors']} erro(s) "
+                      f"em {result['seconds']:.2f}s")
+            except Exception as e:
+                # Um projeto com problema não interrompe os demais
+                result = {"project": unique, "path": os.path.abspath(root), "status": "falhou",
+                          "error": f"{type(e).__name__}: {e}", "files": 0,
+                          "seconds": round(time.perf_counter() - start, 3)}
+                print(f"  Falhou: {result['error']}")
+            results.append(result)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    
+    summary_base = os.path.join(args.output_dir, f"codescope_batch_{timestamp}")
+    with open(summary_base + ".md", "w", encoding="utf-8") as f:
+        f.write(render_batch_summary(results))
+    with open(summary_base + ".json", "w", encoding="utf-8") as f:
+        json.dump({"tool": "CodeScope 360", "version": __version__, "generated_at":
+                   datetime.now().isoformat(timespec="seconds"), "projects": results},
+                  f, ensure_ascii=False, indent=2)
+    
+    failed = sum(1 for result in results if result["status"] != "ok")
+    print("-" * 60)
+    print(f"Batch concluído: {len(results) - failed} projeto(s) analisado(s), {failed} com falha. "
+          f"Resumo em: {summary_base}.md")
+    if failed:
+        sys.exit(2)
+
+def _read_shard(path):
+    """Abre um resultado de shard e retorna (cabeçalho, gerador dos registros de arquivo)"""
+    f = open(path, encoding="utf-8")
+    header = json.loads(f.readline() or "{}")
+    if header.get("record") != "shard":
+        f.close()
+        raise ValueError(f"{path} não é um resultado de --shard")
+    
+    def records():
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if record["record"] == "file":
+                    yield record
+                elif record["record"] == "shard_end":
+                    return
+        raise ValueError(f"{path} está incompleto (o shard não terminou)")
+    
+    return header, records()
+
+def merge_shards(shard_paths, formats, output_dir=".", timestamp=None):
+    """Combina resultados de shards nos relatórios normais do projeto
+    
+    Os shards são lidos em paralelo com heapq.merge pelo caminho (cada um já
+    está ordenado), de modo que em memória fica um registro por shard, além
+    dos agregados dos writers e do grafo de importações.
+    """
+    shards = [_read_shard(path) for path in shard_paths]
+    headers = [header for header, _ in shards]
+    first = headers[0]
+    count = first["shards"]
+    # O caminho absoluto não entra: cada máquina pode ter o projeto em outro diretório
+    identity = lambda h: (h["shards"], h.get("project"), h["version"], h["total_files"],
+                          h.get("file_list"))
+    for header in headers:
+        if identity(header) != identity(first):
+            raise ValueError("os shards são de execuções diferentes "
+                             "(projeto, versão, total ou lista de arquivos)")
+    numbers = sorted(header["shard"] for header in headers)
+    if numbers != list(range(1, count + 1)):
+        missing = sorted(set(range(1, count + 1)) - set(numbers))
+        repeated = sorted({n for n in numbers if numbers.count(n) > 1})
+        raise ValueError(f"shards incompletos: ausentes {missing or '-'}, repetidos {repeated or '-'}")
+    
+    project_path = first["project_path"]
+    project_name = first.get("project") or os.path.basename(project_path)
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    writers = [REPORT_WRITERS[name](project_path, first.get("requirements") or None,
+                                    report_file=os.path.join(output_dir, f"codescope_{project_name}_"
+                                                             f"{timestamp}.{REPORT_WRITERS[name].extension}"))
+               for name in formats]
+    
+    graph = {}
+    for record in heapq.merge(*(records for _, records in shards), key=lambda r: r["path"]):
+        edges = record.pop("edges", [])
+        del record["record"]
+        file_info = FileInfo.from_dict(record)
+        graph[file_info.path] = edges
+        for writer in writers:
+            writer.add(file_info)
+    
+    if writers[0].total != first["total_files"]:
+        raise ValueError(f"{writers[0].total} arquivos nos shards, esperados {first['total_files']}")
+    relationships = relationships_from_graph(graph)
+    graph_stats = analyze_import_graph(graph)
+    return [writer.finish(relationships, graph_stats) for writer in writers]
+
+def parse_merge_args(argv=None):
+    """Lê as opções do subcomando `merge`"""
+    parser = argparse.ArgumentParser(
+        prog="codescope360.py merge",
+        description="Combina os resultados de --shard i/N nos relatórios do projeto")
+    parser.add_argument("shards", nargs="+", help="Arquivos codescope_*_shard*.jsonl")
+    parser.add_argument("-f", "--format", type=parse_formats, default=["markdown"],
+                        help="Formatos de saída (padrão: markdown)")
+    parser.add_argument("-o", "--output-dir", default=".",
+                        help="Diretório dos relatórios (padrão: diretório atual)")
+    return parser.parse_args(argv)
+
+def merge_command(argv):
+    """Subcomando `merge`: junta os shards e gera os relatórios completos"""
+    args = parse_merge_args(argv)
+    print(f"Combinando {len(args.shards)} shard(s)...")
+    try:
+        report_files = merge_shards(args.shards, args.format, args.output_dir)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Erro: {e}")
+        sys.exit(1)
+    print(f"Relatório salvo em: {', '.join(report_files)}")
+
+def render_query_results(results, mode):
+    """Formata os resultados do subcomando `query` para o console"""
+    lines = []
+    if mode == "importers":
+        for item in results:
+            lines.append(f"{item['path']}  ({item['category']}: {', '.join(item['names'])})")
+        return lines
+    for symbol in results:
+        name = f"{symbol['parent']}.{symbol['name']}" if symbol["parent"] else symbol["name"]
+        line = f"{symbol['kind']:<9} {name}  {symbol['path']}"
+        if symbol["summary"]:
+            line += f"  — {symbol['summary']}"
+        lines.append(line)
+    return lines
+
+def parse_query_args(argv=None):
+    """Lê as opções do subcomando `query`"""
+    parser = argparse.ArgumentParser(
+        prog="codescope360.py query",
+        description="Consulta o índice de símbolos gerado com --index, sem reanalisar o projeto")
+    parser.add_argument("term", help="Nome, prefixo, expressão regular ou módulo, conforme o modo")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--prefix", dest="mode", action="store_const", const="prefix",
+                      help="Símbolos cujo nome começa com o termo")
+    mode.add_argument("--regex", dest="mode", action="store_const", const="regex",
+                      help="Símbolos cujo nome casa com a expressão regular")
+    mode.add_argument("--importers", dest="mode", action="store_const", const="importers",
+                      help="Arquivos que importam o módulo (ou algo dentro dele)")
+    parser.add_argument("--kind", choices=("class", "method", "function"),
+                        help="Restringir a um tipo de símbolo")
+    parser.add_argument("-i", "--ignore-case", action="store_true",
+                        help="Ignorar maiúsculas/minúsculas")
+    parser.add_argument("-n", "--limit", type=int, default=50,
+                        help="Máximo de resultados (padrão: 50, 0 = todos)")
+    parser.add_argument("--json", action="store_true", help="Saída em JSON")
+    parser.add_argument("-p", "--project", default=".",
+                        help="Diretório do projeto indexado (padrão: diretório atual)")
+    parser.add_argument("--cache-dir", help="Diretório de cache usado na indexação")
+    parser.add_argument("--index", metavar="ARQUIVO", help="Caminho do índice (em vez de --project)")
+    args = parser.parse_args(argv)
+    args.mode = args.mode or "exact"
+    return args
+
+def query_command(argv):
+    """Subcomando `query`: busca exata, por prefixo, por regex ou de importadores no índice"""
+    args = parse_query_args(argv)
+    try:
+        if args.index:
+            index = SymbolIndex(args.index, create=False)
+        else:
+            index = SymbolIndex.for_project(args.project, args.cache_dir, create=False)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Erro: {e}")
+        sys.exit(1)
+    
+    start = time.perf_counter()
+    try:
+        if args.mode == "importers":
+            results = index.importers(args.term, args.limit)
+        else:
+            search = {"exact": index.lookup, "prefix": index.prefix, "regex": index.search}[args.mode]
+            results = search(args.term, args.kind, args.ignore_case, args.limit)
+    except re.error as e:
+        print(f"Erro: expressão regular inválida ({e})")
+        sys.exit(1)
+    finally:
+        index.conn.close()
+    elapsed = time.perf_counter() - start
+    
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for line in render_query_results(results, args.mode):
+            print(line)
+        print(f"{len(results)} resultado(s) em {elapsed * 1000:.1f} ms"
+              + (" (limite atingido; use --limit)" if args.limit and len(results) == args.limit else ""))
+    if not results:
+        sys.exit(1)
+
+# Formatos de relatório servidos pelo modo serve, pela extensão pedida na URL
+SERVE_FORMATS = {"md": ("markdown", "text/markdown; charset=utf-8"),
+                 "json": ("json", "application/json; charset=utf-8"),
+                 "jsonl": ("jsonl", "application/x-ndjson; charset=utf-8")}
+
+class ServedProject:
+    """Projeto mantido em memória pelo modo serve
+    
+    O ProjectState é compartilhado por todas as requisições (lock por
+    projeto). Uma requisição que encontra o estado mais velho que
+    `refresh_interval` dispara a verificação por stat em segundo plano e é
+    respondida com o estado atual; só os arquivos alterados são reanalisados.
+    Os relatórios completos são gerados uma vez por geração do estado e
+    depois servidos da memória.
+    """
+    
+    # Análises de projetos diferentes não rodam juntas: o resolvedor de módulos é global
+    analysis_lock = threading.Lock()
+    
+    def __init__(self, name, project_path, discovery=None, jobs=1, cache=None, refresh_interval=2.0):
+        self.name = name
+        self.project_path = project_path
+        self.cache = cache
+        self.refresh_interval = refresh_interval
+        self.state = ProjectState(project_path, discovery, jobs, cache)
+        req_path = find_requirements_file(project_path)
+        self.req_info = parse_requirements(req_path) if req_path else None
+        self.lock = threading.RLock()
+        self._refreshing = threading.Lock()
+        self.generation = 0
+        self.checked_at = 0.0
+        self.refreshed_at = None
+        self._reports = {}
+        self._output_dir = tempfile.mkdtemp(prefix="codescope_serve_")
+    
+    def refresh(self):
+        """Verifica o projeto por stat e reanalisa os arquivos alterados; retorna quantos mudaram"""
+        with self._refreshing:
+            candidates = self.state.changed_paths() if self.state.files else None
+            changed = 0
+            if candidates is None or candidates:
+                with ServedProject.analysis_lock, self.lock:
+                    self.state.use_resolver()
+                    added, modified, removed = self.state.refresh(candidates)
+                    changed = len(added) + len(modified) + len(removed)
+                    if changed:
+                        self.generation += 1
+                        self._reports = {}
+                        self.refreshed_at = datetime.now().isoformat(timespec="seconds")
+                if changed and self.cache is not None:
+                    self.cache.flush()
+            self.checked_at = time.monotonic()
+            return changed
+    
+    def ensure_fresh(self, force=False):
+        """Atualiza na hora (force) ou dispara a atualização em segundo plano se o estado envelheceu"""
+        if force:
+            self.refresh()
+        elif time.monotonic() - self.checked_at >= self.refresh_interval and not self._refreshing.locked():
+            threading.Thread(target=self.refresh, daemon=True).start()
+    
+    def report(self, extension):
+        """Relatório completo no formato da extensão, gerado uma vez por geração"""
+        format_name = SERVE_FORMATS[extension][0]
+        with self.lock:
+            cached = self._reports.get(format_name)
+            if cached is None:
+                report_file, = self.state.write_reports([format_name], self.req_info, "serve",
+                                                        self._output_dir)
+                with open(report_file, "rb") as f:
+                    cached = self._reports[format_name] = f.read()
+                os.remove(report_file)
+            return cached
+    
+    def file_detail(self, path, markdown=False):
+        """Dados (ou a seção Markdown) de um arquivo, com seus relacionamentos; None se não existe"""
+        with self.lock:
+            file_info = self.state.files.get(path)
+            if file_info is None:
+                return None
+            rel = {"imports": self.state.graph.get(path, []),
+                   "imported_by": sorted(self.state.reverse.get(path, ()))}
+            if markdown:
+                text = render_file_section(file_info)
+                if file_info.error is None:
+                    text += render_relationship_block(rel)
+                return text
+            # Arestas à parte: "imports" do file_info são as importações declaradas
+            return {**file_info.to_dict(), "purpose": file_info.purpose, "relationships": rel}
+    
+    def graph_slice(self, roots, depth=1, direction="both"):
+        """Subgrafo de importações a até `depth` arestas dos arquivos em `roots`
         
-        # Visão geral do projeto
-        f.write("## Visão Geral do Projeto\n\n")
+        `direction` escolhe seguir as importações ("out"), os importadores
+        ("in") ou ambos. Retorna os nós com a distância até a raiz mais
+        próxima e as arestas entre eles.
+        """
+        with self.lock:
+            graph, reverse = self.state.graph, self.state.reverse
+            distance = {root: 0 for root in roots if root in self.state.files}
+            frontier = list(distance)
+            for level in range(1, depth + 1):
+                following = []
+                for path in frontier:
+                    neighbors = []
+                    if direction in ("out", "both"):
+                        neighbors.extend(graph.get(path, ()))
+                    if direction in ("in", "both"):
+                        neighbors.extend(reverse.get(path, ()))
+                    for neighbor in neighbors:
+                        if neighbor not in distance:
+                            distance[neighbor] = level
+                            following.append(neighbor)
+                frontier = following
+            nodes = [{"path": path, "distance": distance[path],
+                      "purpose": self.state.files[path].purpose}
+                     for path in sorted(distance, key=lambda p: (distance[p], p))]
+            edges = [[source, target] for source in sorted(distance)
+                     for target in graph.get(source, ()) if target in distance]
+        return {"project": self.name, "roots": sorted(root for root in roots if root in distance),
+                "depth": depth, "direction": direction, "nodes": nodes, "edges": edges}
+    
+    def summary(self):
+        """Resumo do projeto para a página inicial do servidor"""
+        with self.lock:
+            return {"name": self.name, "path": os.path.abspath(self.project_path),
+                    "files": len(self.state.files), "generation": self.generation,
+                    "refreshed_at": self.refreshed_at}
+    
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+        for name in os.listdir(self._output_dir):
+            os.remove(os.path.join(self._output_dir, name))
+        os.rmdir(self._output_dir)
+
+class ServeHandler(http.server.BaseHTTPRequestHandler):
+    """Endpoints do modo serve (somente GET, respostas em JSON, Markdown ou JSON Lines)
+    
+        /                                    projetos servidos
+        /<projeto>/report.md|json|jsonl      relatório completo
+        /<projeto>/file?path=P[&format=md]   detalhes de um arquivo
+        /<projeto>/graph?path=P|prefix=D     fatia do grafo (&depth=N&direction=out|in|both)
+    
+    Qualquer endpoint aceita ?refresh=1 para atualizar o projeto antes de responder.
+    """
+    
+    server_version = f"CodeScope360/{__version__}"
+    
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        parts = [urllib.parse.unquote(part) for part in url.path.split("/") if part]
+        projects = self.server.projects
         
-        # Arquivos mais importados (nós centrais)
-        central_files = []
-        for file_path, rel in relationships.items():
-            if len(rel["imported_by"]) > 1:
-                central_files.append({
-                    "path": file_path,
-                    "importers": len(rel["imported_by"])
-                })
+        if not parts:
+            return self._send_json({"tool": "CodeScope 360", "version": __version__,
+                                    "projects": [project.summary() for project in projects.values()]})
+        project = projects.get(parts[0])
+        if project is None or len(parts) != 2:
+            return self._send_error(404, f"endpoint não encontrado: {url.path}")
+        project.ensure_fresh(query.get("refresh", ["0"])[0] not in ("0", ""))
+        endpoint = parts[1]
         
-        central_files.sort(key=lambda x: x["importers"], reverse=True)
+        if endpoint.startswith("report."):
+            extension = endpoint[len("report."):]
+            if extension not in SERVE_FORMATS:
+                return self._send_error(404, f"formato desconhecido: {extension}")
+            return self._send(200, project.report(extension), SERVE_FORMATS[extension][1])
         
-        if central_files:
-            f.write("### Arquivos Centrais\n\n")
-            f.write("Estes arquivos são importados por vários outros, indicando que são componentes centrais:\n\n")
-            
-            for cf in central_files[:5]:  # Top 5
-                f.write(f"- **{cf['path']}** - Importado por {cf['importers']} arquivos\n")
-            f.write("\n")
+        if endpoint == "file":
+            path = query.get("path", [""])[0]
+            markdown = query.get("format", ["json"])[0] == "md"
+            detail = project.file_detail(path, markdown)
+            if detail is None:
+                return self._send_error(404, f"arquivo não encontrado no projeto: {path}")
+            if markdown:
+                return self._send(200, detail.encode("utf-8"), SERVE_FORMATS["md"][1])
+            return self._send_json(detail)
         
-        # Conclusão
-        f.write("## Conclusão\n\n")
+        if endpoint == "graph":
+            try:
+                depth = int(query.get("depth", ["1"])[0])
+            except ValueError:
+                return self._send_error(400, "depth deve ser um número inteiro")
+            direction = query.get("direction", ["both"])[0]
+            if direction not in ("out", "in", "both"):
+                return self._send_error(400, "direction deve ser out, in ou both")
+            roots = list(query.get("path", []))
+            for prefix in query.get("prefix", []):
+                with project.lock:
+                    roots.extend(path for path in project.state.files if path.startswith(prefix))
+            if not roots:
+                return self._send_error(400, "informe path=ARQUIVO ou prefix=DIRETÓRIO")
+            return self._send_json(project.graph_slice(roots, depth, direction))
         
-        # Framework principal
-        categories = categorize_dependencies(req_info) if req_info else {}
-        if categories:
-            main_categories = list(categories.keys())
-            if main_categories:
-                f.write(f"Este projeto parece ser um **aplicativo de {', '.join(main_categories)}**. ")
+        return self._send_error(404, f"endpoint não encontrado: {url.path}")
+    
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_json(self, data, status=200):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), SERVE_FORMATS["json"][1])
+    
+    def _send_error(self, status, message):
+        self._send_json({"erro": message}, status)
+    
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+def parse_serve_args(argv=None):
+    """Lê as opções do subcomando `serve`"""
+    parser = argparse.ArgumentParser(
+        prog="codescope360.py serve",
+        description="Servidor HTTP local que mantém projetos analisados em memória")
+    parser.add_argument("projects", nargs="*", default=["."], help="Diretórios dos projetos (padrão: .)")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Endereço de escuta (padrão: 127.0.0.1, apenas esta máquina)")
+    parser.add_argument("--port", type=int, default=8360, help="Porta (padrão: 8360)")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="Processos de análise (0 = um por núcleo)")
+    parser.add_argument("--refresh-interval", type=float, default=2.0, metavar="SEGUNDOS",
+                        help="Idade máxima do estado antes de uma nova verificação por stat (padrão: 2)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Não usar o cache incremental dos projetos")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="Padrão (estilo .gitignore) de caminhos a ignorar em todos os projetos")
+    parser.add_argument("--no-gitignore", action="store_true",
+                        help="Não aplicar os arquivos .gitignore dos projetos")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Não registrar cada requisição")
+    return parser.parse_args(argv)
+
+def serve_command(argv):
+    """Subcomando `serve`: analisa os projetos uma vez e responde a relatórios sob demanda"""
+    args = parse_serve_args(argv)
+    discovery = {"excludes": args.exclude, "use_gitignore": not args.no_gitignore}
+    jobs = resolve_jobs(args.jobs)
+    set_module_resolver(ModuleResolver())
+    
+    projects = {}
+    for root in args.projects:
+        if not os.path.isdir(root):
+            print(f"Erro: diretório não encontrado: {root}")
+            sys.exit(1)
+        label = os.path.basename(os.path.abspath(root)) or "projeto"
+        # Projetos com o mesmo nome de diretório recebem sufixos, como no modo batch
+        name = label
+        suffix = 2
+        while name in projects:
+            name = f"{label}_{suffix}"
+            suffix += 1
         
-        # Tamanho do projeto
-        if len(files_info) <= 5:
-            f.write("É um projeto pequeno com poucos arquivos. ")
-        elif len(files_info) <= 15:
-            f.write("É um projeto de tamanho médio. ")
+        cache = None
+        if not args.no_cache:
+            try:
+                cache = AnalysisCache(root)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Aviso: cache desativado para {root} ({e})")
+        project = ServedProject(name, root, discovery, jobs, cache, args.refresh_interval)
+        start = time.perf_counter()
+        project.refresh()
+        print(f"{name}: {len(project.state.files)} arquivos analisados em "
+              f"{time.perf_counter() - start:.2f}s")
+        projects[name] = project
+    
+    server = http.server.ThreadingHTTPServer((args.host, args.port), ServeHandler)
+    server.daemon_threads = True
+    server.projects = projects
+    server.quiet = args.quiet
+    print(f"Servindo em http://{args.host}:{server.server_address[1]}/ "
+          f"({', '.join(projects)}). Ctrl+C para encerrar.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServidor encerrado.")
+    finally:
+        server.server_close()
+        for project in projects.values():
+            project.close()
+
+def _content_key(record, use_sha=True):
+    """Identifica o conteúdo de um arquivo salvo: o hash, ou os dados analisados
+    
+    Análises anteriores ao hash por arquivo (sem "sha") são comparadas pelos
+    dados extraídos, o que também vale quando só um dos lados tem o hash.
+    """
+    if use_sha:
+        return record["sha"]
+    return json.dumps({key: value for key, value in record.items() if key not in ("path", "sha")},
+                      sort_keys=True, ensure_ascii=False)
+
+def _has_hashes(files):
+    """Indica se todos os registros de uma análise salva têm o hash do conteúdo"""
+    return all(record.get("sha") for record in files.values())
+
+def load_saved_scan(path):
+    """Lê um resultado salvo (--format json ou jsonl) para o subcomando `diff`
+    
+    Retorna {"label", "files": {caminho: registro}, "edges": {caminho: alvos}}.
+    """
+    files = {}
+    edges = {}
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            metadata = {}
+            for line in f:
+                record = json.loads(line)
+                kind = record.pop("record", None)
+                if kind == "scan":
+                    metadata = record
+                elif kind == "file":
+                    files[record["path"]] = record
+                elif kind == "relationship" and record["imports"]:
+                    edges[record["path"]] = record["imports"]
+                elif kind == "shard":
+                    raise ValueError(f"{path} é um shard; combine os shards com `merge` antes")
         else:
-            f.write("É um projeto grande com muitos arquivos e componentes. ")
-        
-        # Organização
-        if len(directories) > 3:
-            f.write("O código está organizado em múltiplos diretórios, sugerindo uma boa separação de componentes.")
+            metadata = json.load(f)
+            if not isinstance(metadata, dict) or "files" not in metadata:
+                raise ValueError(f"{path} não é um relatório JSON do CodeScope")
+            files = {record["path"]: record for record in metadata.pop("files")}
+            edges = {file_path: rel["imports"]
+                     for file_path, rel in metadata.get("relationships", {}).items() if rel["imports"]}
+    label = f"{metadata.get('project', os.path.basename(path))} ({metadata.get('generated_at', path)})"
+    return {"label": label, "files": files, "edges": edges}
+
+def live_scan(project_path, base, discovery=None, jobs=1):
+    """Estado atual de um projeto, analisando só os arquivos cujo hash difere de `base`
+    
+    Arquivos com o mesmo conteúdo de um registro de `base` (no mesmo caminho
+    ou movidos) reaproveitam o registro salvo; os demais são analisados.
+    """
+    python_files = find_python_files(project_path, **(discovery or {}))
+    set_module_resolver(ModuleResolver(project_module_names(python_files)))
+    by_key = {}
+    if _has_hashes(base["files"]):
+        for record in base["files"].values():
+            by_key.setdefault(record["sha"], record)
+    
+    files = {}
+    reused = set()
+    to_analyze = []
+    for file_path in python_files:
+        try:
+            data = read_source(os.path.join(project_path, file_path))
+        except OSError:
+            to_analyze.append(file_path)
+            continue
+        digest = file_digest(data)
+        _close_source(data)
+        record = by_key.get(digest)
+        if record is None:
+            to_analyze.append(file_path)
         else:
-            f.write("O código está organizado em poucos diretórios.")
-        
-        f.write("\n\n---\n\n")
-        f.write("*Relatório gerado por CodeScope 360 - Análise estruturada de projetos Python*")
+            files[file_path] = record if record["path"] == file_path else {**record, "path": file_path}
+            reused.add(file_path)
+    for file_info in analyze_files(to_analyze, project_path, jobs):
+        files[file_info.path] = file_info.to_dict()
+    
+    # Com o mesmo conjunto de caminhos, arquivos inalterados mantêm as mesmas arestas
+    same_paths = set(python_files) == set(base["files"])
+    module_index = build_module_index(python_files)
+    edges = {}
+    for file_path in python_files:
+        if same_paths and file_path in reused and base["files"][file_path]["path"] == file_path:
+            targets = base["edges"].get(file_path, [])
+        else:
+            imports = files[file_path].get("imports", {})
+            targets = resolve_file_edges(
+                FileInfo(file_path, imports=ImportSet(project=imports.get("project", ()))), module_index)
+        if targets:
+            edges[file_path] = targets
+    label = f"{os.path.basename(os.path.abspath(project_path))} (árvore atual)"
+    return {"label": label, "files": {path: files[path] for path in python_files}, "edges": edges,
+            "analyzed": len(to_analyze)}
+
+def _symbols(record):
+    """Símbolos de um arquivo salvo: {(tipo, nome): docstring}"""
+    symbols = {}
+    for cls in record.get("classes", ()):
+        symbols[("classe", cls["name"])] = cls.get("docstring")
+        for method in cls.get("methods", ()):
+            symbols[("método", f"{cls['name']}.{method['name']}")] = method.get("docstring")
+    for func in record.get("functions", ()):
+        symbols[("função", func["name"])] = func.get("docstring")
+    for category, names in record.get("imports", {}).items():
+        for name in names:
+            symbols[("importação", name)] = category
+    return symbols
+
+def _symbol_changes(old_record, new_record):
+    """Símbolos adicionados, removidos e alterados entre duas versões de um arquivo"""
+    old = _symbols(old_record) if old_record else {}
+    new = _symbols(new_record) if new_record else {}
+    item = lambda key: {"kind": key[0], "name": key[1]}
+    return {"added": [item(key) for key in new if key not in old],
+            "removed": [item(key) for key in old if key not in new],
+            "changed": [item(key) for key in new if key in old and old[key] != new[key]]}
+
+def diff_scans(old, new):
+    """Compara dois estados de análise (load_saved_scan / live_scan)
+    
+    Arquivos são pareados pelo caminho e pelo hash do conteúdo: pares com o
+    mesmo hash são pulados sem comparar símbolos, e um arquivo removido com
+    o mesmo hash de um novo conta como movido. Apenas os arquivos alterados
+    têm símbolos e pontos de entrada comparados; as arestas de todos os
+    arquivos só são comparadas quando o conjunto de caminhos muda.
+    """
+    old_files, new_files = old["files"], new["files"]
+    use_sha = _has_hashes(old_files) and _has_hashes(new_files)
+    added = [path for path in new_files if path not in old_files]
+    removed = [path for path in old_files if path not in new_files]
+    changed = [path for path in new_files if path in old_files
+               and _content_key(old_files[path], use_sha) != _content_key(new_files[path], use_sha)]
+    
+    # Movidos: mesmo conteúdo em um caminho removido e em um novo
+    removed_by_key = {}
+    for path in removed:
+        removed_by_key.setdefault(_content_key(old_files[path], use_sha), []).append(path)
+    moved = []
+    for path in added:
+        candidates = removed_by_key.get(_content_key(new_files[path], use_sha))
+        if candidates:
+            moved.append([candidates.pop(0), path])
+    moved_from = {source for source, _ in moved}
+    moved_to = {target for _, target in moved}
+    added = [path for path in added if path not in moved_to]
+    removed = [path for path in removed if path not in moved_from]
+    
+    symbols = []
+    for path in sorted(changed):
+        symbols.append({"path": path, "status": "alterado",
+                        **_symbol_changes(old_files[path], new_files[path])})
+    for path in sorted(added):
+        symbols.append({"path": path, "status": "novo", **_symbol_changes(None, new_files[path])})
+    for path in sorted(removed):
+        symbols.append({"path": path, "status": "removido", **_symbol_changes(old_files[path], None)})
+    symbols = [entry for entry in symbols if entry["added"] or entry["removed"] or entry["changed"]]
+    
+    touched_old = set(changed) | set(removed) | moved_from
+    touched_new = set(changed) | set(added) | moved_to
+    old_entries = {(ep["path"], ep["type"]) for ep in identify_entry_points(
+        FileInfo.from_dict(old_files[path]) for path in touched_old)}
+    new_entries = {(ep["path"], ep["type"]) for ep in identify_entry_points(
+        FileInfo.from_dict(new_files[path]) for path in touched_new)}
+    
+    if set(old_files) == set(new_files):
+        edge_paths = changed
+    else:
+        edge_paths = set(old["edges"]) | set(new["edges"])
+    old_edges = {(source, target) for source in edge_paths for target in old["edges"].get(source, ())}
+    new_edges = {(source, target) for source in edge_paths for target in new["edges"].get(source, ())}
+    lost = sorted(old_edges - new_edges)
+    
+    return {
+        "old": old["label"],
+        "new": new["label"],
+        "files": {"added": sorted(added), "removed": sorted(removed), "changed": sorted(changed),
+                  "moved": sorted(moved), "unchanged": len(new_files) - len(added) - len(changed)
+                  - len(moved), "total_old": len(old_files), "total_new": len(new_files)},
+        "symbols": symbols,
+        "entry_points": {
+            "added": [{"path": path, "type": kind} for path, kind in sorted(new_entries - old_entries)],
+            "removed": [{"path": path, "type": kind} for path, kind in sorted(old_entries - new_entries)]},
+        "edges": {
+            "added": [list(edge) for edge in sorted(new_edges - old_edges)],
+            # Quebradas: o arquivo ainda existe, mas o arquivo que ele importava não
+            "broken": [list(edge) for edge in lost if edge[0] in new_files and edge[1] not in new_files],
+            "removed": [list(edge) for edge in lost
+                        if not (edge[0] in new_files and edge[1] not in new_files)]}
+    }
+
+# Marcadores das mudanças no relatório Markdown do diff
+DIFF_MARKERS = {"added": "➕", "removed": "➖", "changed": "✏️"}
+
+def render_diff_markdown(result, limit=None):
+    """Renderiza o resultado de diff_scans em Markdown (`limit` = máximo de itens por lista)"""
+    files = result["files"]
+    edges = result["edges"]
+    entry_points = result["entry_points"]
+    parts = ["# Diferenças entre Análises\n\n",
+             f"*Gerado por CodeScope 360 em {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}*\n\n",
+             f"**Base:** `{result['old']}` ({files['total_old']} arquivos) → "
+             f"**Alvo:** `{result['new']}` ({files['total_new']} arquivos)\n\n",
+             f"**Arquivos:** {len(files['added'])} novos, {len(files['removed'])} removidos, "
+             f"{len(files['changed'])} alterados, {len(files['moved'])} movidos, "
+             f"{files['unchanged']} idênticos\n\n"]
+    
+    def write_list(title, items, render):
+        if not items:
+            return
+        parts.append(f"### {title}\n\n")
+        shown, omitted = _capped(items, limit)
+        for item in shown:
+            parts.append(f"- {render(item)}\n")
+        if omitted:
+            parts.append(f"- ... e mais {omitted}\n")
+        parts.append("\n")
+    
+    if files["added"] or files["removed"] or files["changed"] or files["moved"]:
+        parts.append("## Arquivos\n\n")
+        write_list("Novos", files["added"], lambda path: f"`{path}`")
+        write_list("Removidos", files["removed"], lambda path: f"`{path}`")
+        write_list("Alterados", files["changed"], lambda path: f"`{path}`")
+        write_list("Movidos", files["moved"], lambda pair: f"`{pair[0]}` → `{pair[1]}`")
+    
+    if result["symbols"]:
+        parts.append("## Símbolos\n\n")
+        entries, omitted = _capped(result["symbols"], limit)
+        for entry in entries:
+            parts.append(f"### 📄 {entry['path']} ({entry['status']})\n\n")
+            for change in ("added", "removed", "changed"):
+                items, rest = _capped(entry[change], limit)
+                for item in items:
+                    suffix = ""
+                    if change == "changed":
+                        suffix = " (categoria alterada)" if item["kind"] == "importação" else " (docstring alterada)"
+                    parts.append(f"- {DIFF_MARKERS[change]} {item['kind']} `{item['name']}`{suffix}\n")
+                if rest:
+                    parts.append(f"- {DIFF_MARKERS[change]} ... e mais {rest}\n")
+            parts.append("\n")
+        if omitted:
+            parts.append(f"*... e mais {omitted} arquivos com símbolos alterados*\n\n")
+    
+    if entry_points["added"] or entry_points["removed"]:
+        parts.append("## Pontos de Entrada\n\n")
+        for change in ("added", "removed"):
+            for ep in entry_points[change]:
+                parts.append(f"- {DIFF_MARKERS[change]} **{ep['path']}** - {ep['type']}\n")
+        parts.append("\n")
+    
+    if edges["added"] or edges["removed"] or edges["broken"]:
+        parts.append("## Arestas de Importação\n\n")
+        render_edge = lambda edge: f"`{edge[0]}` → `{edge[1]}`"
+        write_list("Novas", edges["added"], render_edge)
+        write_list("Removidas", edges["removed"], render_edge)
+        write_list("⚠️ Quebradas (o arquivo importado não existe mais)", edges["broken"], render_edge)
     
-    return report_file
+    if not (result["symbols"] or any(files[key] for key in ("added", "removed", "changed", "moved"))
+            or any(entry_points.values()) or any(edges.values())):
+        parts.append("Nenhuma diferença estrutural encontrada.\n")
+    return "".join(parts)
+
+def parse_diff_args(argv=None):
+    """Lê as opções do subcomando `diff`"""
+    parser = argparse.ArgumentParser(
+        prog="codescope360.py diff",
+        description="Compara duas análises salvas (JSON/JSONL) ou uma análise salva e a árvore atual")
+    parser.add_argument("old", help="Análise base (.json ou .jsonl gerado com --format)")
+    parser.add_argument("new", help="Análise alvo (.json ou .jsonl) ou diretório do projeto (árvore atual)")
+    parser.add_argument("-f", "--format", type=parse_formats, default=["markdown"],
+                        help="Formatos de saída: markdown, json (padrão: markdown)")
+    parser.add_argument("-o", "--output-dir", default=".",
+                        help="Diretório do relatório (padrão: diretório atual)")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="Processos de análise da árvore atual (0 = um por núcleo)")
+    parser.add_argument("--max-items", type=int, default=0, metavar="N",
+                        help="Máximo de itens por lista no Markdown (padrão: 0 = sem limite)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="Padrão (estilo .gitignore) de caminhos a ignorar na árvore atual")
+    parser.add_argument("--no-gitignore", action="store_true",
+                        help="Não aplicar os arquivos .gitignore na árvore atual")
+    args = parser.parse_args(argv)
+    unsupported = [name for name in args.format if name not in ("markdown", "json")]
+    if unsupported:
+        parser.error(f"formato não suportado pelo diff: {', '.join(unsupported)} (use markdown ou json)")
+    return args
+
+def diff_command(argv):
+    """Subcomando `diff`: diferenças estruturais entre duas análises"""
+    args = parse_diff_args(argv)
+    start = time.perf_counter()
+    try:
+        old = load_saved_scan(args.old)
+        if os.path.isdir(args.new):
+            discovery = {"excludes": args.exclude, "use_gitignore": not args.no_gitignore}
+            new = live_scan(args.new, old, discovery, args.jobs)
+            print(f"Árvore atual: {len(new['files'])} arquivos, {new['analyzed']} analisados "
+                  f"(os demais têm o mesmo hash da base)")
+        else:
+            new = load_saved_scan(args.new)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Erro: {e}")
+        sys.exit(1)
+    result = diff_scans(old, new)
+    
+    files = result["files"]
+    print(f"{len(files['added'])} novo(s), {len(files['removed'])} removido(s), "
+          f"{len(files['changed'])} alterado(s), {len(files['moved'])} movido(s), "
+          f"{files['unchanged']} idêntico(s); {len(result['edges']['added'])} aresta(s) nova(s), "
+          f"{len(result['edges']['broken'])} quebrada(s) em {time.perf_counter() - start:.2f}s")
+    
+    os.makedirs(args.output_dir, exist_ok=True)
+    base = os.path.join(args.output_dir, f"codescope_diff_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    report_files = []
+    if "markdown" in args.format:
+        with open(base + ".md", "w", encoding="utf-8") as f:
+            f.write(render_diff_markdown(result, args.max_items or None))
+        report_files.append(base + ".md")
+    if "json" in args.format:
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump({"tool": "CodeScope 360", "version": __version__,
+                       "generated_at": datetime.now().isoformat(timespec="seconds"), **result},
+                      f, ensure_ascii=False, indent=2)
+        report_files.append(base + ".json")
+    print(f"Relatório salvo em: {', '.join(report_files)}")
+
+# Subcomandos reconhecidos no primeiro argumento (o restante segue para o parser de cada um)
+COMMANDS = {
+    "bench": bench_command,
+    "batch": batch_command,
+    "diff": diff_command,
+    "merge": merge_command,
+    "query": query_command,
+    "serve": serve_command
+}
 
 def main():
     """Função principal do programa"""
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+    
     print("CodeScope 360 - Análise Estruturada de Projetos Python")
     print("-" * 60)
     
+    args = parse_args()
+    
     # Obter caminho do projeto
-    project_path = get_project_path()
+    project_path = get_project_path(args.project_path)
     print(f"Analisando projeto em: {project_path}")
     
+    profiler = None
+    if args.profile or args.profile_out:
+        profiler = Profiler(slowest=args.profile_top)
+        set_profiler(profiler)
+    cprofile = None
+    if args.profile_out:
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+    
+    set_summary_threshold(int(args.summary_threshold * 1024 * 1024))
+    set_resource_guards(ResourceGuards(args.parse_timeout, args.max_nodes, args.worker_max_files))
+    set_render_options(RenderOptions(args.sections, args.max_section_items, args.max_file_items,
+                                     int(args.split_size * 1024 * 1024)))
+    
     # Encontrar arquivos Python
-    python_files = find_python_files(project_path)
+    discovery = {
+        "excludes": args.exclude,
+        "includes": args.include,
+        "use_gitignore": not args.no_gitignore,
+        "default_excludes": not args.no_default_excludes,
+        "follow_symlinks": args.follow_symlinks
+    }
+    if is_archive(project_path):
+        if args.watch or args.since or args.diff or args.shard or args.index:
+            print("Erro: arquivos compactados não aceitam --watch, --since, --diff, --shard nem --index")
+            sys.exit(1)
+        try:
+            report_files = run_archive_scan(project_path, discovery, args.format, resolve_jobs(args.jobs))
+        except (OSError, ValueError, zipfile.BadZipFile, tarfile.TarError) as e:
+            print(f"Erro ao ler {project_path}: {e}")
+            sys.exit(1)
+        print("-" * 60)
+        print(f"Análise concluída! Relatório salvo em: {', '.join(report_files)}")
+        return
+    
+    fs = LatencyFS(args.simulate_latency / 1000) if args.simulate_latency > 0 else None
+    with profile_stage("discovery"):
+        if args.async_io:
+            python_files = asyncio.run(async_find_python_files(
+                project_path, **discovery, fs=fs, io_limit=args.io_limit))
+        else:
+            python_files = find_python_files(project_path, **discovery, fs=fs)
     if not python_files:
         print("Nenhum arquivo Python encontrado no projeto!")
         sys.exit(1)
     
     print(f"Encontrados {len(python_files)} arquivos Python.")
     
+    # Índice de módulos (biblioteca padrão, instalados e projeto) montado uma única vez
+    with profile_stage("resolver"):
+        set_module_resolver(ModuleResolver(project_module_names(python_files)))
+    
     # Analisar requirements.txt
     req_path = find_requirements_file(project_path)
     req_info = None
     if req_path:
         print("Analisando requirements.txt...")
-        req_info = parse_requirements(req_path)
+        with profile_stage("requirements"):
+            req_info = parse_requirements(req_path)
     
     # Analisar cada arquivo Python
-    print("Analisando arquivos Python...")
-    files_info = []
-    for i, file_path in enumerate(python_files):
-        print(f"  [{i+1}/{len(python_files)}] {file_path}")
-        file_info = analyze_python_file(file_path, project_path)
-        files_info.append(file_info)
+    cache = None
+    if not args.no_cache:
+        try:
+            cache = AnalysisCache(project_path, args.cache_dir)
+            if args.clear_cache:
+                cache.clear()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Aviso: cache desativado ({e})")
+    
+    if args.shard:
+        report_file = run_shard_scan(project_path, python_files, req_info, args.shard,
+                                     resolve_jobs(args.jobs), cache, fs)
+        if cache is not None:
+            cache.close()
+        print("-" * 60)
+        print(f"Shard concluído! Resultado parcial salvo em: {report_file}")
+        return
+    
+    if args.watch:
+        watch_project(project_path, discovery, args.format, req_info, resolve_jobs(args.jobs),
+                      cache, args.watch_interval, use_inotify=not args.poll)
+        if cache is not None:
+            cache.close()
+        return
+    
+    if args.since or args.diff:
+        try:
+            report_files = run_delta_scan(project_path, discovery, args.format, req_info,
+                                          args.since, args.diff, resolve_jobs(args.jobs), cache)
+        except GitError as e:
+            print(f"Erro: {e}")
+            sys.exit(1)
+        finally:
+            if cache is not None:
+                cache.close()
+        print("-" * 60)
+        print(f"Análise delta concluída! Relatório salvo em: {', '.join(report_files)}")
+        return
+    
+    # Cada resultado é gravado assim que chega; só os agregados ficam em memória
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    writers = [REPORT_WRITERS[name](project_path, req_info, timestamp=timestamp)
+               for name in args.format]
+    jobs = resolve_jobs(args.jobs)
+    print(f"Analisando arquivos Python ({jobs} processo{'s' if jobs > 1 else ''})...")
+    
+    index = None
+    if args.index:
+        try:
+            index = SymbolIndex.for_project(project_path, args.cache_dir)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Aviso: índice de símbolos desativado ({e})")
+    
+    def consume(i, file_info):
+        print(f"  [{i+1}/{len(python_files)}] {file_info.path}")
+        with profile_stage("write"):
+            for writer in writers:
+                writer.add(file_info)
+            if index is not None:
+                index.add(file_info)
+    
+    analysis_start = time.perf_counter()
+    contents = ContentIndex(cache=cache)
+    if args.async_io:
+        asyncio.run(async_analyze_files(python_files, project_path, consume, jobs, cache, fs,
+                                        args.io_limit, contents))
+    else:
+        for i, file_info in enumerate(analyze_files(python_files, project_path, jobs,
+                                                    cache=cache, fs=fs, contents=contents)):
+            consume(i, file_info)
+    if profiler is not None:
+        profiler.record("analysis", time.perf_counter() - analysis_start)
+    
+    # Cada arquivo conta uma vez: analisado, lido do cache ou cópia de um conteúdo idêntico
+    cached = cache.hits if cache is not None else 0
+    reused = cached + contents.hits
+    print(f"Arquivos: {len(python_files) - reused} analisados, {reused} reaproveitados "
+          f"({cached} do cache, {contents.hits} de cópias idênticas)")
+    if cache is not None:
+        pruned = cache.prune(python_files)
+        cache.close()
+        if pruned:
+            print(f"Cache: {pruned} entrada(s) removida(s)")
+    if index is not None:
+        with profile_stage("index"):
+            pruned = index.prune(python_files)
+            stats = index.stats()
+            index.close()
+        print(f"Índice de símbolos: {stats['symbols']} símbolos, {stats['imports']} importações "
+              f"({index.updated} arquivo(s) atualizados" + (f", {pruned} removidos" if pruned else "")
+              + f") em {index.db_path}")
     
     # Mapear relacionamentos entre arquivos
     print("Mapeando relacionamentos entre arquivos...")
-    relationships = map_import_relationships(files_info)
+    with profile_stage("relationships"):
+        relationships = map_import_relationships(writers[0].graph_nodes)
+    with profile_stage("graph"):
+        # Só Markdown sem a seção "graph": o grafo não é calculado
+        graph_stats = graph_stats_for(writers, relationships)
+    if graph_stats["cycles"]:
+        print(f"Atenção: {len(graph_stats['cycles'])} ciclo(s) de importação encontrado(s).")
     
     # Gerar relatório
     print("Gerando relatório...")
-    report_file = generate_report(project_path, files_info, req_info, relationships)
+    report_files = []
+    for writer in writers:
+        # O perfil no relatório cobre as etapas concluídas até aqui
+        writer.profile = profiler
+        with profile_stage("summary"):
+            report_files.append(writer.finish(relationships, graph_stats))
+    
+    if cprofile is not None:
+        cprofile.disable()
+        cprofile.dump_stats(args.profile_out)
     
     print("-" * 60)
-    print(f"Análise concluída! Relatório salvo em: {report_file}")
+    print(f"Análise concluída! Relatório salvo em: {', '.join(report_files)}")
+    if profiler is not None:
+        print()
+        print(profiler.render_text())
+        if args.profile_out:
+            print(f"\nPerfil cProfile salvo em: {args.profile_out} (python -m pstats {args.profile_out})")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
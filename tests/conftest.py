@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import codescope360
+
+
+@pytest.fixture
+def write_tree(tmp_path):
+    """Cria arquivos a partir de {caminho relativo: conteúdo} e retorna o diretório"""
+    def write(files, root=None):
+        root = root or tmp_path
+        for path, content in files.items():
+            full_path = root / path
+            full_path.parent.mkdir(parents=True, exist_ok=True)
+            full_path.write_text(content, encoding="utf-8")
+        return root
+    return write
+
+
+@pytest.fixture(autouse=True)
+def reset_run_options():
+    """Volta as opções globais da execução ao padrão depois de cada teste"""
+    yield
+    codescope360.set_resource_guards(None)
+    codescope360.set_summary_threshold(None)
+    codescope360.set_render_options(None)
@@ -0,0 +1,75 @@
+import codescope360 as cs
+
+
+def _module(index, functions):
+    return f'"""Módulo {index}"""\n' + "".join(
+        f"def f{index}_{i}(a):\n    return a * {i}\n\n" for i in range(functions))
+
+
+def test_parallel_results_match_sequential_and_keep_order(write_tree):
+    files = {f"pkg/m{i}.py": _module(i, 3) for i in range(12)}
+    # Grande o bastante para ser lido com mmap e enviado ao pool pelo caminho
+    files["pkg/big.py"] = _module(99, 8000)
+    root = write_tree(files)
+    paths = sorted(files)
+    assert (root / "pkg/big.py").stat().st_size >= cs.MMAP_THRESHOLD
+
+    sequential = list(cs.analyze_files(paths, str(root), jobs=1))
+    parallel = list(cs.analyze_files(paths, str(root), jobs=2, chunksize=2))
+
+    assert [info.path for info in parallel] == paths
+    assert [info.to_dict() for info in parallel] == [info.to_dict() for info in sequential]
+    big = parallel[paths.index("pkg/big.py")]
+    assert len(big.functions) == 8000
+    assert big.sha == cs.file_digest((root / "pkg/big.py").read_bytes())
+
+
+def test_identical_contents_are_parsed_once(write_tree):
+    source = _module(1, 2)
+    root = write_tree({"a.py": source, "b/a.py": source, "c.py": _module(2, 1)})
+    contents = cs.ContentIndex()
+    results = list(cs.analyze_files(["a.py", "b/a.py", "c.py"], str(root), contents=contents))
+
+    assert [info.path for info in results] == ["a.py", "b/a.py", "c.py"]
+    assert results[1].sha == results[0].sha
+    assert results[1].functions == results[0].functions
+    assert contents.hits == 1
+
+
+def test_content_index_is_bounded_by_estimated_size():
+    infos = [cs.analyze_bytes(_module(i, 20).encode(), f"m{i}.py") for i in range(10)]
+    size = cs._result_size(infos[0])
+    contents = cs.ContentIndex(capacity=size * 3)
+    for info in infos:
+        contents.put(info)
+
+    assert contents.get(infos[0].sha, "x.py") is None
+    copy = contents.get(infos[-1].sha, "x.py")
+    assert copy.path == "x.py" and copy.functions == infos[-1].functions
+    assert contents._size <= contents.capacity
+
+
+def test_content_index_with_cache_keeps_only_digests(write_tree, tmp_path):
+    source = _module(1, 2)
+    root = write_tree({"a.py": source, "b.py": source, "c.py": source})
+    cache = cs.AnalysisCache(str(root), str(tmp_path / "cache"))
+    contents = cs.ContentIndex(cache=cache)
+    results = list(cs.analyze_files(["a.py", "b.py", "c.py"], str(root), cache=cache,
+                                    contents=contents))
+    cache.close()
+
+    assert all(entry[0] is None for entry in contents._results.values())
+    assert [info.path for info in results] == ["a.py", "b.py", "c.py"]
+    assert results[2].functions == results[0].functions
+    assert contents.hits == 2
+
+
+def test_copies_are_not_counted_as_cache_misses(write_tree, tmp_path):
+    source = _module(1, 2)
+    root = write_tree({"a.py": source, "b.py": source, "c.py": _module(2, 1)})
+    cache = cs.AnalysisCache(str(root), str(tmp_path / "cache"))
+    contents = cs.ContentIndex(cache=cache)
+    list(cs.analyze_files(["a.py", "b.py", "c.py"], str(root), cache=cache, contents=contents))
+
+    assert (cache.hits, cache.misses, contents.hits) == (0, 2, 1)
+    cache.close()
@@ -0,0 +1,102 @@
+import os
+
+import codescope360 as cs
+
+
+def _scan(root, cache_dir, paths):
+    """Analisa com um cache novo (como uma execução da CLI) e retorna (resultados, cache)"""
+    cache = cs.AnalysisCache(str(root), str(cache_dir))
+    results = {info.path: info for info in cs.analyze_files(paths, str(root), cache=cache)}
+    cache.prune(paths)
+    cache.close()
+    return results, cache
+
+
+def _touch(path, offset):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + offset))
+
+
+def test_unchanged_files_are_served_from_cache(write_tree, tmp_path):
+    root = write_tree({"a.py": "def f():\n    pass\n", "b.py": "class C:\n    pass\n"})
+    first, cache = _scan(root, tmp_path / "cache", ["a.py", "b.py"])
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    second, cache = _scan(root, tmp_path / "cache", ["a.py", "b.py"])
+    assert (cache.hits, cache.misses) == (2, 0)
+    assert [info.to_dict() for info in second.values()] == [info.to_dict() for info in first.values()]
+
+
+def test_edit_invalidates_only_the_changed_file(write_tree, tmp_path):
+    root = write_tree({"a.py": "def f():\n    pass\n", "b.py": "def g():\n    pass\n"})
+    _scan(root, tmp_path / "cache", ["a.py", "b.py"])
+
+    (root / "a.py").write_text("def f():\n    pass\n\ndef h():\n    pass\n", encoding="utf-8")
+    _touch(root / "a.py", 10**9)
+    results, cache = _scan(root, tmp_path / "cache", ["a.py", "b.py"])
+
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert [function.name for function in results["a.py"].functions] == ["f", "h"]
+
+
+def test_same_content_with_new_mtime_is_a_hit_and_updates_the_signature(write_tree, tmp_path):
+    root = write_tree({"a.py": "def f():\n    pass\n"})
+    _scan(root, tmp_path / "cache", ["a.py"])
+
+    _touch(root / "a.py", 10**9)
+    _, cache = _scan(root, tmp_path / "cache", ["a.py"])
+    assert (cache.hits, cache.misses) == (1, 0)
+
+    # A assinatura nova foi gravada: a próxima execução nem relê o arquivo
+    cache = cs.AnalysisCache(str(root), str(tmp_path / "cache"))
+    assert cache.matches_stat("a.py", os.stat(root / "a.py"))
+    cache.close()
+
+
+def test_version_change_discards_the_cache(write_tree, tmp_path, monkeypatch):
+    root = write_tree({"a.py": "def f():\n    pass\n"})
+    _scan(root, tmp_path / "cache", ["a.py"])
+
+    monkeypatch.setattr(cs, "__version__", cs.__version__ + ".test")
+    cache = cs.AnalysisCache(str(root), str(tmp_path / "cache"))
+    assert not cache.matches_stat("a.py", os.stat(root / "a.py"))
+    assert cache.load("a.py") is None
+    cache.close()
+
+    _, cache = _scan(root, tmp_path / "cache", ["a.py"])
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_stored_content_is_reused_under_another_path(write_tree, tmp_path):
+    source = '"""Cópia."""\ndef f():\n    pass\n'
+    root = write_tree({"a.py": source})
+    first, _ = _scan(root, tmp_path / "cache", ["a.py"])
+
+    write_tree({"vendor/a.py": source})
+    results, cache = _scan(root, tmp_path / "cache", ["a.py", "vendor/a.py"])
+
+    copy = results["vendor/a.py"]
+    # a.py vem do cache; a cópia é reaproveitada pelo hash, sem contar como analisada
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert copy.path == "vendor/a.py"
+    assert copy.sha == first["a.py"].sha
+    assert copy.functions == first["a.py"].functions and copy.docstring == "Cópia."
+
+    cache = cs.AnalysisCache(str(root), str(tmp_path / "cache"))
+    assert cache.load_content(copy.sha, "other.py").path == "other.py"
+    assert cache.load_content(cs.file_digest(b"outro"), "other.py") is None
+    cache.close()
+
+
+def test_errors_are_not_stored_and_deleted_files_are_pruned(write_tree, tmp_path):
+    root = write_tree({"ok.py": "x = 1\n", "bad.py": "def (:\n", "gone.py": "y = 2\n"})
+    _scan(root, tmp_path / "cache", ["ok.py", "bad.py", "gone.py"])
+
+    os.remove(root / "gone.py")
+    _, cache = _scan(root, tmp_path / "cache", ["ok.py", "bad.py"])
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache = cs.AnalysisCache(str(root), str(tmp_path / "cache"))
+    assert cache.load("gone.py") is None
+    assert cache.load("bad.py") is None
+    cache.close()
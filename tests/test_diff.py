@@ -0,0 +1,131 @@
+import glob
+import os
+import subprocess
+import sys
+
+import pytest
+
+import codescope360 as cs
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "codescope360.py")
+
+OLD_TREE = {
+    "pkg/__init__.py": "",
+    "pkg/core.py": (
+        '"""Núcleo."""\n'
+        "class Engine:\n"
+        '    def run(self):\n        """Executa."""\n\n'
+        "def helper():\n    pass\n"
+    ),
+    "pkg/util.py": "def fmt(value):\n    return str(value)\n",
+    "app.py": "import pkg.core\n\nif __name__ == '__main__':\n    pkg.core.Engine().run()\n",
+    "old_name.py": "def moved():\n    pass\n",
+}
+
+NEW_TREE = {
+    "pkg/__init__.py": "",
+    "pkg/core.py": (
+        '"""Núcleo."""\n'
+        "class Engine:\n"
+        '    def run(self):\n        """Executa o motor."""\n\n'
+        "    def stop(self):\n        pass\n\n"
+        "def build():\n    pass\n"
+    ),
+    "pkg/util.py": "def fmt(value):\n    return str(value)\n",
+    "app.py": ("import pkg.core\nfrom pkg import util\n\n"
+               "if __name__ == '__main__':\n    pkg.core.Engine().run()\n"),
+    "new_name.py": "def moved():\n    pass\n",
+    "cli.py": "import sys\n\nif __name__ == '__main__':\n    sys.exit(0)\n",
+}
+
+
+def _save_scan(write_tree, root, files, fmt):
+    """Grava a árvore `files` em `root` e salva uma análise no formato pedido"""
+    project = root / "proj"
+    if project.exists():
+        for path in glob.glob(str(project / "**" / "*.py"), recursive=True):
+            os.remove(path)
+    write_tree(files, project)
+    out = root / f"out_{len(list(root.glob('out_*')))}"
+    out.mkdir()
+    subprocess.run([sys.executable, SCRIPT, str(project), "-f", fmt, "--no-cache"],
+                   cwd=out, check=True, capture_output=True)
+    return project, glob.glob(str(out / f"*.{fmt}"))[0]
+
+
+@pytest.fixture
+def scans(write_tree, tmp_path):
+    _, old_json = _save_scan(write_tree, tmp_path, OLD_TREE, "json")
+    project, new_json = _save_scan(write_tree, tmp_path, NEW_TREE, "json")
+    return project, old_json, new_json
+
+
+def _expected_symbols():
+    return [
+        {"path": "pkg/core.py", "status": "alterado",
+         "added": [{"kind": "método", "name": "Engine.stop"}, {"kind": "função", "name": "build"}],
+         "removed": [{"kind": "função", "name": "helper"}],
+         "changed": [{"kind": "método", "name": "Engine.run"}]},
+        {"path": "app.py", "status": "alterado",
+         "added": [{"kind": "importação", "name": "pkg.util"}], "removed": [], "changed": []},
+        {"path": "cli.py", "status": "novo",
+         "added": [{"kind": "importação", "name": "sys"}], "removed": [], "changed": []},
+    ]
+
+
+def test_diff_of_saved_scans(scans):
+    _, old_json, new_json = scans
+    diff = cs.diff_scans(cs.load_saved_scan(old_json), cs.load_saved_scan(new_json))
+
+    assert diff["files"] == {"added": ["cli.py"], "removed": [], "changed": ["app.py", "pkg/core.py"],
+                             "moved": [["old_name.py", "new_name.py"]], "unchanged": 2,
+                             "total_old": 5, "total_new": 6}
+    assert sorted(diff["symbols"], key=lambda e: e["path"]) == sorted(
+        _expected_symbols(), key=lambda e: e["path"])
+    assert {entry["path"] for entry in diff["entry_points"]["added"]} == {"cli.py"}
+    assert diff["entry_points"]["removed"] == []
+    assert diff["edges"] == {"added": [["app.py", "pkg/util.py"]], "broken": [], "removed": []}
+
+
+def test_jsonl_and_live_scans_give_the_same_diff(scans, write_tree, tmp_path):
+    project, old_json, new_json = scans
+    expected = cs.diff_scans(cs.load_saved_scan(old_json), cs.load_saved_scan(new_json))
+    _, old_jsonl = _save_scan(write_tree, tmp_path, OLD_TREE, "jsonl")
+    write_tree(NEW_TREE, project)
+    os.remove(project / "old_name.py")
+
+    old = cs.load_saved_scan(old_jsonl)
+    live = cs.live_scan(str(project), old)
+    diff = cs.diff_scans(old, live)
+
+    # Só os arquivos cujo hash não está na análise salva são analisados de novo
+    assert live["analyzed"] == 3
+    for key in ("files", "symbols", "entry_points", "edges"):
+        assert diff[key] == expected[key]
+
+
+def test_identical_hashes_are_skipped_without_comparing_symbols(scans, monkeypatch):
+    _, old_json, new_json = scans
+    compared = []
+    original = cs._symbol_changes
+
+    def spy(old_record, new_record):
+        compared.append((old_record or new_record)["path"])
+        return original(old_record, new_record)
+
+    monkeypatch.setattr(cs, "_symbol_changes", spy)
+    cs.diff_scans(cs.load_saved_scan(old_json), cs.load_saved_scan(new_json))
+    assert sorted(compared) == ["app.py", "cli.py", "pkg/core.py"]
+
+
+def test_removed_import_target_is_reported_as_broken_edge():
+    record = lambda path, sha, project=(): {
+        "path": path, "sha": sha, "classes": [], "functions": [],
+        "imports": {"standard_lib": [], "third_party": [], "project": list(project)}}
+    old = {"label": "a", "edges": {"app.py": ["lib.py"]},
+           "files": {"app.py": record("app.py", "1", ["lib.f"]), "lib.py": record("lib.py", "2")}}
+    new = {"label": "b", "edges": {}, "files": {"app.py": record("app.py", "1", ["lib.f"])}}
+    diff = cs.diff_scans(old, new)
+
+    assert diff["files"]["removed"] == ["lib.py"]
+    assert diff["edges"] == {"added": [], "broken": [["app.py", "lib.py"]], "removed": []}
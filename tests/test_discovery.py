@@ -0,0 +1,112 @@
+import pytest
+
+import codescope360 as cs
+
+
+def _ignored(patterns, path, is_dir=False):
+    return cs.IgnoreRules().extend("", patterns).is_ignored(path, is_dir)
+
+
+@pytest.mark.parametrize("pattern, path, is_dir, expected", [
+    # Nome simples: casa em qualquer nível
+    ("build", "build", True, True),
+    ("build", "src/build", True, True),
+    ("build", "src/build.py", False, False),
+    # Com "/" no início ou no meio: relativo ao diretório do .gitignore
+    ("/build", "build", True, True),
+    ("/build", "src/build", True, False),
+    ("docs/gen", "docs/gen", True, True),
+    ("docs/gen", "src/docs/gen", True, False),
+    # Só diretórios
+    ("out/", "out", True, True),
+    ("out/", "out", False, False),
+    ("out/", "pkg/out", True, True),
+    # Curingas
+    ("*.py", "pkg/mod.py", False, True),
+    ("*.py", "pkg/mod.pyc", False, False),
+    ("test_*.py", "tests/test_a.py", False, True),
+    ("src/*.py", "src/a.py", False, True),
+    ("src/*.py", "src/sub/a.py", False, False),
+    ("mod?.py", "mod1.py", False, True),
+    ("mod?.py", "mod10.py", False, False),
+    ("mod?.py", "mod/.py", False, False),
+    # **
+    ("**/gen", "gen", True, True),
+    ("**/gen", "a/b/gen", True, True),
+    ("a/**/b.py", "a/b.py", False, True),
+    ("a/**/b.py", "a/x/y/b.py", False, True),
+    ("a/**/b.py", "c/a/x/b.py", False, False),
+    ("vendor/**", "vendor/x/y.py", False, True),
+    ("vendor/**", "vendor", True, False),
+    # Classes de caracteres
+    ("mod[0-9].py", "mod7.py", False, True),
+    ("mod[0-9].py", "moda.py", False, False),
+    ("mod[!0-9].py", "moda.py", False, True),
+    ("mod[!0-9].py", "mod7.py", False, False),
+    ("mod[!0-9].py", "mod/.py", False, False),
+    ("mod[ab\\]].py", "mod].py", False, True),
+    ("mod[]a].py", "mod].py", False, True),
+    ("mod[a-c].py", "modb.py", False, True),
+    ("mod[a-c].py", "mod-.py", False, False),
+    # Escapes
+    ("\\#notes.py", "#notes.py", False, True),
+    ("\\!bang.py", "!bang.py", False, True),
+    ("file\\*.py", "file*.py", False, True),
+    ("file\\*.py", "fileX.py", False, False),
+    # Comentários e linhas vazias não são regras
+    ("# build", "# build", False, False),
+    ("", "anything", False, False),
+])
+def test_pattern_forms(pattern, path, is_dir, expected):
+    assert _ignored([pattern], path, is_dir) is expected
+
+
+@pytest.mark.parametrize("patterns, path, expected", [
+    (["*.py", "!keep.py"], "keep.py", False),
+    (["*.py", "!keep.py"], "other.py", True),
+    # A última regra que casa prevalece
+    (["!keep.py", "*.py"], "keep.py", True),
+    (["gen_*.py", "!gen_api.py", "gen_api.py"], "gen_api.py", True),
+])
+def test_negation_and_order(patterns, path, expected):
+    assert _ignored(patterns, path) is expected
+
+
+def test_rules_from_nested_gitignore_are_relative_and_take_precedence():
+    rules = cs.IgnoreRules().extend("", ["*.gen.py", "/top_only.py"])
+    rules = rules.extend("pkg", ["!keep.gen.py", "local.py", "/anchored.py"])
+
+    assert rules.is_ignored("a.gen.py", False)
+    assert rules.is_ignored("pkg/x.gen.py", False)
+    # A regra mais profunda vem depois e prevalece
+    assert not rules.is_ignored("pkg/keep.gen.py", False)
+    assert rules.is_ignored("keep.gen.py", False)
+    # Regras do .gitignore de pkg não valem fora de pkg
+    assert rules.is_ignored("pkg/local.py", False)
+    assert rules.is_ignored("pkg/sub/local.py", False)
+    assert not rules.is_ignored("local.py", False)
+    # "/" ancora no diretório do próprio .gitignore
+    assert rules.is_ignored("pkg/anchored.py", False)
+    assert not rules.is_ignored("pkg/sub/anchored.py", False)
+    assert rules.is_ignored("top_only.py", False)
+    assert not rules.is_ignored("pkg/top_only.py", False)
+
+
+def test_discovery_applies_nested_gitignores(write_tree):
+    root = write_tree({
+        ".gitignore": "generated/\n*_pb2.py\n",
+        "app/main.py": "",
+        "app/api_pb2.py": "",
+        "app/generated/models.py": "",
+        "app/.gitignore": "!api_pb2.py\nscratch.py\n",
+        "app/scratch.py": "",
+        "lib/scratch.py": "",
+        "lib/other_pb2.py": "",
+        # Um arquivo dentro de um diretório ignorado não volta com negação
+        "generated/.gitignore": "!*.py\n",
+        "generated/kept.py": "",
+    })
+
+    found = cs.find_python_files(str(root))
+    assert found == ["app/api_pb2.py", "app/main.py", "lib/scratch.py"]
+    assert len(cs.find_python_files(str(root), use_gitignore=False)) == 7
@@ -0,0 +1,58 @@
+import codescope360 as cs
+
+
+def _analyze(source):
+    return cs.analyze_bytes(source.encode("utf-8"), "mod.py")
+
+
+def test_top_level_functions_are_direct_module_children():
+    info = _analyze(
+        "def f():\n    pass\n"
+        "if True:\n    def g():\n        pass\n"
+        "try:\n    def h():\n        pass\nexcept ImportError:\n    pass\n"
+        "async def a():\n    def inner():\n        pass\n"
+    )
+    assert [function.name for function in info.functions] == ["f", "a"]
+
+
+def test_nested_classes_methods_and_main_block():
+    info = _analyze(
+        "class Outer:\n"
+        "    class Inner:\n        def m(self):\n            pass\n"
+        "    async def run(self):\n        pass\n"
+        "def build():\n    class Local:\n        pass\n"
+        "if __name__ == '__main__':\n    build()\n"
+    )
+    assert [(cls.name, [m.name for m in cls.methods]) for cls in info.classes] == [
+        ("Outer", ["run"]), ("Outer.Inner", ["m"]), ("Local", [])]
+    assert info.main_block == ("build()",)
+
+
+def test_comment_like_lines_inside_strings_are_ignored():
+    info = _analyze(
+        '"""Módulo."""\n'
+        "def f():\n"
+        '    return """\n# a\n# b\n# c\n"""\n'
+        "\n"
+        "def g():\n"
+        "    call(1, '''\n# d\n# e\n# f\n''')\n"
+        "    x = f'''\n# g\n# h\n# i\n{f()}'''\n"
+        "TEXT = '''\n# j\n# k\n# l\n'''\n"
+    )
+    assert info.comments == ()
+
+
+def test_real_comment_blocks_are_kept():
+    info = _analyze(
+        "# Cabeçalho do módulo\n"
+        "import os\n"
+        "\n"
+        "def f():\n"
+        "    call(\n"
+        "        # primeira\n"
+        "        # segunda\n"
+        "        # terceira\n"
+        "        '''texto\n  de duas linhas''',\n"
+        "    )\n"
+    )
+    assert info.comments == ("Cabeçalho do módulo", "primeira segunda terceira")
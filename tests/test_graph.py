@@ -0,0 +1,59 @@
+import codescope360 as cs
+
+
+def _components(graph):
+    return sorted(sorted(members) for members in cs.strongly_connected_components(graph))
+
+
+def test_tarjan_handles_deep_chains_without_recursion():
+    depth = 50000
+    graph = {f"m{i}": [f"m{i + 1}"] for i in range(depth)}
+    graph[f"m{depth}"] = []
+    components = cs.strongly_connected_components(graph)
+
+    assert len(components) == depth + 1
+    # Ordem topológica reversa: o fim da cadeia sai primeiro
+    assert components[0] == [f"m{depth}"] and components[-1] == ["m0"]
+
+    stats = cs.analyze_import_graph(graph)
+    assert stats["cycles"] == []
+    assert stats["metrics"]["m0"]["transitive_fan_out"] == depth
+    assert stats["metrics"][f"m{depth}"]["transitive_fan_in"] == depth
+    assert len(stats["layers"]) == depth + 1
+
+
+def test_overlapping_cycles_form_one_component():
+    graph = {
+        "a": ["b"], "b": ["c"], "c": ["a", "d"],  # a → b → c → a
+        "d": ["b", "e"],                          # c → d → b fecha outro ciclo com b e c
+        "e": ["f"], "f": ["e"],                   # ciclo separado
+        "g": ["a"],
+    }
+    assert _components(graph) == [["a", "b", "c", "d"], ["e", "f"], ["g"]]
+
+    stats = cs.analyze_import_graph(graph)
+    assert stats["cycles"] == [["a", "b", "c", "d"], ["e", "f"]]
+    metrics = stats["metrics"]
+    # Dentro de um ciclo todos alcançam os mesmos arquivos
+    assert metrics["a"]["transitive_fan_out"] == metrics["d"]["transitive_fan_out"] == 5
+    assert metrics["g"]["transitive_fan_out"] == 6
+    assert metrics["e"]["transitive_fan_in"] == 6
+    assert metrics["g"]["transitive_fan_in"] == 0
+
+
+def test_layers_follow_longest_dependency_path():
+    graph = {
+        "app": ["service", "util"],
+        "service": ["model", "util"],
+        "model": ["util"],
+        "util": [],
+        "script": ["app", "external"],
+    }
+    stats = cs.analyze_import_graph(graph)
+
+    assert stats["layers"] == [["external", "util"], ["model"], ["service"], ["app"], ["script"]]
+    metrics = stats["metrics"]
+    assert metrics["app"]["fan_out"] == 2 and metrics["util"]["fan_in"] == 3
+    assert metrics["script"]["transitive_fan_out"] == 5
+    assert metrics["util"]["transitive_fan_in"] == 4
+    assert metrics["external"]["fan_out"] == 0
@@ -0,0 +1,87 @@
+import os
+import time
+
+import pytest
+
+import codescope360 as cs
+
+
+def _initargs(guards=None):
+    return (cs.get_module_resolver(), False, None, guards or cs.ResourceGuards())
+
+
+def _large_module(functions):
+    return "".join(f"def f{i}(a, b):\n    return a + b * {i}\n\n" for i in range(functions))
+
+
+def test_timeout_kills_worker_and_slot_keeps_serving():
+    with cs.GuardedPool(1, _initargs(), timeout=0.5) as pool:
+        slow = pool.submit(time.sleep, 5)
+        with pytest.raises(cs.ParseTimeout):
+            slow.result()
+        # O processo substituto atende a próxima tarefa normalmente
+        assert pool.submit(abs, -3).result(timeout=30) == 3
+
+
+def test_timeout_falls_back_to_regex_summary(write_tree):
+    root = write_tree({"big.py": _large_module(20000), "small.py": "def g():\n    pass\n"})
+    cs.set_resource_guards(cs.ResourceGuards(parse_timeout=0.01))
+    results = {info.path: info for info in cs.analyze_files(["big.py"], str(root))}
+
+    big = results["big.py"]
+    assert big.error is None
+    assert big.partial and "excedeu" in big.partial
+    # O resumo por expressões regulares ainda lista as funções
+    assert len(big.functions) == 20000
+
+
+def test_max_nodes_falls_back_to_regex_summary():
+    cs.set_resource_guards(cs.ResourceGuards(max_nodes=50))
+    big = cs.analyze_bytes(_large_module(100).encode(), "big.py")
+    small = cs.analyze_bytes(b"def g():\n    pass\n", "small.py")
+
+    assert big.error is None
+    assert big.partial and "50 nós" in big.partial
+    assert [f.name for f in big.functions][:2] == ["f0", "f1"]
+    assert small.partial is None and small.error is None
+    assert [f.name for f in small.functions] == ["g"]
+
+
+def test_recursion_error_is_summarized():
+    source = "def f():\n    return " + "+".join(["1"] * 200000) + "\n\ndef g():\n    pass\n"
+    info = cs.analyze_bytes(source.encode(), "deep.py")
+    assert info.error is None
+    assert info.partial and "aninhamento" in info.partial
+
+
+def test_worker_is_recycled_after_max_tasks():
+    with cs.GuardedPool(1, _initargs(), max_tasks=2) as pool:
+        pids = [pool.submit(os.getpid).result(timeout=30) for _ in range(5)]
+    assert pids[0] == pids[1]
+    assert pids[2] == pids[3]
+    assert len({pids[0], pids[2], pids[4]}) == 3
+    assert os.getpid() not in pids
+
+
+def test_recycling_keeps_results_complete(write_tree):
+    files = {f"m{i}.py": f"def f{i}():\n    pass\n" for i in range(6)}
+    root = write_tree(files)
+    cs.set_resource_guards(cs.ResourceGuards(worker_max_files=2))
+    results = list(cs.analyze_files(sorted(files), str(root)))
+
+    assert [info.path for info in results] == sorted(files)
+    assert all(info.error is None and info.partial is None for info in results)
+    assert [info.functions[0].name for info in results] == [f"f{i}" for i in range(6)]
+
+
+def test_shutdown_cancels_queued_tasks():
+    pool = cs.GuardedPool(1, _initargs())
+    running = pool.submit(time.sleep, 1)
+    queued = [pool.submit(abs, -i) for i in range(5)]
+    # Espera a primeira tarefa chegar ao processo
+    while not running.running():
+        time.sleep(0.01)
+    pool.shutdown(wait=True, cancel_futures=True)
+
+    assert running.done() and not running.cancelled()
+    assert all(future.cancelled() for future in queued)